@@ -5,11 +5,16 @@
 
 import argparse
 import bibpy
+from bibpy.entry import CompactEntry, Entry
+import bibpy.lexers
+import bibpy.parser
 from bibpy.error import LexerException, ParseException
 import fnmatch
+import funcparserlib.lexer
 import platform
 import os
 import time
+import tracemalloc
 import sys
 
 
@@ -140,6 +145,232 @@ def benchmark_file(path, args):
     return benchmark, True
 
 
+# Small inputs typical of e.g. field values that are postprocessed
+_SMALL_DATE = '1995-03-30/1995-04-05'
+_SMALL_STRING_EXPR = 'jan # " and " # feb'
+_SMALL_BRACED_EXPR = '{The {TeX}book}'
+
+# Tokenizers as they were created for every call before they were cached
+_BASELINE_TOKENIZERS = {
+    'date': [
+        ('number', [r'[0-9]+']),
+        ('dash',   [r'-']),
+        ('slash',  [r'/'])
+    ],
+    'string expression': [
+        ('concat', [r'#']),
+        ('string', [r'"[^"]+"']),
+        ('name',   [r'[A-Za-z_][A-Za-z_0-9\-:?\'\.\s]*']),
+        ('space',  [r'[ \t\r\n]+']),
+    ],
+    'braced expression': [
+        ('lbrace',  [r'{']),
+        ('rbrace',  [r'}']),
+        ('content', [r'[^{}]+']),
+    ],
+}
+
+
+def time_calls(func, iterations):
+    """Return the total time it takes to call func a number of times."""
+    start = time_stamp()
+
+    for _ in range(iterations):
+        func()
+
+    return time_stamp() - start
+
+
+def baseline_tokenize(name, string):
+    """Tokenize a string the way it was done before tokenizers were cached."""
+    tokenizer = funcparserlib.lexer.make_tokenizer(_BASELINE_TOKENIZERS[name])
+
+    return bibpy.lexers.remove_whitespace_tokens(tokenizer(string))
+
+
+def benchmark_small_inputs(iterations):
+    """Benchmark lexing and parsing small inputs against the baseline.
+
+    Before tokenizers were cached, a new tokenizer was created for every date,
+    string expression and braced expression. Grammars were already built only
+    once, but all of them were built when bibpy was imported, which is
+    reported separately.
+
+    """
+    date_grammar = bibpy.parser.date_parser()
+
+    def date_baseline():
+        date_grammar.parse(baseline_tokenize('date', _SMALL_DATE))
+
+    def date_current():
+        bibpy.parser._parse_date_grammar(_SMALL_DATE)
+
+    inputs = [
+        ('date', date_baseline, date_current),
+        ('string expression',
+         lambda: baseline_tokenize('string expression', _SMALL_STRING_EXPR),
+         lambda: bibpy.parser.parse_string_expr(_SMALL_STRING_EXPR)),
+        ('braced expression',
+         lambda: baseline_tokenize('braced expression', _SMALL_BRACED_EXPR),
+         lambda: bibpy.parser.parse_braced_expr(_SMALL_BRACED_EXPR)),
+    ]
+
+    column_format = '{0:<20} {1:<20} {2:<20} {3:<20}'
+    print(column_format.format('INPUT', 'BASELINE', 'CURRENT', 'SPEEDUP'))
+
+    for name, baseline, current in inputs:
+        baseline_time = time_calls(baseline, iterations)
+        current_time = time_calls(current, iterations)
+
+        print(column_format.format(
+            name,
+            '{0:.4f}'.format(baseline_time),
+            '{0:.4f}'.format(current_time),
+            '{0:.2f}x'.format(baseline_time / current_time)
+        ))
+
+    build_time = time_calls(
+        lambda: [factory() for factory in bibpy.parser._formats.values()],
+        1
+    )
+
+    print('Building all reference format grammars at import took {0:.4f} '
+          'seconds in the baseline and is now done on first use'
+          .format(build_time))
+
+
+def create_dates(count):
+    """Create a number of date strings of which about a tenth are distinct."""
+    dates = []
+
+    for i in range(count):
+        year = 1900 + i % (count // 10 + 1) % 120
+        month, day = i % 12 + 1, i % 28 + 1
+
+        if i % 3 == 0:
+            dates.append('{0}-{1:02d}-{2:02d}'.format(year, month, day))
+        elif i % 3 == 1:
+            dates.append('{0}-{1:02d}/'.format(year, month))
+        else:
+            dates.append('{0}/{1}-{2:02d}'.format(year, year + 1, month))
+
+    return dates
+
+
+def benchmark_dates(count):
+    """Benchmark parsing dates with the date grammar and the date regex."""
+    dates = create_dates(count)
+    column_format = '{0:<20} {1:<20} {2:<20}'
+    print(column_format.format('PARSER', 'TIME', 'SPEEDUP'))
+
+    def parse_all(parse):
+        for date in dates:
+            parse(date)
+
+    grammar_time = time_calls(
+        lambda: parse_all(bibpy.parser._parse_date_grammar),
+        1
+    )
+    bibpy.parser.date_cache.cache_clear()
+
+    for name, parse in [('grammar', None),
+                        ('regex', bibpy.parser._parse_date),
+                        ('regex (cached)', bibpy.parser.parse_date)]:
+        parse_time = grammar_time if parse is None else\
+            time_calls(lambda: parse_all(parse), 1)
+
+        print(column_format.format(
+            name,
+            '{0:.4f}'.format(parse_time),
+            '{0:.2f}x'.format(grammar_time / parse_time)
+        ))
+
+
+def benchmark_large_comment(megabytes):
+    """Benchmark lexing and parsing a large comment with nested braces.
+
+    Some tools export megabytes of data in a single comment entry so this
+    guards against lexing time growing faster than the size of the comment.
+
+    """
+    chunk = 'Exported data {with {nested} braces}\n'
+    repeats = max(1, int(megabytes * 1024 * 1024) // len(chunk))
+    source = '@comment{' + chunk * repeats + '}'
+
+    column_format = '{0:<20} {1:<20} {2:<20}'
+    print(column_format.format('COMMENT SIZE', 'LEXING', 'PARSING'))
+
+    lex_time = time_calls(lambda: list(bibpy.lexers.lex_bib(source)), 1)
+    parse_time = time_calls(
+        lambda: bibpy.read_string(source, ignore_comments=False),
+        1
+    )
+
+    print(column_format.format(
+        human_readable_size(len(source)),
+        '{0:.4f}'.format(lex_time),
+        '{0:.4f}'.format(parse_time)
+    ))
+
+
+_ENTRY_FIELDS = [
+    ('author', 'Jane Doe and John Doe'),
+    ('title', 'A title'),
+    ('journal', 'Journal'),
+    ('year', '2001'),
+    ('volume', '12'),
+    ('pages', '1--10'),
+]
+
+
+def create_entries(entry_class, count):
+    """Create a number of entries of a class."""
+    return [
+        entry_class('article', 'key{0}'.format(i), _ENTRY_FIELDS)
+        for i in range(count)
+    ]
+
+
+def measure_entries(entry_class, count):
+    """Return the time to create and access entries and their memory use."""
+    start = time_stamp()
+    entries = create_entries(entry_class, count)
+    creation = time_stamp() - start
+
+    start = time_stamp()
+
+    for entry in entries:
+        entry.title
+        entry['year']
+
+    access = time_stamp() - start
+    del entries
+
+    # Measure memory separately as tracing allocations slows down creation
+    tracemalloc.start()
+    create_entries(entry_class, count)
+    _, memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return creation, access, memory
+
+
+def benchmark_entries(count):
+    """Benchmark creating and accessing entries with and without compaction."""
+    column_format = '{0:<20} {1:<20} {2:<20} {3:<20}'
+    print(column_format.format('CLASS', 'CREATION', 'ACCESS', 'MEMORY'))
+
+    for entry_class in (Entry, CompactEntry):
+        creation, access, memory = measure_entries(entry_class, count)
+
+        print(column_format.format(
+            entry_class.__name__,
+            '{0:.4f}'.format(creation),
+            '{0:.4f}'.format(access),
+            human_readable_size(memory)
+        ))
+
+
 def parse_args():
     """Parse commandline arguments."""
     parser = argparse.ArgumentParser(prog='benchmark.py',
@@ -158,6 +389,25 @@ def parse_args():
                         help='Skip files that result in errors')
     parser.add_argument('-o', '--postprocess', action='store_true',
                         help='Enable entry postprocessing')
+    parser.add_argument('-m', '--small-inputs', type=int, default=0,
+                        metavar='N',
+                        help='Instead of benchmarking files, lex and parse '
+                             'N small inputs with the baseline code path that '
+                             'created a tokenizer for every input and with '
+                             'the current one')
+    parser.add_argument('-d', '--dates', type=int, default=0, metavar='N',
+                        help='Instead of benchmarking files, parse N date '
+                             'strings with the date grammar and with the '
+                             'cached and uncached date regex')
+    parser.add_argument('-l', '--large-comment', type=float, default=0,
+                        metavar='MB',
+                        help='Instead of benchmarking files, lex and parse a '
+                             'synthetic comment entry of MB megabytes with '
+                             'nested braces, e.g. 10')
+    parser.add_argument('-e', '--entries', type=int, default=0, metavar='N',
+                        help='Instead of benchmarking files, compare the time '
+                             'and memory it takes to create and access N '
+                             'entries with and without compact storage')
 
     args, rest = parser.parse_known_args()
 
@@ -178,6 +428,22 @@ def parse_args():
 if __name__ == '__main__':
     args, rest = parse_args()
 
+    if args.small_inputs > 0:
+        benchmark_small_inputs(args.small_inputs)
+        sys.exit(0)
+
+    if args.dates > 0:
+        benchmark_dates(args.dates)
+        sys.exit(0)
+
+    if args.large_comment > 0:
+        benchmark_large_comment(args.large_comment)
+        sys.exit(0)
+
+    if args.entries > 0:
+        benchmark_entries(args.entries)
+        sys.exit(0)
+
     # Filename, # of entries, file size (bytes), time, status message
     column_format = '{0:<40} {1:<20} {2:<20} {3:<30} {4:<20}'
 
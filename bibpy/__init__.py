@@ -2,10 +2,16 @@
 
 """bibpy: Bib(la)tex parser and tools."""
 
+import bibpy.binary
+import bibpy.cache
+import bibpy.entries
 import bibpy.parser
 import bibpy.postprocess
 import bibpy.references
+import bibpy.tools
+import functools
 import io
+import mmap
 import os
 import re
 
@@ -14,8 +20,13 @@ __license__ = 'BSD 3-Clause'
 __author__ = 'Alexander Asp Bock'
 __all__ = ('read_string',
            'read_file',
+           'read_files',
+           'iter_string',
+           'iter_file',
            'write_string',
            'write_file',
+           'dump_binary',
+           'load_binary',
            'string_is_format',
            'file_is_format',
            'expand_strings',
@@ -32,7 +43,8 @@ def is_string(s):
 
 
 def read_string(string, format='relaxed', postprocess=False,
-                remove_braces=False, ignore_comments=True, split_names=False):
+                remove_braces=False, ignore_comments=True, split_names=False,
+                parser='funcparserlib'):
     """Read a string containing references in a given format.
 
     The function returns an Entries object containing parsed entries and
@@ -60,13 +72,21 @@ def read_string(string, format='relaxed', postprocess=False,
     last and suffix. This is only done for fields that are selected for
     postprocessing.
 
+    The parser kwarg selects the parser implementation, either 'fast' for a
+    hand-written recursive descent parser or 'funcparserlib' for the parser
+    combinator grammars. Both produce the same results but the error messages
+    of the fast parser do not list the expected tokens.
+
     """
-    return _read_common(bibpy.parser.parse(string, format, ignore_comments),
-                        format, postprocess, remove_braces, split_names)
+    parsed = bibpy.parser.parse(string, format, ignore_comments, parser)
+
+    return _read_common(parsed, format, postprocess, remove_braces,
+                        split_names)
 
 
 def read_file(source, format='relaxed', encoding='utf-8', postprocess=False,
-              remove_braces=False, ignore_comments=True, split_names=False):
+              remove_braces=False, ignore_comments=True, split_names=False,
+              parser='funcparserlib', mmap=False, workers=1, cache=None):
     """Read a file containing references in a given format.
 
     The source kwarg can either be a file handle or a filename. Files are
@@ -94,11 +114,248 @@ def read_file(source, format='relaxed', encoding='utf-8', postprocess=False,
     If split_names is True, split names into four components: first, prefix,
     last and suffix. This is only done for fields that are selected for
     postprocessing.
+
+    The parser kwarg selects the parser implementation, either 'fast' for a
+    hand-written recursive descent parser or 'funcparserlib' for the parser
+    combinator grammars. Both produce the same results but the error messages
+    of the fast parser do not list the expected tokens.
+
+    If mmap is True, the file is memory-mapped and lexed without decoding it
+    first so that only field values, keys and comments are decoded. The source
+    must then be a filename or a file handle backed by a real file. Files in
+    encodings other than utf-8, ascii, latin-1 and cp1250-cp1258 are decoded
+    in their entirety instead, see :py:func:`bibpy.parser.iter_parse_bytes`.
+
+    If workers is greater than one, the file is split into parts at entry
+    boundaries which are parsed and postprocessed in parallel by that many
+    worker processes. If workers is None, use as many workers as there are
+    processors. The results and any errors are the same as when reading the
+    file sequentially. This cannot be combined with mmap.
+
+    The cache kwarg is either a directory or a
+    :py:class:`~bibpy.cache.ParseCache` in which to store the results of
+    reading the file. If the file is read again with the same options and has
+    not changed, the results are loaded from the cache instead of parsing the
+    file. The cache is only used if the source is a filename.
+
+    """
+    if workers != 1 and mmap:
+        raise ValueError('Cannot read a memory-mapped file in parallel')
+
+    if cache is not None and is_string(source):
+        if not isinstance(cache, bibpy.cache.ParseCache):
+            cache = bibpy.cache.ParseCache(cache)
+
+        options = {
+            'format': format,
+            'encoding': encoding,
+            'postprocess': postprocess,
+            'remove_braces': remove_braces,
+            'ignore_comments': ignore_comments,
+            'split_names': split_names
+        }
+
+        results = cache.get(source, options)
+
+        if results is None:
+            # Parse the exact contents that are stored with the results in
+            # case the file changes while it is being parsed
+            data, stat = bibpy.cache.read_source(source)
+
+            if mmap:
+                parsed = bibpy.parser.parse_bytes(data, format, encoding,
+                                                  ignore_comments, parser)
+                results = _read_common(parsed, format, postprocess,
+                                       remove_braces, split_names)
+            else:
+                fh = io.TextIOWrapper(io.BytesIO(data), encoding=encoding)
+                results = read_file(fh, format, encoding, postprocess,
+                                    remove_braces, ignore_comments,
+                                    split_names, parser, workers=workers)
+
+            cache.put(source, options, results, data, stat)
+
+        return results
+
+    if workers != 1:
+        fh = io.open(source, encoding=encoding) if is_string(source)\
+            else source
+
+        with fh:
+            string = fh.read()
+
+        return _read_parallel(string, format, postprocess, remove_braces,
+                              ignore_comments, split_names, parser, workers)
+
+    if mmap:
+        parsed = _parse_mapped(source, format, encoding, ignore_comments,
+                               parser)
+    else:
+        fh = io.open(source, encoding=encoding) if is_string(source)\
+            else source
+        parsed = bibpy.parser.parse_file(fh, format, ignore_comments, parser)
+
+    return _read_common(parsed, format, postprocess, remove_braces,
+                        split_names)
+
+
+def read_files(paths, format='relaxed', encoding='utf-8', workers=None,
+               ordered=True, return_exceptions=False, **options):
+    """Read several files in parallel and generate (path, Entries) tuples.
+
+    The files are read by a pool of worker processes. If workers is None, use
+    as many workers as there are processors. If ordered is True, the results
+    are generated in the same order as the paths, otherwise they are generated
+    as soon as each file has been read.
+
+    Any other keyword arguments are passed on to :py:func:`~bibpy.read_file`.
+
+    If reading a file fails, a :py:exc:`bibpy.error.ReadError` with the path
+    of the file and the original exception is raised when its result would
+    have been generated. If return_exceptions is True, the original exception
+    is instead generated in place of the Entries object for that path. In
+    either case, the other files are still read by the remaining workers.
+
+    """
+    reader = functools.partial(
+        read_file,
+        format=format,
+        encoding=encoding,
+        **options
+    )
+
+    for path, result in bibpy.tools.parallel_map(reader, paths, workers,
+                                                 ordered):
+        if isinstance(result, Exception) and not return_exceptions:
+            raise bibpy.error.ReadError(path, result) from result
+
+        yield path, result
+
+
+def iter_string(string, format='relaxed', postprocess=False,
+                remove_braces=False, ignore_comments=True, split_names=False,
+                parser='funcparserlib'):
+    """Generate the entries and comments of a string one at a time.
+
+    Unlike :py:func:`~bibpy.read_string`, entries are parsed and yielded as
+    soon as they are found instead of being collected in an Entries object.
+    Strings, preambles, comment entries, bibliographic entries and non-entry
+    comments are generated in the order they appear in the source.
+
+    The options are the same as for :py:func:`~bibpy.read_string` and are
+    applied to each entry as it is generated.
+
+    """
+    results = bibpy.parser.iter_parse(string, format, ignore_comments,
+                                      parser)
+
+    for result in results:
+        yield _process_result(result, postprocess, remove_braces, split_names)
+
+
+def iter_file(source, format='relaxed', encoding='utf-8', postprocess=False,
+              remove_braces=False, ignore_comments=True, split_names=False,
+              parser='funcparserlib'):
+    """Generate the entries and comments of a file one at a time.
+
+    The file is read and parsed incrementally so memory use is bounded by the
+    largest entry in the file rather than the size of the file.
+
+    The options are the same as for :py:func:`~bibpy.read_file` and are
+    applied to each entry as it is generated.
+
     """
     fh = io.open(source, encoding=encoding) if is_string(source) else source
+    results = bibpy.parser.iter_parse_file(fh, format, ignore_comments,
+                                           parser=parser)
+
+    for result in results:
+        yield _process_result(result, postprocess, remove_braces, split_names)
+
+
+def _read_chunk(chunk, format, postprocess, remove_braces, ignore_comments,
+                split_names, parser):
+    """Internal function for reading part of a larger string."""
+    string, lnum, offset, prefix = chunk
+    parsed = bibpy.parser.parse(string, format, ignore_comments, parser, lnum,
+                                offset, prefix)
+
+    return _read_common(parsed, format, postprocess, remove_braces,
+                        split_names)
+
+
+def _read_parallel(string, format, postprocess, remove_braces,
+                   ignore_comments, split_names, parser, workers):
+    """Internal function for reading a string in parallel."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    chunks = []
+    lnum = 1
+    last = 0
+
+    for start, end in bibpy.parser.split_entries(string, workers):
+        lnum += string.count('\n', last, start)
+        chunks.append((string[start:end], lnum, start,
+                       bibpy.parser.line_prefix(string, start)))
+        last = start
+
+    reader = functools.partial(
+        _read_chunk,
+        format=format,
+        postprocess=postprocess,
+        remove_braces=remove_braces,
+        ignore_comments=ignore_comments,
+        split_names=split_names,
+        parser=parser
+    )
+
+    results = []
+
+    for chunk, result in bibpy.tools.parallel_map(reader, chunks, workers):
+        if isinstance(result, Exception):
+            # All previous chunks were complete so this chunk starts at an
+            # entry boundary but it may have been cut inside an entry. Read the
+            # rest of the string in one go to get either the correct results
+            # or the same error as when reading sequentially
+            _, lnum, offset, prefix = chunk
+            rest = (string[offset:], lnum, offset, prefix)
+            results.append(reader(rest))
+            break
+
+        results.append(result)
+
+    return bibpy.parser.merge_entries(results)
+
+
+def _parse_mapped(source, format, encoding, ignore_comments, parser):
+    """Internal function for parsing a memory-mapped file."""
+    fh = io.open(source, 'rb') if is_string(source) else source
+
+    with fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            # Empty files cannot be memory-mapped
+            return bibpy.parser.parse_bytes(b'', format, encoding,
+                                            ignore_comments, parser)
+
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return bibpy.parser.parse_bytes(data, format, encoding,
+                                            ignore_comments, parser)
+
+
+def _process_result(result, postprocess=False, remove_braces=False,
+                    split_names=False):
+    """Internal function for postprocessing a single parsed result."""
+    if postprocess or remove_braces:
+        if getattr(result, 'bibtype', None) not in\
+                (None, 'string', 'comment', 'preamble'):
+            bibpy.postprocess.postprocess(
+                result, postprocess,
+                remove_braces=remove_braces,
+                split_names=split_names
+            )
 
-    return _read_common(bibpy.parser.parse_file(fh, format, ignore_comments),
-                        format, postprocess, remove_braces, split_names)
+    return result
 
 
 def _read_common(parsed_tokens, format, postprocess=False, remove_braces=False,
@@ -107,11 +364,7 @@ def _read_common(parsed_tokens, format, postprocess=False, remove_braces=False,
     # Postprocess a subset of fields for automatic type conversion
     if postprocess or remove_braces:
         for entry in parsed_tokens.entries:
-            bibpy.postprocess.postprocess(
-                entry, postprocess,
-                remove_braces=remove_braces,
-                split_names=split_names
-            )
+            _process_result(entry, postprocess, remove_braces, split_names)
 
     return parsed_tokens
 
@@ -144,6 +397,37 @@ def write_file(source, entries, encoding='utf-8', **format_options):
         fh.write(bibpy.write_string(entries, **format_options))
 
 
+def dump_binary(entries, destination):
+    """Write an Entries object as a binary snapshot.
+
+    The destination is either a filename or a file handle opened in binary
+    mode. A snapshot can be loaded much faster than the bib source it was read
+    from, see :py:mod:`bibpy.binary` for the format and the types of field
+    values that can be stored.
+
+    """
+    if is_string(destination):
+        destination = io.open(destination, 'wb')
+
+    with destination as fh:
+        bibpy.binary.dump(entries, fh)
+
+
+def load_binary(source):
+    """Load an Entries object from a binary snapshot.
+
+    The source is either a filename or a file handle opened in binary mode.
+    Raises a ValueError if the source is not a snapshot or was written by an
+    incompatible version of bibpy.
+
+    """
+    if is_string(source):
+        source = io.open(source, 'rb')
+
+    with source as fh:
+        return bibpy.binary.load(fh)
+
+
 def string_is_format(string, format):
     """Check whether the string conforms to the given reference format."""
     try:
@@ -265,29 +549,34 @@ def unexpand_strings(entries, strings, ignore_duplicates=False):
                 setattr(entry, field, value)
 
 
+def _as_entries(entries):
+    """Return an Entries object for a list of entries or an Entries object."""
+    if isinstance(entries, bibpy.entries.Entries):
+        return entries
+
+    return bibpy.entries.Entries(entries)
+
+
 def _crossref_common(entries, ref_func, inherit=True, override=False,
                      exceptions={}):
     """Common function for inheritance and uninheritance of crossreferences."""
-    if not entries or not inherit:
+    # Reuse the key index of an Entries object for faster lookup
+    entries = _as_entries(entries)
+
+    if not entries.entries or not inherit:
         return
 
-    # For faster lookup
-    crossref_keys = {}
-    targets = []
+    crossref_keys = entries.index('bibkey')
 
-    for entry in entries:
+    for entry in entries.entries:
         # Only examine the entries that contain a crossref field
         if entry.crossref and is_string(entry.crossref):
-            targets.append(entry)
-
-        # All entries can be sources of a crossref field
-        crossref_keys[entry.bibkey] = entry
+            positions = crossref_keys.get(entry.crossref)
 
-    for entry in targets:
-        if entry.crossref in crossref_keys:
-            source = crossref_keys[entry.crossref]
-
-            ref_func(source, entry, inherit, override, exceptions)
+            # The last entry with a duplicate key is the source
+            if positions:
+                source = entries.entries[positions[-1]]
+                ref_func(source, entry, inherit, override, exceptions)
 
 
 def inherit_crossrefs(entries, inherit=True, override=False, exceptions={}):
@@ -307,6 +596,9 @@ def inherit_crossrefs(entries, inherit=True, override=False, exceptions={}):
     as per biblatex nomenclature. The last field is a dict of the options
     (inherit and override) for this pair of source and target.
 
+    The entries can be a list or an :py:class:`~bibpy.entries.Entries` object
+    whose index of keys is then reused.
+
     """
     _crossref_common(entries, bibpy.references.inherit_crossrefs, inherit,
                      override, exceptions)
@@ -343,17 +635,15 @@ def _filter_xdata_by_keys(entry, xdata_keys):
 
 def _xdata_common(entries, xdata_func):
     """Common function for inheritance and uninheritance of xdata fields."""
-    if not entries:
-        return
+    entries = _as_entries(entries)
 
     # For faster lookup
-    xdata_keys = {entry.bibkey: entry for entry in entries
-                  if entry.bibtype == 'xdata'}
+    xdata_keys = {entry.bibkey: entry for entry in entries.by_type('xdata')}
 
     if not xdata_keys:
         return
 
-    for entry in entries:
+    for entry in entries.entries:
         sources = _filter_xdata_by_keys(entry, xdata_keys)
 
         # xdata entries can cascade
@@ -370,7 +660,8 @@ def inherit_xdata(entries):
     """Expand the xdata fields in the given entries.
 
     Inheritance is done according to biber (see section 3.11.6 of the biblatex
-    manual).
+    manual). The entries can be a list or an :py:class:`~bibpy.entries.Entries`
+    object whose index of types is then reused.
 
     """
     _xdata_common(entries, bibpy.references.inherit_xdata)
@@ -0,0 +1,448 @@
+# -*- coding: utf-8 -*-
+
+"""Versioned binary snapshot format for Entries objects.
+
+A snapshot consists of a header followed by these sections:
+
+    * A string table of all distinct strings such as bibtypes, keys, field
+      names and values, stored once as a single utf-8 encoded blob and,
+      only if a string contains a null character, the lengths of the strings
+    * A stream of 64-bit integers describing the entries where strings are
+      referred to by their index in the string table
+
+Each section is prefixed by its size so that it can be read in one go. Values
+in the integer stream are non-negative string indices or a negative tag that is
+followed by the contents of the value, e.g. the length and elements of a list.
+
+Only strings, integers, floats, booleans, None, names, date ranges and lists,
+tuples and dictionaries of these values can be stored. Loading a snapshot
+never runs any code from it.
+
+"""
+
+import array
+import bibpy.entries
+from bibpy.date import DateRange
+from bibpy.entry import Comment, Entry, Preamble, String
+import bibpy.fields
+from bibpy.name import Name
+import collections
+import itertools
+import struct
+import sys
+
+__all__ = ('dump', 'load')
+
+_MAGIC = b'BIBPYBIN'
+_VERSION = 3
+
+# Version, byte order of the integer stream and string table encoding
+_HEADER = struct.Struct('<HBB')
+_SIZE = struct.Struct('<Q')
+
+# Floats are stored as the bits of a double in the integer stream
+_DOUBLE = struct.Struct('<d')
+_DOUBLE_BITS = struct.Struct('<q')
+_BYTEORDER = 0 if sys.byteorder == 'little' else 1
+
+# String tables are stored either as strings joined by a null character, which
+# is much faster to split, or as a list of lengths if a string contains one
+_JOINED, _LENGTHS = 0, 1
+_SEPARATOR = '\x00'
+
+# Tags for values that are not strings
+_INT = -1
+_LIST = -2
+_TUPLE = -3
+_NAME = -4
+_DATE = -5
+_NULL = -6
+_BOOL = -7
+_FLOAT = -8
+_DICT = -9
+_BIG_INT = -10
+
+# Stands in for None in the parts of a date
+_NONE = -1
+
+# Range of integers that fit in the stream
+_MIN_INT, _MAX_INT = -2 ** 63, 2 ** 63 - 1
+
+# Order of the lists of an Entries object in a snapshot
+_CATEGORIES = ('entries', 'strings', 'preambles', 'comment_entries',
+               'comments')
+
+
+def empty_fields(entry):
+    """Return the (field, value) pairs of an entry's empty fields.
+
+    Fields whose values are None or empty strings are not part of an entry's
+    fields but their values can still be accessed as attributes.
+
+    """
+    active = set(entry.fields)
+    empty = []
+
+    for attribute, value in getattr(entry, '__dict__', {}).items():
+        # Known fields are stored in underscored attributes behind their
+        # properties, see bibpy.entry.entry.autoproperty
+        field = attribute[1:] if attribute[1:] in bibpy.fields.all\
+            else attribute
+
+        if not field.startswith('_') and field not in active:
+            empty.append((field, value))
+
+    # Cleared fields of compact entries, see bibpy.entry.compact
+    for field in getattr(entry, '_cleared', None) or ():
+        if field not in active:
+            empty.append((field, None))
+
+    return empty
+
+
+class Writer:
+    """Encodes entries into a string table and a stream of integers."""
+
+    def __init__(self):
+        """Initialise an empty snapshot."""
+        self.indices = {}
+        self.stream = array.array('q')
+
+    def string(self, string):
+        """Return the index of a string in the string table."""
+        index = self.indices.get(string)
+
+        if index is None:
+            index = self.indices[string] = len(self.indices)
+
+        return index
+
+    def value(self, value):
+        """Append a field value to the stream."""
+        stream = self.stream
+
+        # Only exact types are encoded directly so that subclasses are not lost
+        value_type = type(value)
+
+        if value_type is str:
+            stream.append(self.string(value))
+        elif value_type is int:
+            if _MIN_INT <= value <= _MAX_INT:
+                stream.extend((_INT, value))
+            else:
+                stream.extend((_BIG_INT, self.string(str(value))))
+        elif value is None:
+            stream.append(_NULL)
+        elif value_type is bool:
+            stream.extend((_BOOL, int(value)))
+        elif value_type is float:
+            stream.extend((_FLOAT,
+                           _DOUBLE_BITS.unpack(_DOUBLE.pack(value))[0]))
+        elif value_type is dict:
+            stream.extend((_DICT, len(value)))
+
+            for key, element in value.items():
+                self.value(key)
+                self.value(element)
+        elif value_type is list or value_type is tuple:
+            stream.extend((_LIST if value_type is list else _TUPLE,
+                           len(value)))
+
+            for element in value:
+                self.value(element)
+        elif value_type is Name:
+            stream.extend((_NAME,
+                           self.string(value.first),
+                           self.string(value.prefix),
+                           self.string(value.last),
+                           self.string(value.suffix)))
+        elif value_type is DateRange:
+            stream.append(_DATE)
+
+            for date in (value.start, value.end):
+                stream.extend(_NONE if part is None else part
+                              for part in (date.year, date.month, date.day))
+
+            stream.append(int(value.open))
+        else:
+            raise ValueError(
+                "Cannot store a value of type '{0}' in a binary snapshot"
+                .format(value_type.__name__)
+            )
+
+    def entry(self, entry):
+        """Append a bibliographic entry to the stream."""
+        fields = entry.fields
+        self.stream.extend((
+            self.string(entry.bibtype),
+            self.string(entry.bibkey),
+            len(fields)
+        ))
+
+        for field in fields:
+            self.stream.append(self.string(field))
+            self.value(getattr(entry, field))
+
+        empty = empty_fields(entry)
+        self.stream.append(len(empty))
+
+        for field, value in empty:
+            self.stream.append(self.string(field))
+            self.value(value)
+
+    def entries(self, entries):
+        """Append all entries and comments of an Entries object."""
+        stream = self.stream
+
+        for category in _CATEGORIES:
+            items = getattr(entries, category)
+            stream.append(len(items))
+
+            if category == 'entries':
+                for entry in items:
+                    self.entry(entry)
+            elif category == 'strings':
+                for entry in items:
+                    stream.extend((self.string(entry.variable),
+                                   self.string(entry.value)))
+            elif category == 'comments':
+                stream.extend(self.string(comment) for comment in items)
+            else:
+                stream.extend(self.string(entry.value) for entry in items)
+
+    def write(self, fh):
+        """Write the snapshot to a binary file handle."""
+        strings = list(self.indices)
+
+        if any(_SEPARATOR in string for string in strings):
+            encoding = _LENGTHS
+            table = array.array('q', map(len, strings)).tobytes()
+            blob = ''.join(strings).encode('utf-8')
+        else:
+            encoding = _JOINED
+            table = b''
+            blob = _SEPARATOR.join(strings).encode('utf-8')
+
+        fh.write(_MAGIC)
+        fh.write(_HEADER.pack(_VERSION, _BYTEORDER, encoding))
+        fh.write(_SIZE.pack(len(strings)))
+
+        for section in (table, blob, self.stream.tobytes()):
+            fh.write(_SIZE.pack(len(section)))
+            fh.write(section)
+
+
+def dump(entries, fh):
+    """Write an Entries object as a binary snapshot to a binary file handle.
+
+    Raises a ValueError if a field value is of a type that cannot be stored.
+
+    """
+    writer = Writer()
+    writer.entries(entries)
+    writer.write(fh)
+
+
+def _read_exactly(fh, size):
+    """Read an exact number of bytes from a file handle."""
+    data = fh.read(size)
+
+    if len(data) != size:
+        raise ValueError('Truncated binary snapshot')
+
+    return data
+
+
+def _read_section(fh):
+    """Read a section prefixed by its size."""
+    size, = _SIZE.unpack(_read_exactly(fh, _SIZE.size))
+
+    return _read_exactly(fh, size)
+
+
+def _read_array(data, byteorder):
+    """Read an array of 64-bit integers in a given byte order."""
+    values = array.array('q')
+    values.frombytes(data)
+
+    if byteorder != _BYTEORDER:
+        values.byteswap()
+
+    return values
+
+
+def _read_strings(encoding, count, table, blob, byteorder):
+    """Decode the string table."""
+    if count == 0:
+        return []
+
+    if encoding == _JOINED:
+        return blob.decode('utf-8').split(_SEPARATOR)
+
+    lengths = _read_array(table, byteorder)
+    text = blob.decode('utf-8')
+    ends = list(itertools.accumulate(lengths))
+
+    return [text[end - length:end] for length, end in zip(lengths, ends)]
+
+
+class Reader:
+    """Decodes entries from a string table and a stream of integers."""
+
+    def __init__(self, strings, stream):
+        """Initialise with a decoded string table and stream."""
+        self.strings = strings
+        self.next = iter(stream).__next__
+
+        # The instance attribute that holds the value of each field
+        self.attributes = {}
+
+    def value(self, tag):
+        """Read a value that is not a string."""
+        nxt = self.next
+        strings = self.strings
+
+        if tag == _INT:
+            return nxt()
+        elif tag == _LIST or tag == _TUPLE:
+            values = []
+
+            for _ in range(nxt()):
+                index = nxt()
+                values.append(strings[index] if index >= 0
+                              else self.value(index))
+
+            return values if tag == _LIST else tuple(values)
+        elif tag == _NULL:
+            return None
+        elif tag == _BOOL:
+            return bool(nxt())
+        elif tag == _FLOAT:
+            return _DOUBLE.unpack(_DOUBLE_BITS.pack(nxt()))[0]
+        elif tag == _DICT:
+            values = {}
+
+            for _ in range(nxt()):
+                key = nxt()
+                key = strings[key] if key >= 0 else self.value(key)
+                index = nxt()
+                values[key] = strings[index] if index >= 0\
+                    else self.value(index)
+
+            return values
+        elif tag == _BIG_INT:
+            return int(strings[nxt()])
+        elif tag == _NAME:
+            return Name(strings[nxt()], strings[nxt()], strings[nxt()],
+                        strings[nxt()])
+        elif tag == _DATE:
+            parts = [nxt() for _ in range(6)]
+            parts = [None if part == _NONE else part for part in parts]
+
+            return DateRange(parts[:3], parts[3:], bool(nxt()))
+
+        raise ValueError("Unknown value tag '{0}' in snapshot".format(tag))
+
+    def attribute(self, field):
+        """Return the attribute that holds the value of a field."""
+        attribute = self.attributes.get(field)
+
+        if attribute is None:
+            # Known fields are stored in underscored attributes behind their
+            # properties, see bibpy.entry.entry.autoproperty
+            attribute = '_' + field if field in bibpy.fields.all else field
+            self.attributes[field] = attribute
+
+        return attribute
+
+    def entries(self, count):
+        """Read a number of bibliographic entries."""
+        nxt = self.next
+        strings = self.strings
+        new = Entry.__new__
+        results = []
+
+        for _ in range(count):
+            # Bypass Entry.__init__ and __setattr__ which are comparatively
+            # slow as the fields are already known to be valid
+            entry = new(Entry)
+            attributes = entry.__dict__
+            attributes['_bibtype'] = strings[nxt()]
+            attributes['_bibkey'] = strings[nxt()]
+            fields = collections.OrderedDict()
+
+            for _ in range(nxt()):
+                field = strings[nxt()]
+                index = nxt()
+                fields[field] = None
+                attributes[self.attribute(field)] = strings[index]\
+                    if index >= 0 else self.value(index)
+
+            # Empty fields are accessible but not part of the entry's fields
+            for _ in range(nxt()):
+                field = strings[nxt()]
+                index = nxt()
+                attributes[self.attribute(field)] = strings[index]\
+                    if index >= 0 else self.value(index)
+
+            attributes['_fields'] = fields
+            results.append(entry)
+
+        return results
+
+    def read(self):
+        """Read all entries and return an Entries object."""
+        nxt = self.next
+        strings = self.strings
+        results = {}
+
+        for category in _CATEGORIES:
+            count = nxt()
+
+            if category == 'entries':
+                results[category] = self.entries(count)
+            elif category == 'strings':
+                results[category] = [
+                    String(strings[nxt()], strings[nxt()])
+                    for _ in range(count)
+                ]
+            elif category == 'comments':
+                results[category] = [strings[nxt()] for _ in range(count)]
+            else:
+                cls = Preamble if category == 'preambles' else Comment
+                results[category] = [
+                    cls(strings[nxt()]) for _ in range(count)
+                ]
+
+        return bibpy.entries.Entries(**results)
+
+
+def load(fh):
+    """Read a binary snapshot from a binary file handle.
+
+    Raises a ValueError if the data is not a binary snapshot or was written by
+    an incompatible version of bibpy.
+
+    """
+    if fh.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError('Not a bibpy binary snapshot')
+
+    version, byteorder, encoding = _HEADER.unpack(
+        _read_exactly(fh, _HEADER.size)
+    )
+
+    if version != _VERSION:
+        raise ValueError(
+            'Unsupported binary snapshot version {0} (expected {1})'
+            .format(version, _VERSION)
+        )
+
+    count, = _SIZE.unpack(_read_exactly(fh, _SIZE.size))
+    table, blob, data = [_read_section(fh) for _ in range(3)]
+    stream = _read_array(data, byteorder)
+    strings = _read_strings(encoding, count, table, blob, byteorder)
+
+    try:
+        return Reader(strings, stream).read()
+    except (IndexError, StopIteration, TypeError):
+        raise ValueError('Corrupted binary snapshot')
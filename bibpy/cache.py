@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent on-disk cache of parsed files.
+
+Each cached file is stored in a separate file in the cache directory that is
+named after a hash of the file's path and the options used to read it. A cache
+file holds a small header with the modification time, size and content hash of
+the source file followed by the results as a binary snapshot (see
+:py:mod:`bibpy.binary`), so a stale cache file can be detected without loading
+the results.
+
+A cached result is valid if the modification time and size of the source file
+are unchanged or, if they have changed, its contents still hash to the same
+value. The least recently used cache files are removed when the total size of
+the cache exceeds its maximum size.
+
+"""
+
+import bibpy.binary
+import hashlib
+import os
+import struct
+import tempfile
+
+__all__ = ('ParseCache',)
+
+# Default maximum size of a cache directory in bytes
+_MAX_SIZE = 256 * 1024 * 1024
+
+# Suffix of cache files
+_SUFFIX = '.bibcache'
+
+# Version of the cache file format, cache files of other versions are ignored
+_VERSION = 3
+
+# Version, modification time in nanoseconds, size and content hash of the
+# source file
+_HEADER = struct.Struct('<HqQ32s')
+
+
+def content_hash(data):
+    """Return the digest of the contents of a file."""
+    return hashlib.sha256(data).digest()
+
+
+def read_source(path):
+    """Return the contents of a file and its status before it was read.
+
+    Results should be parsed from the returned contents and stored together
+    with them (see :py:meth:`ParseCache.put`), so that the cached results are
+    always those of the contents they are stored with.
+
+    """
+    with open(path, 'rb') as fh:
+        stat = os.fstat(fh.fileno())
+
+        return fh.read(), stat
+
+
+class ParseCache:
+    """A directory of cached parse results with a maximum size."""
+
+    def __init__(self, directory, max_size=_MAX_SIZE):
+        """Create a cache in a directory which is created if it is missing.
+
+        The max_size argument is the maximum total size in bytes of all cache
+        files in the directory.
+
+        """
+        if max_size < 0:
+            raise ValueError('Maximum cache size must be non-negative')
+
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+        # An estimate of the total size of the cache so that the directory is
+        # only scanned when it may have grown too large
+        self._size = None
+
+    def cache_path(self, path, options):
+        """Return the cache file path for a file read with some options."""
+        key = repr((os.path.abspath(path), sorted(options.items())))
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+        return os.path.join(self.directory, digest + _SUFFIX)
+
+    def get(self, path, options):
+        """Return the cached results for a file or None if there are none."""
+        cache_path = self.cache_path(path, options)
+        stat = os.stat(path)
+        data = None
+
+        try:
+            with open(cache_path, 'rb') as fh:
+                version, mtime, size, digest = _HEADER.unpack(
+                    fh.read(_HEADER.size)
+                )
+
+                if version != _VERSION:
+                    return None
+
+                if (mtime, size) != (stat.st_mtime_ns, stat.st_size):
+                    # The file may have been touched without changing it
+                    data, stat = read_source(path)
+
+                    if content_hash(data) != digest:
+                        return None
+
+                results = bibpy.binary.load(fh)
+        except Exception:
+            # Treat missing, unreadable or corrupted cache files as misses
+            return None
+
+        if data is not None:
+            # Store the new modification time to avoid hashing the file again
+            self.put(path, options, results, data, stat)
+        else:
+            try:
+                # Mark the cache file as recently used
+                os.utime(cache_path)
+            except FileNotFoundError:
+                pass
+
+        return results
+
+    def put(self, path, options, results, data=None, stat=None):
+        """Store the Entries object from reading a file with some options.
+
+        The data and stat arguments are the contents that the results were
+        parsed from and the status of the file before they were read, as
+        returned by :py:func:`read_source`. If they are None, the file is read
+        again which is only correct if it has not changed since it was parsed.
+
+        """
+        if data is None:
+            data, stat = read_source(path)
+
+        header = _HEADER.pack(_VERSION, stat.st_mtime_ns, stat.st_size,
+                              content_hash(data))
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(header)
+                bibpy.binary.dump(results, fh)
+
+            size = os.path.getsize(temp_path)
+
+            # Replace any previous cache file atomically so that concurrent
+            # readers never see a partially written file
+            os.replace(temp_path, self.cache_path(path, options))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        if self._size is None or self._size + size > self.max_size:
+            self.evict()
+        else:
+            self._size += size
+
+    def evict(self):
+        """Remove least recently used cache files until the cache fits."""
+        files = []
+        total = 0
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+        self._size = total
+
+    def clear(self):
+        """Remove all cache files."""
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                os.remove(entry.path)
+
+        self._size = 0
@@ -3,28 +3,61 @@
 """Special date class for handling biblatex date ranges."""
 
 import bibpy.parser
+import functools
+import weakref
 
 __all__ = ('DateRange', 'PartialDate')
 
+# Interned date ranges keyed by their start, end and whether they are open
+_interned = weakref.WeakValueDictionary()
 
+
+def _read_only(self, name, value):
+    raise AttributeError(
+        "'{0}' object is immutable".format(self.__class__.__name__)
+    )
+
+
+@functools.total_ordering
 class PartialDate:
-    """Light-weight class for representing partial dates."""
+    """Light-weight immutable class for representing partial dates.
+
+    Partial dates are ordered by year, month and day where a missing part
+    comes before any value, e.g. 2001 < 2001-01 < 2001-01-05 < 2001-02.
+
+    """
+
+    __slots__ = ('year', 'month', 'day')
 
     def __init__(self, year=None, month=None, day=None):
         """Initialise with a optional year, month and day."""
-        self.year = year if year is None else int(year)
-        self.month = month if month is None else int(month)
-        self.day = day if day is None else int(day)
+        year = year if year is None else int(year)
+        month = month if month is None else int(month)
+        day = day if day is None else int(day)
 
-        if self.year and self.year < 0:
+        if year and year < 0:
             raise ValueError("Year must be positive")
 
-        if self.month and (self.month < 1 or self.month > 12):
+        if month and (month < 1 or month > 12):
             raise ValueError("Month not in range")
 
-        if self.day and (self.day < 1 or self.day > 31):
+        if day and (day < 1 or day > 31):
             raise ValueError("Day not in range")
 
+        object.__setattr__(self, 'year', year)
+        object.__setattr__(self, 'month', month)
+        object.__setattr__(self, 'day', day)
+
+    __setattr__ = _read_only
+
+    @property
+    def parts(self):
+        """Return a (year, month, day) tuple of the date."""
+        return (self.year, self.month, self.day)
+
+    def _key(self):
+        return tuple((part is not None, part or 0) for part in self.parts)
+
     def __str__(self):
         s = str(self.year) if self.year else ""
         s += "-" + "{0:02d}".format(self.month) if self.month else ""
@@ -33,16 +66,34 @@ class PartialDate:
         return s
 
     def __eq__(self, other):
-        return isinstance(other, PartialDate) and self.year == other.year\
-            and self.month == other.month and self.day == other.day
+        return isinstance(other, PartialDate) and self.parts == other.parts
+
+    def __lt__(self, other):
+        if not isinstance(other, PartialDate):
+            return NotImplemented
+
+        return self._key() < other._key()
+
+    def __hash__(self):
+        return hash(self.parts)
 
     def __bool__(self):
-        return any(e is not None for e in [self.year, self.month, self.day])
+        return any(e is not None for e in self.parts)
 
+    def __reduce__(self):
+        return (self.__class__, self.parts)
 
-# NOTE: Implement comparison operators? How?
+
+@functools.total_ordering
 class DateRange:
-    """Wrapper class around biblatex date ranges."""
+    """Immutable wrapper class around biblatex date ranges.
+
+    Date ranges are ordered by their start dates, then by their end dates and
+    finally closed ranges come before open-ended ranges.
+
+    """
+
+    __slots__ = ('_start', '_end', '_open', '__weakref__')
 
     def __init__(self, start, end, open):
         """Create a date range with a start and/or end date.
@@ -52,9 +103,11 @@ class DateRange:
         valid.
 
         """
-        self._start = PartialDate(*start)
-        self._end = PartialDate(*end)
-        self._open = open
+        object.__setattr__(self, '_start', PartialDate(*start))
+        object.__setattr__(self, '_end', PartialDate(*end))
+        object.__setattr__(self, '_open', open)
+
+    __setattr__ = _read_only
 
     @classmethod
     def fromstring(cls, string):
@@ -87,6 +140,16 @@ class DateRange:
         """
         return self._open
 
+    def intern(self):
+        """Return the interned date range that is equal to this one.
+
+        Postprocessed fields with the same date range can share the interned
+        object instead of each having their own copy. The interned object is
+        discarded once it is no longer used.
+
+        """
+        return _interned.setdefault((self.start, self.end, self.open), self)
+
     def __eq__(self, other):
         if isinstance(other, self.__class__):
             return self.start == other.start and self.end == other.end and\
@@ -94,6 +157,19 @@ class DateRange:
 
         return False
 
+    def __lt__(self, other):
+        if not isinstance(other, self.__class__):
+            return NotImplemented
+
+        return (self.start, self.end, self.open) <\
+            (other.start, other.end, other.open)
+
+    def __hash__(self):
+        return hash((self.start, self.end, self.open))
+
+    def __reduce__(self):
+        return (self.__class__, (self.start.parts, self.end.parts, self.open))
+
     def __str__(self):
         if not self.start and not self.end:
             return ""
@@ -3,10 +3,102 @@
 """Tools for downloading bibtex files from digital object identifiers."""
 
 import bibpy
+import bibpy.doi.cache
+import collections
+import concurrent.futures
+import functools
+import http.client
+import threading
+import time
+import urllib.error
+import urllib.parse
 from urllib.request import Request, urlopen
 
+__all__ = ('retrieve', 'retrieve_many')
 
-def retrieve(doi, source='https://doi.org/{0}', raw=False, **options):
+# Default URL of the bibtex data of a doi
+_SOURCE = 'https://doi.org/{0}'
+
+# Request headers for retrieving bibtex data
+_HEADERS = {'accept': 'application/x-bibtex'}
+
+# Statuses of responses that redirect to another URL
+_REDIRECT_STATUSES = frozenset([301, 302, 303, 307, 308])
+
+# Statuses of responses to requests that may succeed if retried later
+_RETRY_STATUSES = frozenset([408, 429, 500, 502, 503, 504])
+
+_MAX_REDIRECTS = 5
+
+_CONNECTION_TYPES = {
+    'http': http.client.HTTPConnection,
+    'https': http.client.HTTPSConnection
+}
+
+
+def _parse_contents(contents, raw, options):
+    """Return the raw contents of a response or the entry parsed from it."""
+    if raw:
+        return contents
+
+    return bibpy.read_string(contents.decode('utf-8'), **options).entries[0]
+
+
+def _download(doi, source):
+    """Download the bibtex of a doi with a single request."""
+    req = Request(source.format(doi))
+    req.add_header('accept', _HEADERS['accept'])
+    handle = None
+
+    try:
+        handle = urlopen(req)
+
+        return handle.read()
+    finally:
+        if handle:
+            handle.close()
+
+
+def _make_cache(cache, offline):
+    """Return the cache to use for a cache argument and offline mode."""
+    if cache is None:
+        if offline:
+            raise ValueError('Offline mode requires a cache')
+
+        return None
+
+    if bibpy.is_string(cache):
+        return bibpy.doi.cache.DOICache(cache)
+
+    return cache
+
+
+def _cached_contents(cache, doi, source, offline, download):
+    """Return the response for a doi from a cache or else by downloading it.
+
+    Responses are cached per source. In offline mode, expired responses are
+    also used and a KeyError is raised if the doi is not cached.
+
+    """
+    if cache is not None:
+        contents = cache.get(doi, expired=offline, source=source)
+
+        if contents is not None:
+            return contents
+
+    if offline:
+        raise KeyError("DOI '{0}' is not cached".format(doi))
+
+    contents = download()
+
+    if cache is not None:
+        cache.put(doi, contents, source=source)
+
+    return contents
+
+
+def retrieve(doi, source=_SOURCE, raw=False, cache=None, offline=False,
+             **options):
     """Download a bibtex file specified by a digital object identifier.
 
     The source is a URL containing a single positional format specifier which
@@ -15,25 +107,285 @@ def retrieve(doi, source='https://doi.org/{0}', raw=False, **options):
     By default, the data from the doi is parsed by bibpy. If raw is True, the
     raw string is returned instead.
 
+    The cache kwarg is either a directory or a
+    :py:class:`~bibpy.doi.cache.DOICache` in which to store the raw responses.
+    Responses in the cache that have not expired are used instead of
+    downloading them again. Responses are cached separately for each source.
+    If offline is True, the doi is never downloaded and a KeyError is raised
+    if it is not in the cache.
+
     The options kwargs correspond to the arguments normally passed to
     :py:func:`bibpy.read_string`.
 
     """
-    req = Request(source.format(doi))
-    req.add_header('accept', 'application/x-bibtex')
-    handle = None
+    cache = _make_cache(cache, offline)
+    contents = _cached_contents(
+        cache,
+        doi,
+        source,
+        offline,
+        functools.partial(_download, doi, source)
+    )
+
+    return _parse_contents(contents, raw, options)
+
+
+class _ConnectionPool:
+    """Persistent HTTP connections to each host, one set per thread."""
+
+    def __init__(self, timeout):
+        """Create a pool whose connections use a timeout in seconds."""
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def request(self, url):
+        """Make a GET request and return the response and its body.
+
+        The connection to the host is reused by later requests from the same
+        thread if the server keeps it alive. A request on a reused connection
+        that the server has closed in the meantime is sent again on a new
+        connection.
+
+        """
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+
+        if parts.query:
+            path += '?' + parts.query
+
+        key = (parts.scheme, parts.netloc)
+        connections = self._thread_connections()
+
+        while True:
+            connection = connections.get(key)
+            reused = connection is not None
+
+            if not reused:
+                connection = self._connect(parts.scheme, parts.netloc)
+                connections[key] = connection
+
+            try:
+                connection.request('GET', path, headers=_HEADERS)
+                response = connection.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError):
+                self._discard(connections, key)
+
+                if reused:
+                    continue
+
+                raise
+
+            if response.will_close:
+                self._discard(connections, key)
+
+            return response, body
+
+    def close(self):
+        """Close all connections of all threads."""
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+
+            self._connections = []
+
+    def _thread_connections(self):
+        """Return the connections of the current thread keyed by host."""
+        connections = getattr(self._local, 'connections', None)
+
+        if connections is None:
+            connections = self._local.connections = {}
+
+        return connections
+
+    def _connect(self, scheme, netloc):
+        """Create a connection to a host."""
+        try:
+            connection_type = _CONNECTION_TYPES[scheme]
+        except KeyError:
+            raise ValueError("Unsupported URL scheme '{0}'".format(scheme))
+
+        connection = connection_type(netloc, timeout=self.timeout)
+
+        with self._lock:
+            self._connections.append(connection)
+
+        return connection
+
+    def _discard(self, connections, key):
+        """Close and forget the connection of the current thread to a host."""
+        connection = connections.pop(key)
+        connection.close()
+
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+
+def _fetch(pool, url):
+    """Return the body of the response to a URL following any redirects.
+
+    Raises a urllib.error.HTTPError for responses that are not successful.
+
+    """
+    for _ in range(_MAX_REDIRECTS + 1):
+        response, body = pool.request(url)
+
+        if response.status in _REDIRECT_STATUSES:
+            location = response.getheader('location')
+
+            if location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+
+        if response.status >= 300:
+            raise urllib.error.HTTPError(url, response.status, response.reason,
+                                         response.headers, None)
+
+        return body
+
+    raise urllib.error.HTTPError(url, response.status, 'Too many redirects',
+                                 response.headers, None)
+
+
+def _retry_delay(error, attempt, backoff, max_backoff):
+    """Return the number of seconds to wait before retrying a request.
+
+    The delay is at most max_backoff seconds even if the server asks for a
+    longer one in a Retry-After header.
+
+    """
+    delay = backoff * 2 ** attempt
+    retry_after = None
+
+    if error is not None and error.headers:
+        retry_after = error.headers.get('retry-after')
+
+    if retry_after and retry_after.isdigit():
+        delay = max(delay, int(retry_after))
+
+    return min(delay, max_backoff)
+
+
+def _fetch_with_retries(pool, url, retries, backoff, max_backoff):
+    """Return the body of the response to a URL, retrying with backoff."""
+    for attempt in range(retries + 1):
+        try:
+            return _fetch(pool, url)
+        except urllib.error.HTTPError as ex:
+            if ex.code not in _RETRY_STATUSES or attempt == retries:
+                raise
+
+            delay = _retry_delay(ex, attempt, backoff, max_backoff)
+        except (http.client.HTTPException, OSError):
+            if attempt == retries:
+                raise
+
+            delay = _retry_delay(None, attempt, backoff, max_backoff)
+
+        time.sleep(delay)
+
+
+def _iter_completed(executor, func, items, window, ordered):
+    """Generate (item, future) tuples with at most window futures pending."""
+    items = iter(items)
+    pending = collections.OrderedDict()
 
     try:
-        handle = urlopen(req)
-        contents = handle.read()
+        while True:
+            for item in items:
+                pending[executor.submit(func, item)] = item
 
-        if raw:
-            return contents
-        else:
-            return bibpy.read_string(
-                contents.decode('utf-8'),
-                **options
-            ).entries[0]
+                if len(pending) >= window:
+                    break
+
+            if not pending:
+                return
+
+            if ordered:
+                future = next(iter(pending))
+            else:
+                done, _ = concurrent.futures.wait(
+                    pending,
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                future = next(f for f in pending if f in done)
+
+            yield pending.pop(future), future
     finally:
-        if handle:
-            handle.close()
+        for future in pending:
+            future.cancel()
+
+
+def retrieve_many(dois, source=_SOURCE, concurrency=8, retries=3,
+                  backoff=0.5, timeout=30, raw=False, ordered=True,
+                  return_exceptions=False, cache=None, offline=False,
+                  max_backoff=60, **options):
+    """Download and parse the bibtex of many dois and generate (doi, entry).
+
+    The dois are retrieved concurrently by a pool of concurrency threads which
+    reuse their connections to the same hosts. Each response is parsed by its
+    thread as soon as it has been downloaded. If ordered is True, the results
+    are generated in the same order as the dois, otherwise they are generated
+    as soon as each doi has been retrieved.
+
+    Requests that fail because of a connection error, a timeout or a response
+    status that indicates a temporary error are retried up to retries times,
+    waiting backoff seconds before the first retry and doubling the wait
+    before each further retry. A longer wait requested by the server in a
+    Retry-After header is honoured, but no wait is longer than max_backoff
+    seconds. The timeout is in seconds.
+
+    The source, raw, cache, offline and options arguments are the same as for
+    :py:func:`retrieve`.
+
+    If retrieving a doi fails, the exception is raised when its result would
+    have been generated and the dois that have not been retrieved yet are
+    cancelled. If return_exceptions is True, the exception is instead
+    generated in place of the entry for that doi and the other dois are still
+    retrieved.
+
+    """
+    if concurrency < 1:
+        raise ValueError('Concurrency must be at least 1')
+
+    cache = _make_cache(cache, offline)
+    pool = _ConnectionPool(timeout)
+
+    def _retrieve(doi):
+        contents = _cached_contents(
+            cache,
+            doi,
+            source,
+            offline,
+            functools.partial(_fetch_with_retries, pool, source.format(doi),
+                              retries, backoff, max_backoff)
+        )
+
+        return _parse_contents(contents, raw, options)
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(concurrency) as executor:
+            # Only keep a few dois per thread queued so that results do not
+            # pile up if they are consumed slowly
+            completed = _iter_completed(executor, _retrieve, dois,
+                                        2 * concurrency, ordered)
+
+            try:
+                for doi, future in completed:
+                    try:
+                        result = future.result()
+                    except Exception as ex:
+                        if not return_exceptions:
+                            raise
+
+                        result = ex
+
+                    yield doi, result
+            finally:
+                # Cancel the queued dois before waiting for the threads
+                completed.close()
+    finally:
+        pool.close()
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent on-disk cache of the bibtex retrieved for digital identifiers.
+
+Each doi is stored in a separate file in the cache directory that is named
+after a hash of the normalised doi (see :py:func:`normalise_doi`) and the
+source URL it was retrieved from, so that responses from different sources are
+cached separately. A cache file
+holds a small header with the time the doi was retrieved followed by the raw
+bibtex of the response, so responses are parsed with the options of each
+retrieval.
+
+Responses that are older than the time-to-live of the cache are expired, and
+the least recently used cache files are removed when the total size of the
+cache exceeds its maximum size.
+
+Any object with the same :py:meth:`~DOICache.get` and :py:meth:`~DOICache.put`
+methods can be used as a cache by :py:func:`bibpy.doi.retrieve` and
+:py:func:`bibpy.doi.retrieve_many`.
+
+"""
+
+import hashlib
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+
+__all__ = ('DOICache', 'normalise_doi')
+
+# Default maximum size of a cache directory in bytes
+_MAX_SIZE = 64 * 1024 * 1024
+
+# Suffix of cache files
+_SUFFIX = '.doicache'
+
+# Version of the cache file format, cache files of other versions are ignored
+_VERSION = 2
+
+# Version and time of retrieval of a cached response
+_HEADER = struct.Struct('<Hd')
+
+# Prefixes of dois given as URIs or URLs
+_DOI_PREFIX_REGEX = re.compile(
+    r'^(?:doi:|https?://(?:dx\.)?doi\.org/)\s*',
+    re.IGNORECASE
+)
+
+
+def normalise_doi(doi):
+    """Return the canonical form of a doi.
+
+    Dois are case-insensitive and may be given with a 'doi:' prefix or as a
+    doi.org URL, e.g. 'https://doi.org/10.1145/1015530.1015557' and
+    'doi:10.1145/1015530.1015557' are both normalised to
+    '10.1145/1015530.1015557'.
+
+    """
+    return _DOI_PREFIX_REGEX.sub('', doi.strip()).lower()
+
+
+class DOICache:
+    """A directory of cached doi responses with a time-to-live."""
+
+    def __init__(self, directory, ttl=None, max_size=_MAX_SIZE):
+        """Create a cache in a directory which is created if it is missing.
+
+        The ttl argument is the number of seconds that a response is valid
+        after it was retrieved, or None if responses never expire. The
+        max_size argument is the maximum total size in bytes of all cache
+        files in the directory.
+
+        """
+        if ttl is not None and ttl < 0:
+            raise ValueError('Time-to-live must be non-negative')
+
+        if max_size < 0:
+            raise ValueError('Maximum cache size must be non-negative')
+
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+        os.makedirs(directory, exist_ok=True)
+
+        # An estimate of the total size of the cache so that the directory is
+        # only scanned when it may have grown too large. The cache may be
+        # shared by the threads of bibpy.doi.retrieve_many
+        self._size = None
+        self._lock = threading.Lock()
+
+    def cache_path(self, doi, source=None):
+        """Return the cache file path for a doi retrieved from a source."""
+        key = normalise_doi(doi)
+
+        if source is not None:
+            # Source URLs cannot contain whitespace
+            key += ' ' + source
+
+        key = key.encode('utf-8')
+
+        return os.path.join(
+            self.directory,
+            hashlib.sha256(key).hexdigest() + _SUFFIX
+        )
+
+    def get(self, doi, expired=False, source=None):
+        """Return the cached response for a doi or None if there is none.
+
+        Responses older than the time-to-live of the cache are only returned
+        if expired is True. Only responses stored for the same source are
+        returned.
+
+        """
+        cache_path = self.cache_path(doi, source)
+
+        try:
+            with open(cache_path, 'rb') as fh:
+                version, retrieved = _HEADER.unpack(fh.read(_HEADER.size))
+
+                if version != _VERSION:
+                    return None
+
+                if not expired and self.ttl is not None and\
+                        time.time() - retrieved > self.ttl:
+                    return None
+
+                contents = fh.read()
+        except Exception:
+            # Treat missing, unreadable or corrupted cache files as misses
+            return None
+
+        try:
+            # Mark the cache file as recently used
+            os.utime(cache_path)
+        except FileNotFoundError:
+            pass
+
+        return contents
+
+    def put(self, doi, contents, source=None):
+        """Store the raw response for a doi retrieved from a source."""
+        header = _HEADER.pack(_VERSION, time.time())
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(header)
+                fh.write(contents)
+
+            size = os.path.getsize(temp_path)
+
+            # Replace any previous cache file atomically so that concurrent
+            # readers never see a partially written file
+            os.replace(temp_path, self.cache_path(doi, source))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        with self._lock:
+            if self._size is None or self._size + size > self.max_size:
+                self._evict()
+            else:
+                self._size += size
+
+    def evict(self):
+        """Remove least recently used cache files until the cache fits."""
+        with self._lock:
+            self._evict()
+
+    def clear(self):
+        """Remove all cache files."""
+        with self._lock:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(_SUFFIX):
+                    os.remove(entry.path)
+
+            self._size = 0
+
+    def _evict(self):
+        files = []
+        total = 0
+
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+
+                files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_size:
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+            total -= size
+
+        self._size = total
@@ -6,6 +6,8 @@ As of the Biblatex package documentation version 3.2 (27/12/2015)
 
 """
 
+import bibpy.table
+
 __all__ = ('aliases', 'Entries')
 
 
@@ -107,17 +109,41 @@ def aliases(bibtype, format):
     return biblatex_entry_type_aliases.get(bibtype, [])
 
 
+def _index_entry(index, field, entry, position):
+    """Add the position of an entry to an index on a field."""
+    value = entry[field]
+
+    if value is None or value == '':
+        return
+
+    for element in value if isinstance(value, (list, tuple)) else [value]:
+        try:
+            positions = index.setdefault(element, [])
+        except TypeError:
+            # Unhashable values cannot be looked up and are not indexed
+            continue
+
+        # A list value may contain the same element more than once
+        if not positions or positions[-1] != position:
+            positions.append(position)
+
+
 class Entries:
     """Light-weight container object for parsed entries."""
 
-    def __init__(self, entries=[], strings=[], preambles=[],
-                 comment_entries=[], comments=[]):
+    def __init__(self, entries=None, strings=None, preambles=None,
+                 comment_entries=None, comments=None):
         """Initialise with lists of bibliographic entries and comments."""
-        self._entries = entries
-        self._strings = strings
-        self._preambles = preambles
-        self._comment_entries = comment_entries
-        self._comments = comments
+        self._entries = [] if entries is None else entries
+        self._strings = [] if strings is None else strings
+        self._preambles = [] if preambles is None else preambles
+        self._comment_entries = [] if comment_entries is None\
+            else comment_entries
+        self._comments = [] if comments is None else comments
+
+        # Lazily built indexes of the bibliographic entries by field, see
+        # index(). Each index is stored with the number of entries it covers
+        self._indexes = {}
 
     @property
     def entries(self):
@@ -159,6 +185,111 @@ class Entries:
         """Return all entries including comments."""
         return self.all_entries + [self.comments]
 
+    def index(self, field):
+        """Return the index of the bibliographic entries on a field.
+
+        The index is a dictionary of field values and the positions of the
+        entries with that value in :py:attr:`entries`. The 'bibkey' and
+        'bibtype' fields index the keys and types of the entries. Entries are
+        indexed under each element of list values and entries without a value
+        or with an unhashable value are not indexed.
+
+        Indexes are built on first use and kept up to date by
+        :py:meth:`add` and :py:meth:`remove`. Call :py:meth:`reindex` after
+        changing the field values of entries in place.
+
+        """
+        index, size = self._indexes.get(field, (None, 0))
+
+        # Rebuild the index if the list of entries was changed directly
+        if index is None or size != len(self._entries):
+            index = {}
+
+            for position, entry in enumerate(self._entries):
+                _index_entry(index, field, entry, position)
+
+            self._indexes[field] = index, len(self._entries)
+
+        return index
+
+    def reindex(self):
+        """Discard all indexes so that they are rebuilt on next use."""
+        self._indexes.clear()
+
+    def by_key(self, bibkey):
+        """Return the bibliographic entry with a key.
+
+        If several entries have the same key, the first one is returned. Raises
+        a KeyError if there is no entry with the key.
+
+        """
+        positions = self.index('bibkey').get(bibkey)
+
+        if not positions:
+            raise KeyError("No entry with key '{0}'".format(bibkey))
+
+        return self._entries[positions[0]]
+
+    def get(self, bibkey, default=None):
+        """Return the entry with a key or a default value if there is none."""
+        positions = self.index('bibkey').get(bibkey)
+
+        return self._entries[positions[0]] if positions else default
+
+    def by_type(self, bibtype):
+        """Return a list of all bibliographic entries of a type."""
+        return self.lookup('bibtype', bibtype)
+
+    def lookup(self, field, *values):
+        """Return the bibliographic entries where a field has any of values.
+
+        The entries are returned in the order they appear in
+        :py:attr:`entries`.
+
+        """
+        index = self.index(field)
+
+        if len(values) == 1:
+            positions = index.get(values[0], [])
+        else:
+            positions = sorted(set(
+                position for value in values
+                for position in index.get(value, [])
+            ))
+
+        return [self._entries[position] for position in positions]
+
+    def add(self, entry):
+        """Append a bibliographic entry and add it to any existing indexes."""
+        position = len(self._entries)
+        self._entries.append(entry)
+
+        for field, (index, size) in list(self._indexes.items()):
+            if size == position:
+                _index_entry(index, field, entry, position)
+                self._indexes[field] = index, size + 1
+
+    def remove(self, entry):
+        """Remove a bibliographic entry.
+
+        Raises a ValueError if the entry is not present. Indexes are rebuilt
+        on next use as the positions of the remaining entries change.
+
+        """
+        self._entries.remove(entry)
+        self.reindex()
+
+    def to_columns(self, fields=None):
+        """Return the bibliographic entries as a columnar table.
+
+        The table has a column of values for each field as well as columns for
+        the keys and types of the entries. If fields is None, there is a column
+        for every field used by any entry. See
+        :py:class:`~bibpy.table.EntryTable`.
+
+        """
+        return bibpy.table.EntryTable.fromentries(self.entries, fields)
+
     def __iter__(self):
         """Iterate over all entries, including non-entry comments."""
         for entries in self.all:
@@ -4,8 +4,11 @@
 
 from bibpy.entry.base import BaseEntry  # noqa: F401
 from bibpy.entry.comment import Comment  # noqa: F401
-from bibpy.entry.entry import Entry  # noqa: F401
+from bibpy.entry.compact import CompactEntry  # noqa: F401
+from bibpy.entry.entry import Entry, FieldEntry  # noqa: F401
 from bibpy.entry.preamble import Preamble  # noqa: F401
+from bibpy.entry.raw import RawEntry  # noqa: F401
 from bibpy.entry.string import String  # noqa: F401
 
-__all__ = ('base', 'entry', 'comment', 'string', 'preamble')
+__all__ = ('base', 'entry', 'comment', 'compact', 'string', 'preamble',
+           'raw')
@@ -6,6 +6,9 @@
 class BaseEntry:
     """Base class for all types of entries."""
 
+    # Subclasses that define __slots__ do not get an instance dictionary
+    __slots__ = ()
+
     def format(self, **options):
         raise NotImplementedError()
 
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""Memory-efficient entry class with the same interface as Entry.
+
+An :py:class:`~bibpy.entry.entry.Entry` stores the value of each field in a
+separate instance attribute and keeps an ordered dictionary of its active
+fields. A :py:class:`CompactEntry` instead stores its values in a single list
+and refers to a :py:class:`FieldLayout`, an ordered tuple of field names that
+is shared by all entries with the same fields in the same order.
+
+"""
+
+from bibpy.entry.entry import Entry, FieldEntry
+import bibpy.fields
+import itertools
+import sys
+import weakref
+
+__all__ = ('CompactEntry', 'FieldLayout')
+
+
+class FieldLayout:
+    """An ordered set of field names shared between entries.
+
+    Layouts are interned so there is only ever one layout for a given sequence
+    of field names. Use :py:meth:`get` to obtain a layout. A layout is freed
+    once no entries use it anymore.
+
+    """
+
+    __slots__ = ('fields', 'index', '_added', '_removed', '__weakref__')
+
+    # All layouts in use keyed by their field names
+    _layouts = weakref.WeakValueDictionary()
+
+    def __init__(self, fields):
+        """Create a layout for a tuple of field names."""
+        self.fields = fields
+        self.index = {field: i for i, field in enumerate(fields)}
+
+        # Cached transitions to the layouts with a field added or removed.
+        # Added layouts are weakly referenced so that long-lived layouts such
+        # as the empty layout do not keep every layout derived from them alive
+        self._added = {}
+        self._removed = {}
+
+    @classmethod
+    def get(cls, fields):
+        """Return the layout for a sequence of field names."""
+        fields = tuple(sys.intern(field) for field in fields)
+        layout = cls._layouts.get(fields)
+
+        if layout is None:
+            layout = cls._layouts[fields] = cls(fields)
+
+        return layout
+
+    def add(self, field):
+        """Return the layout with a field added at the end."""
+        ref = self._added.get(field)
+        layout = None if ref is None else ref()
+
+        if layout is None:
+            layout = FieldLayout.get(self.fields + (field,))
+            self._added[field] = weakref.ref(layout)
+
+            # Removing the field again leads back here, this also keeps the
+            # layouts an entry was built through alive as long as it is
+            layout._removed[field] = self
+
+        return layout
+
+    def remove(self, field):
+        """Return the layout with a field removed."""
+        layout = self._removed.get(field)
+
+        if layout is None:
+            layout = self._removed[field] = FieldLayout.get(
+                f for f in self.fields if f != field
+            )
+
+        return layout
+
+    def __repr__(self):
+        return 'FieldLayout({0})'.format(self.fields)
+
+
+_EMPTY_LAYOUT = FieldLayout.get(())
+
+
+class CompactEntry(FieldEntry):
+    """An entry that stores its field values compactly.
+
+    The interface is the same as for :py:class:`~bibpy.entry.entry.Entry`.
+    Compact entries have no instance dictionary. Attributes whose names start
+    with an underscore are not fields and are stored in a dictionary that is
+    only created when such an attribute is set.
+
+    """
+
+    __slots__ = ('_bibtype', '_bibkey', '_layout', '_values', '_cleared',
+                 '_attributes')
+
+    def __init__(self, bibtype='', bibkey='', fields=(), **kw_fields):
+        """Create a compact entry with a type, key and fields.
+
+        The arguments are the same as for
+        :py:class:`~bibpy.entry.entry.Entry`.
+
+        """
+        object.__setattr__(self, '_bibtype', bibtype)
+        object.__setattr__(self, '_bibkey', bibkey)
+        object.__setattr__(self, '_layout', _EMPTY_LAYOUT)
+        object.__setattr__(self, '_values', [])
+
+        # Names of non-field attributes that have been cleared, these are
+        # still accessible but their values are None like for Entry
+        object.__setattr__(self, '_cleared', None)
+        object.__setattr__(self, '_attributes', None)
+
+        for field, value in itertools.chain(fields, kw_fields.items()):
+            setattr(self, field, value)
+
+    @classmethod
+    def fromentry(cls, entry):
+        """Create a compact entry from another entry."""
+        return cls(entry.bibtype, entry.bibkey, list(entry))
+
+    @property
+    def fields(self):
+        """Return a list of active bib(la)tex fields.
+
+        Active fields are fields that are not None or empty strings.
+
+        """
+        return list(self._layout.fields)
+
+    def values(self):
+        """Return a list of field values in the entry."""
+        return list(self._values)
+
+    def _set_field(self, field, value):
+        """Set the value of a field, removing it if the value is empty."""
+        layout = self._layout
+        i = layout.index.get(field)
+
+        if value is None or value == '':
+            if i is not None:
+                object.__setattr__(self, '_layout', layout.remove(field))
+                del self._values[i]
+        elif i is None:
+            object.__setattr__(self, '_layout', layout.add(field))
+            self._values.append(value)
+        else:
+            self._values[i] = value
+
+    def __getattr__(self, name):
+        # Only called for names that are not class attributes or slots, i.e.
+        # fields that are not bib(la)tex fields and underscored attributes
+        if not name.startswith('_'):
+            i = self._layout.index.get(name)
+
+            if i is not None:
+                return self._values[i]
+            elif self._cleared and name in self._cleared:
+                return None
+        elif name not in CompactEntry.__slots__:
+            attributes = self._attributes
+
+            if attributes and name in attributes:
+                return attributes[name]
+
+        raise AttributeError(
+            "'{0}' object has no attribute '{1}'"
+            .format(self.__class__.__name__, name)
+        )
+
+    def __setattr__(self, name, value):
+        if name in CompactEntry.__slots__ or name in Entry._locked_fields:
+            object.__setattr__(self, name, value)
+            return
+        elif name.startswith('_'):
+            if self._attributes is None:
+                object.__setattr__(self, '_attributes', {})
+
+            self._attributes[name] = value
+            return
+
+        self._set_field(name, value)
+
+        if name not in bibpy.fields.all:
+            # Non-field attributes remain accessible after being cleared
+            cleared = self._cleared
+
+            if value is None or value == '':
+                if cleared is None:
+                    cleared = set()
+                    object.__setattr__(self, '_cleared', cleared)
+
+                cleared.add(name)
+            elif cleared:
+                cleared.discard(name)
+
+    def __len__(self):
+        """Return the number of fields and extra fields in this entry."""
+        return len(self._values)
+
+    def __iter__(self):
+        return zip(self._layout.fields, self._values)
+
+    def __reduce__(self):
+        # Layouts are interned so pickle the fields instead of the layout
+        return (self.__class__, (self.bibtype, self.bibkey, list(self)))
+
+    def __repr__(self):
+        return "CompactEntry(type={0}, key={1})".format(
+            self.bibtype,
+            self.bibkey
+        )
+
+
+def _field_property(field, doc):
+    """Create a property for a bib(la)tex field of a compact entry."""
+    def _getter(self):
+        i = self._layout.index.get(field)
+
+        return None if i is None else self._values[i]
+
+    def _setter(self, value):
+        self._set_field(field, value)
+
+    return property(_getter, _setter, doc=doc)
+
+
+# Override the properties of Entry for all bib(la)tex fields
+for field in bibpy.fields.all:
+    setattr(CompactEntry, field, _field_property(
+        field,
+        getattr(Entry, field).__doc__
+    ))
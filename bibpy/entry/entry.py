@@ -13,8 +13,17 @@ from collections.abc import Iterable
 import itertools
 
 
-class Entry(BaseEntry):
-    """Represents an entry in a bib file."""
+class FieldEntry(BaseEntry):
+    """Base class for bibliographic entries with fields.
+
+    Subclasses decide how fields are stored and must implement the fields
+    property, __setattr__ and __repr__. This class has no instance dictionary
+    so that slotted subclasses like
+    :py:class:`~bibpy.entry.compact.CompactEntry` do not get one either.
+
+    """
+
+    __slots__ = ()
 
     # List of predefined properties that cannot be set through setattr etc.
     _locked_fields = frozenset([
@@ -30,24 +39,6 @@ class Entry(BaseEntry):
         'clear'
     ])
 
-    def __init__(self, bibtype='', bibkey='', fields=(), **kw_fields):
-        """Create a bib entry with a type, key and fields.
-
-        Pass an iterable of name/value pairs denoting fields to keep the order.
-
-        Using keyword arguments are not guaranteed to keep the same ordering
-        until Python 3.6 (see PEP 468).
-
-        """
-        # We use an ordered dict here to maintain the same order as the fields
-        # are listed in files
-        self._fields = collections.OrderedDict()
-        self._bibtype = bibtype
-        self._bibkey = bibkey
-
-        for field, value in itertools.chain(fields, kw_fields.items()):
-            setattr(self, field, value)
-
     def format(self, align=True, indent='    ', order=[], surround='{}',
                **kwargs):
         """Format and return the entry as a string.
@@ -137,7 +128,7 @@ class Entry(BaseEntry):
         Active fields are fields that are not None or empty strings.
 
         """
-        return list(self._fields)
+        raise NotImplementedError()
 
     @property
     def extra_fields(self):
@@ -192,7 +183,7 @@ class Entry(BaseEntry):
 
     def __eq__(self, other):
         """Entries are equal if their types, keys, fields and values match."""
-        if not isinstance(other, Entry):
+        if not isinstance(other, FieldEntry):
             return False
 
         if self.bibtype != other.bibtype or self.bibkey != other.bibkey:
@@ -219,16 +210,6 @@ class Entry(BaseEntry):
         """
         return item in self.fields or item in self.extra_fields
 
-    def __setattr__(self, name, value):
-        super().__setattr__(name, value)
-
-        if not name.startswith('_') and name not in Entry._locked_fields:
-            if value is None or value == '':
-                if name in self._fields:
-                    self._fields.pop(name)
-            else:
-                self._fields[name] = None
-
     def __setitem__(self, key, value):
         setattr(self, key, value)
 
@@ -244,6 +225,47 @@ class Entry(BaseEntry):
         """Return the number of fields and extra fields in this entry."""
         return len(self.fields)
 
+
+class Entry(FieldEntry):
+    """Represents an entry in a bib file."""
+
+    def __init__(self, bibtype='', bibkey='', fields=(), **kw_fields):
+        """Create a bib entry with a type, key and fields.
+
+        Pass an iterable of name/value pairs denoting fields to keep the order.
+
+        Using keyword arguments are not guaranteed to keep the same ordering
+        until Python 3.6 (see PEP 468).
+
+        """
+        # We use an ordered dict here to maintain the same order as the fields
+        # are listed in files
+        self._fields = collections.OrderedDict()
+        self._bibtype = bibtype
+        self._bibkey = bibkey
+
+        for field, value in itertools.chain(fields, kw_fields.items()):
+            setattr(self, field, value)
+
+    @property
+    def fields(self):
+        """Return a list of active bib(la)tex fields.
+
+        Active fields are fields that are not None or empty strings.
+
+        """
+        return list(self._fields)
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+
+        if not name.startswith('_') and name not in Entry._locked_fields:
+            if value is None or value == '':
+                if name in self._fields:
+                    self._fields.pop(name)
+            else:
+                self._fields[name] = None
+
     def __repr__(self):
         return "Entry(type={0}, key={1})".format(self.bibtype, self.bibkey)
 
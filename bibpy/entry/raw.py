@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+"""Entries that are formatted as the source text they were parsed from.
+
+A :py:class:`RawEntry` wraps a parsed entry of any type together with its
+original text, see :py:func:`bibpy.parser.iter_parse_file_raw`. Formatting a
+raw entry returns the text verbatim instead of formatting the entry's fields,
+which preserves the layout of the source and avoids the cost of formatting.
+
+"""
+
+__all__ = ('RawEntry',)
+
+
+class RawEntry:
+    """A read-only parsed entry that formats as its source text.
+
+    All attributes other than :py:attr:`entry` and :py:attr:`text` are those
+    of the wrapped entry.
+
+    """
+
+    __slots__ = ('entry', 'text')
+
+    def __init__(self, entry, text):
+        """Wrap a parsed entry and the text it was parsed from."""
+        object.__setattr__(self, 'entry', entry)
+        object.__setattr__(self, 'text', text)
+
+    def format(self, **format_options):
+        """Return the source text of the entry.
+
+        The format options are ignored as the text is never reformatted.
+
+        """
+        return self.text
+
+    def __getattr__(self, name):
+        # Only called for attributes that are not slots
+        if name in RawEntry.__slots__:
+            raise AttributeError(name)
+
+        return getattr(self.entry, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "'{0}' object is read-only".format(self.__class__.__name__)
+        )
+
+    def __getitem__(self, field):
+        return self.entry[field]
+
+    def __iter__(self):
+        return iter(self.entry)
+
+    def __len__(self):
+        return len(self.entry)
+
+    def __eq__(self, other):
+        if isinstance(other, RawEntry):
+            other = other.entry
+
+        return self.entry == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (self.__class__, (self.entry, self.text))
+
+    def __repr__(self):
+        return 'RawEntry({0!r})'.format(self.entry)
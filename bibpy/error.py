@@ -15,6 +15,29 @@ class ParseException(Exception):
     pass
 
 
+class ReadError(Exception):
+    """Raised when one of several files cannot be read."""
+
+    def __init__(self, path, error):
+        """Initialise with the path of the file and the original error."""
+        super().__init__(path, error)
+        self._path = path
+        self._error = error
+
+    def __str__(self):
+        return "{0}: {1}".format(self.path, self.error)
+
+    @property
+    def path(self):
+        """The path of the file that could not be read."""
+        return self._path
+
+    @property
+    def error(self):
+        """The error raised when reading the file."""
+        return self._error
+
+
 class RequiredFieldError(Exception):
     """Raised when an entry does not conform to a format's requirements."""
 
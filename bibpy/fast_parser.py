@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+
+"""Hand-written recursive descent parser for bib(la)tex.
+
+The parser accepts exactly the same token streams as the funcparserlib
+grammars in :py:mod:`bibpy.parser` and produces the same results for them,
+but avoids the overhead of parser combinators. Alternatives are tried in the
+same order as in the grammars and an alternative that succeeds is never
+revisited.
+
+Error messages have the same format as those of funcparserlib, i.e. the span
+of the offending token followed by its value, but do not list the expected
+tokens and may point at an earlier token than funcparserlib would.
+
+"""
+
+import bibpy.entry
+import bibpy.error
+import bibpy.parser
+from funcparserlib.lexer import Token
+
+__all__ = ('FastParser', 'parser_from_format')
+
+# Returned when peeking past the last token
+_END = Token('end', '')
+
+
+class NoParse(Exception):
+    """Raised internally when a token does not match the grammar."""
+
+    def __init__(self, pos):
+        """Initialise with the index of the offending token."""
+        super().__init__(pos)
+        self.pos = pos
+
+
+def _peek(tokens, pos):
+    """Return the token at a position or an end token if there is none."""
+    return tokens[pos] if pos < len(tokens) else _END
+
+
+def _expect(tokens, pos, token_type):
+    """Return the token at a position if it has the given type or fail."""
+    token = _peek(tokens, pos)
+
+    if token.type != token_type:
+        raise NoParse(pos)
+
+    # Return the token rather than its value as the values of compact tokens
+    # are only created on demand
+    return token
+
+
+class FastParser:
+    """Recursive descent parser for bib(la)tex entries and comments."""
+
+    def __init__(self, validate_field, validate_entry):
+        """Create a parser that uses the given validation functions.
+
+        The validation functions determine the allowable fields and entry
+        types, see :py:data:`bibpy.parser.validators`.
+
+        """
+        self.validate_field = validate_field
+        self.validate_entry = validate_entry
+
+    def parse(self, tokens):
+        """Parse a list of tokens and return a list of results.
+
+        Raises a :py:exc:`bibpy.error.ParseException` if the tokens do not
+        conform to the grammar.
+
+        """
+        results = []
+        pos = 0
+
+        try:
+            while pos < len(tokens):
+                result, pos = self.item(tokens, pos)
+                results.append(result)
+        except NoParse as ex:
+            raise bibpy.error.ParseException(self.error_message(tokens, ex))
+
+        return results
+
+    def error_message(self, tokens, ex):
+        """Return an error message for a failed parse."""
+        if ex.pos >= len(tokens):
+            return 'got unexpected end of input'
+
+        token = tokens[ex.pos]
+        location = ''
+
+        if token.start is not None and token.end is not None:
+            location = '{0},{1}-{2},{3}: '.format(*(token.start + token.end))
+
+        return '{0}got unexpected token: {1!r}'.format(location, token.value)
+
+    def item(self, tokens, pos):
+        """Parse a top-level item, i.e. an entry or a non-entry comment."""
+        token = _peek(tokens, pos)
+
+        if token.type == 'comment':
+            return token.value, pos + 1
+        elif token.type != 'entry':
+            raise NoParse(pos)
+
+        bibtype = _expect(tokens, pos + 1, 'name').value.lower()
+        simple = None
+
+        if bibtype == 'string':
+            simple = self.string_entry
+        elif bibtype == 'comment':
+            simple = self.comment_entry
+        elif bibtype == 'preamble':
+            simple = self.preamble_entry
+
+        if simple:
+            try:
+                return simple(tokens, pos + 2)
+            except NoParse as ex:
+                # Fall back to a regular entry, keeping the error that got
+                # the furthest if that fails as well
+                try:
+                    return self.entry(tokens, pos)
+                except NoParse as ex2:
+                    raise ex if ex.pos > ex2.pos else ex2
+
+        return self.entry(tokens, pos)
+
+    def enclosed(self, tokens, pos, inner):
+        """Parse an expression enclosed in braces or parentheses."""
+        token_type = _peek(tokens, pos).type
+
+        if token_type == 'lbrace':
+            end = 'rbrace'
+        elif token_type == 'lparen':
+            end = 'rparen'
+        else:
+            raise NoParse(pos)
+
+        result, pos = inner(tokens, pos + 1)
+        _expect(tokens, pos, end)
+
+        return result, pos + 1
+
+    def string_entry(self, tokens, pos):
+        """Parse the body of a @string entry."""
+        (variable, value), pos = self.enclosed(tokens, pos, self.assignment)
+
+        return bibpy.entry.String(variable, value.strip('"')), pos
+
+    def comment_entry(self, tokens, pos):
+        """Parse the body of a @comment entry."""
+        value, pos = self.enclosed(tokens, pos, self.content)
+
+        return bibpy.entry.Comment(value), pos
+
+    def preamble_entry(self, tokens, pos):
+        """Parse the body of a @preamble entry."""
+        value, pos = self.enclosed(tokens, pos, self.content)
+
+        return bibpy.entry.Preamble(value), pos
+
+    def content(self, tokens, pos):
+        """Parse the content of a @comment or @preamble entry."""
+        return _expect(tokens, pos, 'content').value, pos + 1
+
+    def assignment(self, tokens, pos):
+        """Parse a string variable assignment."""
+        variable = _expect(tokens, pos, 'name').value
+        _expect(tokens, pos + 1, 'equals')
+        value, pos = self.value(tokens, pos + 2)
+
+        return (variable, value), pos
+
+    def entry(self, tokens, pos):
+        """Parse a bibliographic entry such as @article."""
+        _expect(tokens, pos, 'entry')
+        bibtype = _expect(tokens, pos + 1, 'name').value
+
+        if not self.validate_entry(bibtype):
+            raise NoParse(pos + 1)
+
+        _expect(tokens, pos + 2, 'lbrace')
+        key = _peek(tokens, pos + 3)
+
+        if key.type not in ('name', 'number'):
+            raise NoParse(pos + 3)
+
+        _expect(tokens, pos + 4, 'comma')
+        pos += 5
+        fields = None
+
+        try:
+            field, pos = self.field(tokens, pos)
+            fields = [field]
+
+            while _peek(tokens, pos).type == 'comma':
+                try:
+                    field, pos = self.field(tokens, pos + 1)
+                    fields.append(field)
+                except NoParse:
+                    break
+        except NoParse:
+            pass
+
+        if _peek(tokens, pos).type == 'comma':
+            pos += 1
+
+        _expect(tokens, pos, 'rbrace')
+
+        return bibpy.parser.make_entry((bibtype, key.value, fields)), pos + 1
+
+    def field(self, tokens, pos):
+        """Parse a single field and its value."""
+        name = _expect(tokens, pos, 'name').value
+
+        if not self.validate_field(name):
+            raise NoParse(pos)
+
+        _expect(tokens, pos + 1, 'equals')
+        value, pos = self.value(tokens, pos + 2)
+
+        return (name.strip().lower(), value), pos
+
+    def value(self, tokens, pos):
+        """Parse the value of a field or string variable."""
+        token_type = _peek(tokens, pos).type
+
+        if token_type == 'lbrace':
+            return self.braced_expr(tokens, pos)
+        elif token_type == 'number':
+            return tokens[pos].value, pos + 1
+
+        return self.string_expr(tokens, pos)
+
+    def braced_expr(self, tokens, pos):
+        """Parse a possibly nested braced expression without outer braces."""
+        _expect(tokens, pos, 'lbrace')
+        parts = []
+        pos += 1
+
+        while True:
+            token = _peek(tokens, pos)
+
+            if token.type == 'content':
+                parts.append(token.value)
+                pos += 1
+            elif token.type == 'lbrace':
+                inner, pos = self.braced_expr(tokens, pos)
+                parts.append('{' + inner + '}')
+            else:
+                break
+
+        _expect(tokens, pos, 'rbrace')
+
+        return ''.join(parts), pos + 1
+
+    def string_expr(self, tokens, pos):
+        """Parse a string expression, e.g. '"This " # var # " that"'."""
+        parts = [self.string_expr_element(tokens, pos)]
+        pos += 1
+
+        while _peek(tokens, pos).type == 'concat':
+            try:
+                element = self.string_expr_element(tokens, pos + 1)
+            except NoParse:
+                break
+
+            parts.append(tokens[pos].value)
+            parts.append(element)
+            pos += 2
+
+        if len(parts) == 1:
+            return parts[0].strip('"'), pos
+
+        return ''.join(parts), pos
+
+    def string_expr_element(self, tokens, pos):
+        """Parse a quoted string or a variable in a string expression."""
+        token = _peek(tokens, pos)
+
+        if token.type == 'string':
+            return token.value.strip()
+        elif token.type == 'name':
+            return token.value
+
+        raise NoParse(pos)
+
+
+# Cache of parsers for each reference format
+_parsers = {}
+
+
+def parser_from_format(format):
+    """Return the fast parser corresponding to the given format string."""
+    if format not in _parsers:
+        if format not in bibpy.parser.validators:
+            raise KeyError(
+                "Reference format '{0}' does not exist (use any of {1})"
+                .format(
+                    format,
+                    ", ".join(sorted(bibpy.parser.validators.keys()))
+                )
+            )
+
+        _parsers[format] = FastParser(*bibpy.parser.validators[format])
+
+    return _parsers[format]
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+
+"""Incremental parsing of sources that are edited and reread repeatedly.
+
+An :py:class:`IncrementalReader` keeps the parsed results of a source together
+with the span of each top-level item, i.e. an entry and any non-entry comment
+preceding it. When the source changes, only the items whose spans overlap the
+change are lexed and parsed again while the results of all other items are
+reused as they are.
+
+"""
+
+import bibpy.entries
+import bibpy.lexers
+import bibpy.parser
+import bibpy.postprocess
+from bibpy.lexers.base_lexer import LexerError
+import bisect
+import itertools
+
+__all__ = ('IncrementalReader',)
+
+# The lists of an Entries object that results are sorted into
+_CATEGORIES = ('entries', 'strings', 'preambles', 'comment_entries',
+               'comments')
+
+# Number of characters to compare at a time when looking for a change
+_BLOCK_SIZE = 4096
+
+
+def _category(result):
+    """Return the Entries list that a parsed result belongs to."""
+    bibtype = getattr(result, 'bibtype', False)
+
+    if bibtype == 'string':
+        return 'strings'
+    elif bibtype == 'comment':
+        return 'comment_entries'
+    elif bibtype == 'preamble':
+        return 'preambles'
+    elif bibtype:
+        return 'entries'
+
+    return 'comments'
+
+
+def common_prefix(a, b):
+    """Return the length of the common prefix of two strings."""
+    size = min(len(a), len(b))
+    i = 0
+
+    # Skip equal blocks first as comparing slices is much faster than
+    # comparing the strings one character at a time
+    while i < size and a[i:i + _BLOCK_SIZE] == b[i:i + _BLOCK_SIZE]:
+        i += _BLOCK_SIZE
+
+    i = min(i, size)
+
+    while i < size and a[i] == b[i]:
+        i += 1
+
+    return i
+
+
+def common_suffix(a, b, limit):
+    """Return the length of the common suffix of two strings up to a limit."""
+    i = 0
+
+    while i < limit:
+        j = min(i + _BLOCK_SIZE, limit)
+
+        if a[len(a) - j:len(a) - i] != b[len(b) - j:len(b) - i]:
+            break
+
+        i = j
+
+    while i < limit and a[len(a) - i - 1] == b[len(b) - i - 1]:
+        i += 1
+
+    return i
+
+
+class IncrementalReader:
+    """Reader that reparses only the changed items of an edited source.
+
+    The options are the same as for :py:func:`~bibpy.read_string` and are
+    applied to each new or changed entry. Results of unchanged items are
+    reused so the same entry objects are returned after each update.
+
+    """
+
+    def __init__(self, string='', format='relaxed', postprocess=False,
+                 remove_braces=False, ignore_comments=True, split_names=False,
+                 parser='funcparserlib'):
+        """Create a reader and parse an initial source string."""
+        # Fail early on an invalid format or parser
+        bibpy.parser.iter_results((), format, ignore_comments, parser)
+
+        self.format = format
+        self.postprocess = postprocess
+        self.remove_braces = remove_braces
+        self.ignore_comments = ignore_comments
+        self.split_names = split_names
+        self.parser = parser
+
+        self._string = ''
+
+        # The length, number of newlines and results of each item in the
+        # source. The results are (offset, result) tuples where the offset is
+        # relative to the start of the item
+        self._lengths = []
+        self._newlines = []
+        self._results = []
+
+        # The number of results of each item in each Entries list
+        self._counts = {category: [] for category in _CATEGORIES}
+        self._lists = {category: [] for category in _CATEGORIES}
+
+        # Whether the last item in the source was closed, otherwise it is a
+        # trailing comment which may be extended by a change
+        self._closed = True
+
+        self.update(string)
+
+    @property
+    def string(self):
+        """The current source string."""
+        return self._string
+
+    @property
+    def entries(self):
+        """An Entries object with the results for the current source."""
+        return bibpy.entries.Entries(
+            *[list(self._lists[category]) for category in _CATEGORIES]
+        )
+
+    def items(self):
+        """Generate (start, end, result) tuples in source order.
+
+        The start and end positions give the span of each result in the
+        current source.
+
+        """
+        start = 0
+
+        for length, results in zip(self._lengths, self._results):
+            end = start + length
+
+            for i, (offset, result) in enumerate(results):
+                if i + 1 < len(results):
+                    result_end = start + results[i + 1][0]
+                else:
+                    result_end = end
+
+                yield start + offset, result_end, result
+
+            start = end
+
+    def update(self, string):
+        """Update the source with a new string and return its entries.
+
+        The change is found by comparing the new string to the current one. If
+        the new string cannot be parsed, an exception is raised and the reader
+        keeps its current state.
+
+        """
+        old = self._string
+        start = common_prefix(old, string)
+        limit = min(len(old), len(string)) - start
+        suffix = common_suffix(old, string, limit)
+
+        return self._reparse(string, start, len(old) - suffix,
+                             len(string) - suffix)
+
+    def edit(self, start, end, text):
+        """Replace the source between two positions with a text.
+
+        Return the entries of the updated source. This avoids comparing the
+        entire source as :py:meth:`update` does.
+
+        """
+        old = self._string
+
+        if not 0 <= start <= end <= len(old):
+            raise ValueError(
+                'Invalid span ({0}, {1}) for a source of length {2}'
+                .format(start, end, len(old))
+            )
+
+        string = old[:start] + text + old[end:]
+
+        return self._reparse(string, start, end, start + len(text))
+
+    def _reparse(self, string, start, old_end, new_end):
+        """Reparse the items of a string that overlap a change.
+
+        The text between start and old_end in the current source has been
+        replaced by the text between start and new_end in the string.
+
+        """
+        if start == old_end == new_end:
+            # Nothing has changed
+            return self.entries
+
+        ends = list(itertools.accumulate(self._lengths))
+        delta = new_end - old_end
+
+        # Items ending at or before the start of the change are unaffected as
+        # the lexer is in the same state at the end of each closed item
+        first = bisect.bisect_right(ends, start)
+
+        if first == len(ends) and ends and not self._closed:
+            first -= 1
+
+        last = bisect.bisect_left(ends, old_end, first)
+        window_start = ends[first - 1] if first else 0
+        lnum = 1 + sum(self._newlines[:first])
+        step = 1
+
+        while True:
+            if last < len(ends):
+                window_end = ends[last] + delta
+            else:
+                window_end = len(string)
+
+            try:
+                items, closed = self._parse_window(string, window_start,
+                                                   window_end, lnum)
+            except LexerError:
+                # An error may be caused by an item that continues past the
+                # window so only raise it if there is nothing left to lex
+                if window_end == len(string):
+                    raise
+
+                items, closed = None, False
+
+            if items is not None:
+                break
+
+            # The last item of the window continues past its end so extend the
+            # window by an exponentially growing number of items
+            last = min(last + step, len(ends))
+            step *= 2
+
+        at_end = window_end == len(string)
+        self._replace(first, last + 1, items, closed if at_end else None)
+        self._string = string
+
+        return self.entries
+
+    def _parse_window(self, string, start, end, lnum):
+        """Parse the items of a string between two positions.
+
+        Return a list of (length, newlines, results) tuples for each item and
+        whether the last item was closed. The list is None if the window does
+        not end at the end of the string and its last item is not closed.
+
+        """
+        compact = self.parser == 'fast'
+        at_end = end == len(string)
+        tokens = bibpy.lexers.lex_bib(
+            string[start:end],
+            lnum,
+            start,
+            compact,
+            prefix=bibpy.parser.line_prefix(string, start)
+        )
+        items = []
+        item_start = start
+        closed = True
+
+        for group, closed in bibpy.parser.iter_groups(tokens):
+            if not closed and not at_end:
+                return None, False
+
+            item_end = group[-1].end[1] if closed else end
+            results = bibpy.parser.iter_results(
+                [group],
+                self.format,
+                self.ignore_comments,
+                self.parser
+            )
+
+            # An entry starts right after the comment preceding it
+            entry_offset = len(group[0].value)\
+                if group[0].type == 'comment' else 0
+
+            items.append((
+                item_end - item_start,
+                string.count('\n', item_start, item_end),
+                [
+                    (0 if _category(result) == 'comments' else entry_offset,
+                     self._process(result))
+                    for result in results
+                ]
+            ))
+
+            item_start = item_end
+
+        return items, closed
+
+    def _process(self, result):
+        """Postprocess a parsed result if it is a bibliographic entry."""
+        if (self.postprocess or self.remove_braces) and\
+                _category(result) == 'entries':
+            bibpy.postprocess.postprocess(
+                result,
+                self.postprocess,
+                remove_braces=self.remove_braces,
+                split_names=self.split_names
+            )
+
+        return result
+
+    def _replace(self, first, last, items, closed):
+        """Replace the items between two indices with new items.
+
+        The closed argument is None if the items do not include the last one,
+        otherwise it is whether the last item was closed.
+
+        """
+        for category in _CATEGORIES:
+            counts = self._counts[category]
+            index = sum(counts[:first])
+            count = sum(counts[first:last])
+
+            self._lists[category][index:index + count] = [
+                result
+                for _, _, results in items
+                for _, result in results
+                if _category(result) == category
+            ]
+
+            counts[first:last] = [
+                sum(1 for _, result in results
+                    if _category(result) == category)
+                for _, _, results in items
+            ]
+
+        self._lengths[first:last] = [length for length, _, _ in items]
+        self._newlines[first:last] = [newlines for _, newlines, _ in items]
+        self._results[first:last] = [results for _, _, results in items]
+
+        if closed is not None:
+            self._closed = closed
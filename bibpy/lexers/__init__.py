@@ -5,6 +5,7 @@
 from bibpy.lexers.biblexer import BibLexer
 from bibpy.lexers.name_lexer import NameLexer
 from bibpy.lexers.namelist_lexer import NamelistLexer
+from bibpy.memo import LRUCache
 import funcparserlib.lexer as lexer
 from funcparserlib.lexer import Token
 
@@ -14,33 +15,72 @@ def remove_whitespace_tokens(tokens):
     return [token for token in tokens if token.type != 'space']
 
 
-def lex_bib(string):
-    """Lex a string into bib tokens."""
-    return BibLexer().lex(string)
+def lex_bib(string, lnum=1, offset=0, compact=False, encoding='utf-8',
+            prefix=''):
+    """Lex a string into bib tokens.
+
+    The lnum and offset arguments give the position of the string in a larger
+    source so that the positions of tokens and errors are correct. The prefix
+    is the text of the larger source from the start of the line up to the
+    string, which is needed for the columns and lines of errors. If compact
+    is True, generate :py:class:`~bibpy.lexers.base_lexer.CompactToken`
+    objects instead of funcparserlib tokens.
+
+    The string may also be a bytes-like object such as a memory-mapped file in
+    an ASCII-compatible encoding. Token values are then decoded using the
+    given encoding and positions are byte offsets.
+
+    """
+    return BibLexer(compact, encoding).lex(string, lnum, offset, prefix)
+
+
+# Tokenizers are created once and reused as they are called for every field
+# value that is postprocessed or expanded
+_date_tokenizer = lexer.make_tokenizer([
+    ('number', [r'[0-9]+']),
+    ('dash',   [r'-']),
+    ('slash',  [r'/'])
+])
+
+_string_expr_tokenizer = lexer.make_tokenizer([
+    ('concat', [r'#']),
+    ('string', [r'"[^"]+"']),
+    ('name',   [r'[A-Za-z_][A-Za-z_0-9\-:?\'\.\s]*']),
+    ('space',  [r'[ \t\r\n]+']),
+])
+
+_braced_expr_tokenizer = lexer.make_tokenizer([
+    ('lbrace',  [r'{']),
+    ('rbrace',  [r'}']),
+    ('content', [r'[^{}]+']),
+])
+
+_generic_query_tokenizer = lexer.make_tokenizer([
+    ('not',    [r'\^']),
+    ('equals', [r'=']),
+    ('approx', [r'~']),
+    ('le',     [r'<=']),
+    ('lt',     [r'<']),
+    ('ge',     [r'>=']),
+    ('gt',     [r'>']),
+    ('comma',  [r',']),
+    ('dash',   [r'-']),
+    ('number', [r'-?(0|([1-9][0-9]*))']),
+    ('name',   [r'\w+']),
+    ('space',  [r'[ \t\r\n]+']),
+    ('any',    [r'[^<><=>=\s=\^~]+'])
+])
 
 
 def lex_date(date_string):
     """Lex a string into biblatex date tokens."""
-    tokenizer = lexer.make_tokenizer([
-        ('number', [r'[0-9]+']),
-        ('dash',   [r'-']),
-        ('slash',  [r'/'])
-    ])
-
-    return tokenizer(date_string)
+    return _date_tokenizer(date_string)
 
 
 def lex_string_expr(string):
     """Lex a string expression."""
-    tokenizer = lexer.make_tokenizer([
-        ('concat', [r'#']),
-        ('string', [r'"[^"]+"']),
-        ('name',   [r'[A-Za-z_][A-Za-z_0-9\-:?\'\.\s]*']),
-        ('space',  [r'[ \t\r\n]+']),
-    ])
-
     try:
-        return remove_whitespace_tokens(tokenizer(string))
+        return remove_whitespace_tokens(_string_expr_tokenizer(string))
     except lexer.LexerError:
         # If we fail to lex the string, it is not a valid string expression so
         # just return it as a single token
@@ -49,18 +89,27 @@ def lex_string_expr(string):
 
 def lex_braced_expr(string):
     """Lex a braced expression."""
-    tokenizer = lexer.make_tokenizer([
-        ('lbrace',  [r'{']),
-        ('rbrace',  [r'}']),
-        ('content', [r'[^{}]+']),
-    ])
-
-    return remove_whitespace_tokens(tokenizer(string))
+    return remove_whitespace_tokens(_braced_expr_tokenizer(string))
 
 
 def lex_namelist(string):
-    """Lex a namelist delimited by zero brace-level 'and'."""
-    return NamelistLexer().lex(string)
+    """Lex a namelist delimited by zero brace-level 'and'.
+
+    Returns a list of the names. Lexed namelists are cached, see
+    :py:data:`namelist_cache`.
+
+    """
+    return list(namelist_cache(string))
+
+
+def _lex_namelist(string):
+    """Lex a namelist into a tuple of names without caching it."""
+    return tuple(NamelistLexer().lex(string))
+
+
+# Fields with the same lists of names are common, e.g. all papers by the same
+# authors. The names are cached as tuples so that they cannot be modified
+namelist_cache = LRUCache(_lex_namelist, 4096)
 
 
 def lex_name(string):
@@ -77,20 +126,4 @@ def lex_generic_query(query):
     Used by bibpy's accompanying tools.
 
     """
-    tokenizer = lexer.make_tokenizer([
-        ('not',    [r'\^']),
-        ('equals', [r'=']),
-        ('approx', [r'~']),
-        ('le',     [r'<=']),
-        ('lt',     [r'<']),
-        ('ge',     [r'>=']),
-        ('gt',     [r'>']),
-        ('comma',  [r',']),
-        ('dash',   [r'-']),
-        ('number', [r'-?(0|([1-9][0-9]*))']),
-        ('name',   [r'\w+']),
-        ('space',  [r'[ \t\r\n]+']),
-        ('any',    [r'[^<><=>=\s=\^~]+'])
-    ])
-
-    return remove_whitespace_tokens(tokenizer(query))
+    return remove_whitespace_tokens(_generic_query_tokenizer(query))
@@ -2,15 +2,52 @@
 
 """Base class for all lexers."""
 
+import functools
 import re
 from funcparserlib.lexer import Token
 
+# Patterns for nested expressions where the first group is the opening
+# delimiter and the second group is the closing delimiter
+_NESTING = {
+    'braces': r'({)|(})',
+    'parens': r'(\()|(\))',
+}
+
+_NON_ASCII = re.compile(b'[\x80-\xff]')
+
+
+def has_non_ascii(data, start, end):
+    """Return True if a slice of a byte source contains non-ASCII bytes."""
+    return _NON_ASCII.search(data, start, end) is not None
+
+
+def decode(data, encoding):
+    """Decode a slice of a byte source as if it was read in text mode."""
+    value = data.decode(encoding)
+
+    if '\r' in value:
+        # Translate newlines like universal newlines mode does
+        value = value.replace('\r\n', '\n').replace('\r', '\n')
+
+    return value
+
+
+def _count_in_slice(string, sub, start, end):
+    """Count a substring in a slice of objects without a count method."""
+    # Most tokens do not span several lines so avoid copying them if possible
+    if string.find(sub, start, end) == -1:
+        return 0
+
+    return string[start:end].count(sub)
+
 
 class LexerError(Exception):
     """General lexer error."""
 
     def __init__(self, msg, pos, char, lnum, brace_level, line):
         """Initialise with information on where the error occurred."""
+        # Pass all arguments on so the error can be pickled
+        super().__init__(msg, pos, char, lnum, brace_level, line)
         self.msg = msg
         self.pos = pos
         self.char = char
@@ -31,37 +68,215 @@ class LexerError(Exception):
             )
 
 
+class CompactToken:
+    """A token that refers to its value in the source string.
+
+    Compact tokens are an alternative to funcparserlib's tokens for large
+    inputs: Each token is a single slotted object instead of a token and two
+    position tuples, and its value is only sliced from the source when it is
+    requested. The start and end properties give the same positions as those
+    of funcparserlib's tokens.
+
+    """
+
+    __slots__ = ('type', 'string', 'first', 'last', 'lnum', 'offset')
+
+    def __init__(self, token_type, string, first, last, lnum, offset=0):
+        """Create a token for the string between two positions."""
+        self.type = token_type
+        self.string = string
+        self.first = first
+        self.last = last
+        self.lnum = lnum
+        self.offset = offset
+
+    @property
+    def value(self):
+        """The string value of the token."""
+        return self.string[self.first:self.last]
+
+    @property
+    def start(self):
+        """The line number and position where the token starts."""
+        return self.lnum, self.offset + self.first
+
+    @property
+    def end(self):
+        """The line number and position where the token ends."""
+        newlines = self.string.count('\n', self.first, self.last)
+
+        return self.lnum + newlines, self.offset + self.last
+
+    def __eq__(self, other):
+        return self.type == getattr(other, 'type', None) and\
+            self.value == getattr(other, 'value', None)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'CompactToken({0!r}, {1!r})'.format(self.type, self.value)
+
+
+class ByteToken(CompactToken):
+    """A compact token whose value is decoded from a byte source on demand.
+
+    Positions are byte offsets rather than character offsets.
+
+    """
+
+    __slots__ = ('encoding',)
+
+    def __init__(self, token_type, string, first, last, lnum, offset=0,
+                 encoding='utf-8'):
+        """Create a token for the bytes between two positions."""
+        super().__init__(token_type, string, first, last, lnum, offset)
+        self.encoding = encoding
+
+    @property
+    def value(self):
+        """The decoded string value of the token."""
+        return decode(self.string[self.first:self.last], self.encoding)
+
+    @property
+    def end(self):
+        """The line number and position where the token ends."""
+        newlines = self.string[self.first:self.last].count(b'\n')
+
+        return self.lnum + newlines, self.offset + self.last
+
+
 class BaseLexer:
-    """Base class for all bibpy lexers."""
+    """Base class for all bibpy lexers.
+
+    Subclasses list the tokens they recognise in the token_patterns class
+    attribute as (token type, regex, handler) tuples in the order they should
+    be tried. The handler is the name of a method that creates the token from
+    the matched string or None to create a plain token.
+
+    The patterns are compiled once per class into a lookup table and a single
+    regex that alternates between all patterns using named groups, so scanning
+    for the next token needs only one regex match.
+
+    Lexers can also scan bytes-like objects such as memory-mapped files
+    directly. The patterns are then compiled as byte patterns, where entries in
+    the byte_token_patterns class attribute replace the regex of a token type,
+    e.g. to treat all non-ASCII bytes as word characters. Such patterns must
+    match a superset of the str pattern and matches that contain non-ASCII
+    bytes are decoded and checked against the str pattern, so that bytes are
+    lexed exactly like their decoded text.
+
+    """
+
+    token_patterns = ()
+    byte_token_patterns = {}
 
-    def __init__(self):
-        """Initialise the lexer."""
+    def __init__(self, compact=False, encoding='utf-8'):
+        """Initialise the lexer.
+
+        If compact is True, generate :py:class:`CompactToken` objects instead
+        of funcparserlib tokens wherever a token's value is a slice of the
+        source string.
+
+        The encoding is used to decode token values when lexing a bytes-like
+        object. It must be ASCII-compatible such as utf-8 or latin-1.
+
+        """
         self._modes = {}
-        self._patterns = None
+        self.compact = compact
+        self.encoding = encoding
+        self._compile_patterns()
 
-    def reset(self, string):
-        """Reset the internal state of the lexer."""
+    def reset(self, string, lnum=1, offset=0, prefix=''):
+        """Reset the internal state of the lexer.
+
+        The lnum and offset arguments give the line number and character
+        offset of the string within a larger source, e.g. when lexing a file in
+        chunks. The prefix is the text of the line in the larger source before
+        the start of the string so that columns and the lines of errors are the
+        same as when lexing the whole source.
+
+        """
         self.pos = 0
         self.lastpos = 0
         self.maxpos = len(string)
-        self.char = 1
-        self.lnum = 1
-        self.last_lnum = 1
+        self.prefix = prefix
+        # Columns are one-based on the first line of a source and zero-based on
+        # the following lines
+        self.char = len(prefix) + (1 if lnum == 1 else 0)
+        self.lnum = lnum
+        self.last_lnum = lnum
+        self.first_lnum = lnum
+        self.offset = offset
         self.brace_level = 0
         self.ignore_whitespace = False
         self.string = string
+        self.is_bytes = not isinstance(string, str)
+
+        table = self._tables[bytes if self.is_bytes else str]
+        self._patterns, self._master_pattern, self._nesting = table
+        self._newline = b'\n' if self.is_bytes else '\n'
+
+        try:
+            self._count = string.count
+        except AttributeError:
+            # Memory-mapped files cannot count substrings
+            self._count = functools.partial(_count_in_slice, string)
+
+    @classmethod
+    def _compile_patterns(cls):
+        """Compile the token patterns of this lexer class if not done yet."""
+        # Check the class' own namespace so subclasses do not reuse the tables
+        # of their base class
+        if '_tables' in cls.__dict__:
+            return
+
+        # Handlers are looked up by the name of the group that matched
+        cls._handlers = {
+            name: handler and getattr(cls, handler)
+            for name, _, handler in cls.token_patterns
+        }
+
+        cls._tables = {
+            str: cls._compile_table(str),
+            bytes: cls._compile_table(bytes),
+        }
+
+    @classmethod
+    def _compile_table(cls, text_type):
+        """Compile the patterns of this lexer class for str or bytes sources.
+
+        Return the patterns by token type, the combined pattern and the
+        patterns for nested expressions.
 
-    def _compile_regexes(self, patterns):
-        """Compile a set of patterns into regular expressions."""
-        # Save a copy of the patterns that respects the order. We could also
-        # use a collections.OrderedDict, but this actually affected performance
-        # ever so slighty
-        self._iter_patterns = [
-            (name, (re.compile(pattern), f)) for name, (pattern, f) in patterns
+        """
+        def compile(pattern):
+            if text_type is bytes:
+                pattern = pattern.encode('ascii')
+
+            return re.compile(pattern)
+
+        patterns = [
+            (name, cls.byte_token_patterns.get(name, pattern)
+             if text_type is bytes else pattern)
+            for name, pattern, _ in cls.token_patterns
         ]
 
-        # This is used for lookups
-        self._patterns = dict(self._iter_patterns)
+        compiled = {
+            name: (compile(pattern), cls._handlers[name])
+            for name, pattern in patterns
+        }
+
+        # Alternatives are tried from left to right just like the patterns
+        # would be if they were tried one after another
+        master_pattern = compile('|'.join(
+            '(?P<{0}>{1})'.format(name, pattern) for name, pattern in patterns
+        ))
+
+        nesting = {
+            name: compile(pattern) for name, pattern in _NESTING.items()
+        }
+
+        return compiled, master_pattern, nesting
 
     @property
     def patterns(self):
@@ -97,25 +312,49 @@ class BaseLexer:
 
     def advance(self, match):
         """Advance the internal state based on a successful match."""
+        self.advance_to(match.end(0))
+
+    def advance_to(self, end):
+        """Advance the internal state to a position in the string."""
         self.lastpos = self.pos
         self.last_lnum = self.lnum
 
-        matched = match.group(0)
-        newlines = matched.count('\n')
-        self.pos = match.start(0) + len(matched)
+        # Count newlines in any text skipped by a search as well as in the
+        # match itself so line numbers stay correct
+        newlines = self._count(self._newline, self.pos, end)
         self.lnum += newlines
 
         if newlines == 0:
-            self.char += len(matched)
+            self.char += end - self.pos
         else:
-            self.char = len(matched) - matched.rfind('\n') - 1
+            self.char = end - self.string.rfind(self._newline, self.pos, end)\
+                - 1
+
+        self.pos = end
 
     def raise_error(self, msg):
         """Raise a lexer error with the given message."""
-        errline = self.string.splitlines()[self.lnum - 1]
+        # Find the line containing the current position
+        start = self.string.rfind(self._newline, 0, self.pos) + 1
+        end = self.string.find(self._newline, self.pos)
+        errline = self.string[start:end if end != -1 else self.maxpos]
+
+        if self.is_bytes:
+            errline = decode(errline, self.encoding)
+
+        if start == 0:
+            # The line started before the string
+            errline = self.prefix + errline
+
+        errline = errline.rstrip('\r')
 
         raise LexerError(
-            msg, self.pos, self.char, self.lnum, self.brace_level, errline
+            msg,
+            self.offset + self.pos,
+            self.char,
+            self.lnum,
+            self.brace_level,
+            errline
         )
 
     def raise_unexpected(self, token):
@@ -126,59 +365,183 @@ class BaseLexer:
         """Raise an error for unbalanced braces."""
         self.raise_error('Unbalanced braces')
 
+    def decoded_span(self, start, text, match):
+        """Return the byte span of a match in text decoded from a position."""
+        first = start + len(text[:match.start()].encode(self.encoding))
+
+        return first, first + len(match.group().encode(self.encoding))
+
+    def search_span(self, token, pos):
+        """Return the span of the next occurrence of a token or None."""
+        pattern, _ = self.patterns[token]
+        loose = self.is_bytes and token in self.byte_token_patterns
+
+        while True:
+            m = pattern.search(self.string, pos)
+
+            if not m or not loose or\
+                    not has_non_ascii(self.string, m.start(), m.end()):
+                return m and m.span()
+
+            # The loose byte pattern matched non-ASCII bytes so find the first
+            # match of the str pattern in the decoded text instead
+            text = self.string[m.start():m.end()].decode(self.encoding)
+            str_pattern, _ = self._tables[str][0][token]
+            str_m = str_pattern.search(text)
+
+            if str_m:
+                return self.decoded_span(m.start(), text, str_m)
+
+            pos = m.end()
+
     def expect(self, token, strip_whitespace=True):
         """Expect a token, fail otherwise."""
-        pattern, _ = self.patterns[token]
-        m = pattern.search(self.string, self.pos)
+        span = self.search_span(token, self.pos)
 
-        if not m:
+        if not span:
             self.raise_unexpected(token)
 
-        self.advance(m)
-        token_value = m.group(0)
+        first, last = span
+        self.advance_to(last)
 
         if self.ignore_whitespace:
-            token_value = token_value.strip()
+            token_value = self.string[first:last]
+            first += len(token_value) - len(token_value.lstrip())
+            last -= len(token_value) - len(token_value.rstrip())
 
-        return self.make_token(token, token_value)
+        return self.make_span(token, first, max(first, last))
 
-    def until(self, token):
-        """Scan until a particular token is found.
+    def find(self, token):
+        """Move past the next occurrence of a token.
 
-        Return the part of the string that was scanned past and the string
-        value of the token. The latter is the entire rest of the string if the
-        token was not found.
+        Return the string value of the token or an empty string if it was not
+        found, in which case we move to the end of the string. Unlike
+        :py:meth:`until`, the text that was skipped is not copied so callers
+        can slice the string once they know where a value ends.
 
         """
-        if token == 'braces':
-            pattern = re.compile(r'{|}')
-        elif token == 'parens':
-            pattern = re.compile(r'\(|\)')
+        if token in self._nesting:
+            pattern = self._nesting[token]
         else:
             pattern, _ = self.patterns[token]
 
         m = pattern.search(self.string, self.pos)
 
         if m:
-            scanned = m.group(0)
             self.advance(m)
 
-            return self.string[self.lastpos:self.pos - 1], scanned
+            return m.group()
         else:
-            rest = self.string[self.pos:]
-            self.pos = len(self.string)
+            self.lastpos = self.pos
+            self.pos = self.maxpos
+
+            return ''
+
+    def until(self, token):
+        """Scan until a particular token is found.
+
+        Return the part of the string that was scanned past and the string
+        value of the token. The latter is the entire rest of the string if the
+        token was not found.
 
-            return rest, ''
+        """
+        start = self.pos
+        value = self.find(token)
+
+        return self.string[start:self.pos - len(value)], value
+
+    def skip_nested(self, token, level, stop_level):
+        """Skip nested braces or parentheses until a nesting level is reached.
+
+        The token is either 'braces' or 'parens'. Only the delimiters are
+        inspected and the text between them is never copied, so the time taken
+        is linear in the length of the skipped text. The internal state of the
+        lexer is left untouched.
+
+        Return the new nesting level and the position of the closing delimiter
+        that brought the level down to stop_level, or -1 if the end of the
+        string was reached first.
+
+        """
+        search = self._nesting[token].search
+        string = self.string
+        pos = self.pos
+
+        while True:
+            m = search(string, pos)
+
+            if not m:
+                return level, -1
+
+            pos = m.end()
+
+            if m.lastindex == 1:
+                level += 1
+            else:
+                level -= 1
+
+                if level == stop_level:
+                    return level, pos - 1
 
     def make_token(self, token_type, value):
         """Create a token type with a value."""
         return Token(
             token_type,
             value,
-            (self.last_lnum, self.lastpos),
-            (self.lnum, self.pos)
+            (self.last_lnum, self.offset + self.lastpos),
+            (self.lnum, self.offset + self.pos)
+        )
+
+    def make_span(self, token_type, first, last):
+        """Create a token whose value is the string between two positions.
+
+        The token is a :py:class:`CompactToken` in compact mode, or a
+        :py:class:`ByteToken` if the source is a bytes-like object, and a
+        funcparserlib token otherwise.
+
+        """
+        if not self.compact:
+            value = self.string[first:last]
+
+            if self.is_bytes:
+                value = decode(value, self.encoding)
+
+            return self.make_token(token_type, value)
+
+        if first == self.lastpos:
+            lnum = self.last_lnum
+        else:
+            lnum = self.lnum - self._count(self._newline, first, self.pos)
+
+        if self.is_bytes:
+            return ByteToken(
+                token_type,
+                self.string,
+                first,
+                last,
+                lnum,
+                self.offset,
+                self.encoding
+            )
+
+        return CompactToken(
+            token_type,
+            self.string,
+            first,
+            last,
+            lnum,
+            self.offset
         )
 
+    def make_match(self, token_type):
+        """Create a token for the text between the last and current position.
+
+        This is the text of the last match if it was matched at the previous
+        position rather than searched for.
+
+        """
+        return self.make_span(token_type, self.lastpos, self.pos)
+
     def lex_string(self, value):
         """Lex a string and return a single token for it."""
         return self.make_token('string', value)
@@ -191,32 +554,32 @@ class BaseLexer:
         not found.
 
         """
-        for token_type, (pattern, handler) in self._iter_patterns:
-            # Not the most elegant but re.Pattern only exists in Python 3.7+ so
-            # we cannot pass the method as an argument
-            m = getattr(pattern, search_type)(self.string, self.pos)
+        # Not the most elegant but re.Pattern only exists in Python 3.7+ so
+        # we cannot pass the method as an argument
+        m = getattr(self._master_pattern, search_type)(self.string, self.pos)
 
-            if m:
-                self.advance(m)
-                value = m.group(0)
+        if m:
+            token_type = m.lastgroup
+            self.advance(m)
 
-                if self.ignore_whitespace and token_type == 'space':
-                    break
+            if self.ignore_whitespace and token_type == 'space':
+                return
 
-                token = handler(value) if handler else\
-                    self.make_token(token_type, value)
+            value = m.group()
+            handler = self._handlers[token_type]
+            token = handler(self, value) if handler else\
+                self.make_token(token_type, value)
 
-                yield self.string[self.lastpos:self.pos - len(value)], token
-                break
+            yield self.string[self.lastpos:m.start()], token
         else:
             rest = self.string[self.pos:]
             self.pos = len(self.string)
 
             yield rest, None
 
-    def lex(self, string):
+    def lex(self, string, lnum=1, offset=0, prefix=''):
         """Lex a string and generate tokens."""
-        self.reset(string)
+        self.reset(string, lnum, offset, prefix)
 
         while not self.eos:
             yield from self.modes[self.mode]()
@@ -8,7 +8,12 @@ parentheses instead of braces for string, preamble and comment entries, e.g.
 
 """
 
-from bibpy.lexers.base_lexer import BaseLexer
+from bibpy.lexers.base_lexer import BaseLexer, has_non_ascii
+import re
+
+# Characters that no name, number, space or equals token can contain. The text
+# up to the next one is decoded to lex non-ASCII bytes like their decoded text
+_DELIMITERS = re.compile(b'[{}()@",#]')
 
 
 # A custom lexer is necessary as funcparserlib's lexing infrastructure is
@@ -17,11 +22,39 @@ from bibpy.lexers.base_lexer import BaseLexer
 class BibLexer(BaseLexer):
     """Lexer for generating bib tokens."""
 
-    def __init__(self):
-        """Initialise the lexer."""
-        super().__init__()
+    token_patterns = (
+        ('lbrace', r'{',                    'lex_lbrace'),
+        ('rbrace', r'}',                    'lex_rbrace'),
+        ('equals', r'\s*(=)\s*',            None),
+        ('comma',  r',',                    None),
+        ('number', r'-?(0|([1-9][0-9]*))',  None),
+        ('name',   r"[ ]*[\w\-:?'\.]+[ ]*", None),
+        ('entry',  r'@',                    'found_entry'),
+        ('string', r'"[^"]+"',              None),
+        ('lparen', r'\(',                   'lex_lparen'),
+        ('rparen', r'\)',                   'lex_rparen'),
+        ('concat', r'[ ]*#[ ]*',            None),
+        ('space',  r'[ \t\r\n]+',           None),
+    )
+
+    # Byte patterns only match ASCII word characters so allow any non-ASCII
+    # byte in names, e.g. the bytes of utf-8 encoded characters. Names with
+    # non-ASCII bytes are checked against the str pattern (see rematch)
+    byte_token_patterns = {
+        'name': r"[ ]*[\w\-:?'\.\x80-\xff]+[ ]*",
+    }
+
+    def __init__(self, compact=False, encoding='utf-8'):
+        """Initialise the lexer.
+
+        If compact is True, generate
+        :py:class:`~bibpy.lexers.base_lexer.CompactToken` objects instead of
+        funcparserlib tokens. The encoding is used when lexing bytes-like
+        objects.
+
+        """
+        super().__init__(compact, encoding)
         self.reset('')
-        self.mode = 'comment'
 
         self._modes = {
             'bib':     self.lex_main,
@@ -31,32 +64,19 @@ class BibLexer(BaseLexer):
             'comment': self.lex_comment
         }
 
-        self._compile_regexes([
-            ('lbrace', (r'{',                    self.lex_lbrace)),
-            ('rbrace', (r'}',                    self.lex_rbrace)),
-            ('equals', (r'\s*(=)\s*',            None)),
-            ('comma',  (r',',                    None)),
-            ('number', (r'-?(0|([1-9][0-9]*))',  None)),
-            ('name',   (r"[ ]*[\w\-:?'\.]+[ ]*", None)),
-            ('entry',  (r'@',                    self.found_entry)),
-            ('string', (r'"[^"]+"',              self.lex_string)),
-            ('lparen', (r'\(',                   self.lex_lparen)),
-            ('rparen', (r'\)',                   self.lex_rparen)),
-            ('concat', (r'[ ]*#[ ]*',            None)),
-            ('space',  (r'[ \t\r\n]+',           None)),
-        ])
-
-    def reset(self, string):
+    def reset(self, string, lnum=1, offset=0, prefix=''):
         """Reset the internal state of the lexer."""
-        super().reset(string)
+        super().reset(string, lnum, offset, prefix)
         self.in_entry = False
+        self.mode = 'comment'
+        self.bibtype = None
 
     def found_entry(self, value):
         """Handler for finding a bibliographic entry."""
         self.in_entry = True
         self.ignore_whitespace = True
 
-        return self.make_token('entry', value)
+        return self.make_match('entry')
 
     def lex_lbrace(self, value):
         """Lex a left brace."""
@@ -67,7 +87,7 @@ class BibLexer(BaseLexer):
         elif self.brace_level > 1:
             self.mode = 'value'
 
-        return self.make_token('lbrace', value)
+        return self.make_match('lbrace')
 
     def lex_rbrace(self, value):
         """Lex a right brace."""
@@ -79,7 +99,7 @@ class BibLexer(BaseLexer):
         elif self.brace_level < 0:
             raise self.raise_unbalanced()
 
-        return self.make_token('rbrace', value)
+        return self.make_match('rbrace')
 
     def lex_lparen(self, value):
         """Lex a left parenthesis."""
@@ -89,76 +109,74 @@ class BibLexer(BaseLexer):
         elif self.bibtype in ('comment', 'preamble'):
             self.mode = 'parens'
 
-        return self.make_token('lparen', value)
+        return self.make_match('lparen')
 
     def lex_rparen(self, value):
         """Lex a right parenthesis."""
-        return self.make_token('rparen', value)
+        if self.brace_level == 0 and self.bibtype == 'string':
+            # The closing parenthesis of a '@string(...)' entry
+            self.end_entry()
+
+        return self.make_match('rparen')
 
     def lex_parens(self):
         """Lex a set of possibly nested parentheses and its contents."""
-        paren_level = 1
-        content = ''
+        _, end = self.skip_nested('parens', 1, 0)
 
-        while True:
-            before, token = self.until('parens')
+        if end == -1:
+            self.advance_to(self.maxpos)
+            self.raise_error('Unbalanced parentheses')
 
-            if token == '(':
-                paren_level += 1
-                content += before + token
-            elif token == ')':
-                paren_level -= 1
-                content += before
-
-                if paren_level == 0:
-                    yield self.make_token('content', content)
-                    yield self.make_token('rparen', token)
-                    self.mode = 'bib'
-                    break
+        self.advance_to(end)
+        yield self.make_match('content')
+        self.advance_to(end + 1)
+        yield self.make_match('rparen')
+        self.end_entry()
 
     def lex_braced(self):
         """Lex a possibly nested braced expression and its contents."""
-        content = ''
-
-        while True:
-            before, token = self.until('braces')
-
-            if token == '{':
-                self.brace_level += 1
-                content += before + token
-            elif token == '}':
-                self.brace_level -= 1
-                content += before
-
-                if self.brace_level == 0:
-                    yield self.make_token('content', content)
-                    yield self.make_token('rbrace', token)
-                    self.in_entry = False
-                    self.ignore_whitespace = False
-                    self.mode = 'comment'
-                    self.bibtype = None
-                    break
-                elif self.brace_level == 1 and self.bibtype not in\
-                        ('comment', 'string', 'preamble'):
-                    yield self.make_token('content', content)
-                    yield self.make_token('rbrace', token)
-                    self.mode = 'bib'
-                    break
-                else:
-                    content += token
+        # The braces of a comment or preamble enclose the entire entry while
+        # all other braced values are nested in an entry
+        body = self.bibtype in ('comment', 'preamble')
+        stop_level = 0 if body else 1
+        level, end = self.skip_nested('braces', self.brace_level, stop_level)
+        self.brace_level = level
+
+        if end == -1:
+            self.advance_to(self.maxpos)
+            self.raise_unbalanced()
+
+        self.advance_to(end)
+        yield self.make_match('content')
+        self.advance_to(end + 1)
+        yield self.make_match('rbrace')
+
+        if body:
+            self.end_entry()
+        else:
+            self.mode = 'bib'
+
+    def end_entry(self):
+        """Return to lexing non-entry comments after an entry has ended."""
+        self.in_entry = False
+        self.ignore_whitespace = False
+        self.mode = 'comment'
+        self.bibtype = None
 
     def lex_comment(self):
         """Lex a non-entry comment."""
-        comment, entry = self.until('entry')
+        start = self.pos
+        entry = self.find('entry')
+        end = self.pos - len(entry)
 
-        if comment:
-            yield self.make_token('comment', comment)
+        if end > start:
+            yield self.make_span('comment', start, end)
 
-        if entry == '@':
+        if entry:
             self.mode = 'entry'
             self.in_entry = True
             self.ignore_whitespace = True
-            yield self.make_token('entry', entry)
+            yield self.make_span('entry', end, self.pos)
 
     def lex_entry(self):
         """Lex a bibliographic entry."""
@@ -175,9 +193,73 @@ class BibLexer(BaseLexer):
         self.mode = 'bib'
         self.ignore_whitespace = True
 
+    def needs_rematch(self, match):
+        """Return True if a byte match may differ from that of the text.
+
+        Names may contain non-ASCII bytes that are not word characters, and
+        the trailing whitespace of an equals sign may continue with non-ASCII
+        whitespace.
+
+        """
+        token_type = match.lastgroup
+
+        if token_type == 'name':
+            return has_non_ascii(self.string, match.start(), match.end())
+        elif token_type == 'equals':
+            return has_non_ascii(self.string, match.end(), match.end() + 1)
+
+        return False
+
+    def rematch(self, pos):
+        """Match the str patterns against the decoded text at a position.
+
+        Return the token type and end of the match or None if nothing
+        matches.
+
+        """
+        delimiter = _DELIMITERS.search(self.string, pos)
+        end = delimiter.start() if delimiter else self.maxpos
+        text = self.string[pos:end].decode(self.encoding)
+        m = self._tables[str][1].match(text)
+
+        if not m:
+            return None
+
+        return m.lastgroup, self.decoded_span(pos, text, m)[1]
+
     def lex_main(self):
-        for _, token in self.scan(search_type='match'):
-            if token is not None:
-                yield token
-            else:
+        """Lex the tokens inside an entry until the mode changes."""
+        # This is the hot path of the lexer so we match the combined pattern
+        # directly instead of going through self.scan
+        match = self._master_pattern.match
+        handlers = self._handlers
+
+        while self.mode == 'bib' and not self.eos:
+            m = match(self.string, self.pos)
+            rematched = None
+
+            if m and self.is_bytes and self.needs_rematch(m):
+                rematched = self.rematch(self.pos)
+
+                if not rematched:
+                    m = None
+
+            if not m:
                 self.raise_error('Unmatched characters')
+
+            if rematched:
+                token_type, end = rematched
+                self.advance_to(end)
+            else:
+                token_type = m.lastgroup
+                self.advance(m)
+
+            if self.ignore_whitespace and token_type == 'space':
+                continue
+
+            handler = handlers[token_type]
+
+            if handler:
+                yield handler(self, self.string[self.lastpos:self.pos])
+            else:
+                yield self.make_match(token_type)
@@ -12,6 +12,10 @@ class NameLexer(BaseLexer):
 
     """
 
+    token_patterns = (
+        ('ws_or_braces', r'\s+|{|}|,', None),
+    )
+
     def __init__(self):
         """Initialise the lexer."""
         super().__init__()
@@ -21,13 +25,9 @@ class NameLexer(BaseLexer):
             'normal': self.lex_name,
         }
 
-        self._compile_regexes([
-            ('ws_or_braces', (r'\s+|{|}|,', None))
-        ])
-
-    def reset(self, string):
+    def reset(self, string, lnum=1, offset=0, prefix=''):
         """Reset the internal state of the lexer."""
-        super().reset(string)
+        super().reset(string, lnum, offset, prefix)
         self._commas = 0
 
     @property
@@ -38,7 +38,9 @@ class NameLexer(BaseLexer):
     def lex_name(self):
         """Lex a name and return its tokens."""
         part = []
-        content = ''
+        # Pieces of the current braced expression, joined once it ends so
+        # long names are not copied over and over again
+        content = []
         was_command = False
 
         while True:
@@ -54,24 +56,32 @@ class NameLexer(BaseLexer):
 
             if token == '{':
                 self.brace_level += 1
-                content += before
+
+                if before:
+                    content.append(before)
+
                 was_command = self.current_char == '\\'
             elif token == '}':
                 self.brace_level -= 1
 
                 if was_command:
                     was_command = False
-                    content += before
+
+                    if before:
+                        content.append(before)
                 else:
                     if self.brace_level == 0:
-                        content += before
-                        part.append(self.make_token('braced', content))
-                        content = ''
+                        content.append(before)
+                        part.append(
+                            self.make_token('braced', ''.join(content))
+                        )
+                        content = []
                     elif self.brace_level < 0:
                         self.raise_unbalanced()
             else:
                 if self.brace_level > 0:
-                    content += before + token
+                    content.append(before)
+                    content.append(token)
                 else:
                     if token == ',':
                         self._commas += 1
@@ -81,18 +91,19 @@ class NameLexer(BaseLexer):
 
                         yield self.make_token('part', part)
                         part = []
-                        content = ''
+                        content = []
                     else:
                         # Token is whitespace
                         if before.strip():
                             if content:
+                                content.append(before.strip())
                                 part.append(
                                     self.make_token(
                                         'content',
-                                        content + before.strip()
+                                        ''.join(content)
                                     )
                                 )
-                                content = ''
+                                content = []
                             else:
                                 part.append(
                                     self.make_token('content', before.strip())
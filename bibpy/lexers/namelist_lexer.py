@@ -8,6 +8,11 @@ from bibpy.lexers.base_lexer import BaseLexer
 class NamelistLexer(BaseLexer):
     """Lexer for splitting names on zero brace-level 'and'."""
 
+    token_patterns = (
+        ('braces',    r'{|}',     None),
+        ('delimiter', r'\band\b', None),
+    )
+
     def __init__(self):
         """Initialise the lexer."""
         super().__init__()
@@ -17,45 +22,46 @@ class NamelistLexer(BaseLexer):
             'normal': self.lex_namelist,
         }
 
-        self._compile_regexes([
-            ('braces',    (r'{|}',     None)),
-            ('delimiter', (r'\band\b', None))
-        ])
-
-    def reset(self, string):
+    def reset(self, string, lnum=1, offset=0, prefix=''):
         """Reset the internal state of the lexer."""
-        super().reset(string)
+        super().reset(string, lnum, offset, prefix)
 
     def lex_namelist(self):
         """Lex a list of names, preserving braces for later name parsing."""
-        content = ''
+        string = self.string
+        search = self._master_pattern.search
+
+        # Start of the current name. Names are sliced from the string once
+        # their end is found instead of being built up piece by piece
+        start = self.pos
 
         while True:
-            for before, token in self.scan():
-                value = token and token.value or None
+            m = search(string, self.pos)
+
+            if not m:
+                self.pos = self.maxpos
+                name = string[start:].strip()
 
-                if value == '{':
-                    self.brace_level += 1
-                    content += before + value
-                elif value == '}':
-                    self.brace_level -= 1
+                if name:
+                    yield name
 
-                    if self.brace_level < 0:
-                        self.raise_unbalanced()
+                return
 
-                    content += before + value
-                elif value == 'and':
-                    content = (content + before).strip()
+            self.advance(m)
+            value = m.group()
 
-                    if content:
-                        yield content
+            if value == '{':
+                self.brace_level += 1
+            elif value == '}':
+                self.brace_level -= 1
 
-                    content = ''
-                else:
-                    all_content = (content + before).strip()
+                if self.brace_level < 0:
+                    self.raise_unbalanced()
+            elif self.brace_level == 0:
+                # Split on 'and' at brace level zero
+                name = string[start:m.start()].strip()
 
-                    if all_content:
-                        yield all_content
+                if name:
+                    yield name
 
-                    if token is None:
-                        return
+                start = self.pos
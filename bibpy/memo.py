@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""Bounded caches of the results of functions.
+
+Names and lists of names are parsed far more often than there are distinct
+names, as the same authors appear in many entries. The results of parsing them
+are therefore kept in an :py:class:`LRUCache`, see
+:py:func:`bibpy.parser.set_name_cache_size`. Cached results are shared between
+callers and must not be mutated.
+
+"""
+
+import functools
+
+__all__ = ('LRUCache',)
+
+
+class LRUCache:
+    """A function wrapped in a cache of its least recently used results."""
+
+    def __init__(self, func, maxsize=128):
+        """Cache the results of a function of hashable arguments.
+
+        The maxsize argument is the maximum number of cached results. If it is
+        None, the cache is unbounded and if it is zero, nothing is cached.
+
+        """
+        self.func = func
+        self.resize(maxsize)
+        functools.update_wrapper(self, func)
+
+    @property
+    def maxsize(self):
+        """The maximum number of cached results."""
+        return self._cached.cache_info().maxsize
+
+    def resize(self, maxsize):
+        """Change the maximum number of cached results, clearing the cache."""
+        if maxsize is not None and maxsize < 0:
+            raise ValueError('Maximum cache size must be non-negative')
+
+        self._cached = functools.lru_cache(maxsize)(self.func)
+
+    def cache_info(self):
+        """Return the hits, misses, maximum and current size of the cache."""
+        return self._cached.cache_info()
+
+    def cache_clear(self):
+        """Remove all cached results and reset the statistics."""
+        self._cached.cache_clear()
+
+    def __call__(self, *args):
+        return self._cached(*args)
+
+    def __repr__(self):
+        return '{0}({1}, maxsize={2})'.format(
+            self.__class__.__name__,
+            self.func.__name__,
+            self.maxsize
+        )
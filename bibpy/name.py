@@ -3,19 +3,35 @@
 """Class for names split into its components (given name, family name etc.)."""
 
 import bibpy.lexers
+import weakref
 
 __all__ = ('Name', )
 
+# Interned names keyed by their parts
+_interned = weakref.WeakValueDictionary()
+
 
 class Name:
-    """Class containing the individual components of a name."""
+    """Immutable class containing the individual components of a name.
+
+    Names are hashable and equal names have the same hash so they can be used
+    as dictionary keys, e.g. to group entries by author.
+
+    """
+
+    __slots__ = ('_first', '_prefix', '_last', '_suffix', '__weakref__')
 
     def __init__(self, first='', prefix='', last='', suffix=''):
         """Create a name consisting of first, prefix, last and suffix parts."""
-        self._first = first
-        self._prefix = prefix
-        self._last = last
-        self._suffix = suffix
+        object.__setattr__(self, '_first', first)
+        object.__setattr__(self, '_prefix', prefix)
+        object.__setattr__(self, '_last', last)
+        object.__setattr__(self, '_suffix', suffix)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(
+            "'{0}' object is immutable".format(self.__class__.__name__)
+        )
 
     @classmethod
     def fromstring(_, string):
@@ -67,6 +83,15 @@ class Name:
         """Return a tuple of all the name parts of this Name."""
         return (self.first, self.prefix, self.last, self.suffix)
 
+    def intern(self):
+        """Return the interned name that is equal to this one.
+
+        Equal names can share the interned object instead of each having their
+        own copy. The interned object is discarded once it is no longer used.
+
+        """
+        return _interned.setdefault(self.parts, self)
+
     def _initials(self, s):
         """Return the initials for a name part.
 
@@ -118,6 +143,12 @@ class Name:
     def __ne__(self, other):
         return not self == other
 
+    def __hash__(self):
+        return hash(self.parts)
+
+    def __reduce__(self):
+        return (self.__class__, self.parts)
+
     def __str__(self):
         return self.format()
 
@@ -4,13 +4,49 @@
 
 import bibpy.date
 import bibpy.entry
+import bibpy.fast_parser
 import bibpy.lexers
+import bibpy.lexers.base_lexer
+from bibpy.lexers.base_lexer import LexerError
+from bibpy.memo import LRUCache
 from bibpy.name import Name
 from bibpy.tools import always_true
+import codecs
 import funcparserlib.parser as parser
 import funcparserlib.lexer as lexer
 import re
 
+# Number of characters to read at a time when parsing files incrementally
+_CHUNK_SIZE = 65536
+
+# An '@' at the start of a line, most likely the start of an entry
+_ENTRY_START = re.compile(r'\n[ \t]*(@)')
+
+# Encodings whose bytes can be lexed directly. Every ASCII character is a
+# single ASCII byte and ASCII bytes never occur inside other characters, which
+# is not true of e.g. shift_jis or gbk where the trail byte of a character can
+# be an '@' or a brace
+_BYTE_ENCODINGS = frozenset(
+    ['ascii', 'utf-8', 'iso8859-1'] +
+    ['cp125{0}'.format(i) for i in range(9)]
+)
+
+# Default maximum number of cached names
+_NAME_CACHE_SIZE = 4096
+
+# Default maximum number of cached dates
+_DATE_CACHE_SIZE = 4096
+
+# A valid biblatex date or date range. Anything else is left to the date
+# grammar which reports the exact error
+_DATE_REGEX = re.compile(
+    r'([0-9]{4})(?:-([0-9]{2}))?(?:-([0-9]{2}))?'
+    r'(?:(/)(?:([0-9]{4})(?:-([0-9]{2}))?(?:-([0-9]{2}))?)?)?'
+)
+
+# Available parser implementations
+_parsers = ('fast', 'funcparserlib')
+
 
 def token_value(token):
     """Get the value from a token."""
@@ -277,50 +313,71 @@ def base_parser(validate_field, validate_entry):
     ) + parser.skip(parser.finished)
 
 
-def bibtex_parser():
-    """Return a parser for bibtex."""
-    def validate_field(field):
-        return field.lower().strip() in bibpy.fields.bibtex
+def is_bibtex_field(field):
+    """Return True if the field is a valid bibtex field."""
+    return field.lower().strip() in bibpy.fields.bibtex
 
-    def validate_entry(entry):
-        return entry.lower().strip() in bibpy.entries.bibtex
 
-    return base_parser(validate_field, validate_entry)
+def is_bibtex_entry(entry):
+    """Return True if the entry type is a valid bibtex entry type."""
+    return entry.lower().strip() in bibpy.entries.bibtex
 
 
-def biblatex_parser():
-    """Return a parser for biblatex."""
-    def validate_field(field):
-        return field.lower().strip() in bibpy.fields.biblatex
+def is_biblatex_field(field):
+    """Return True if the field is a valid biblatex field."""
+    return field.lower().strip() in bibpy.fields.biblatex
 
-    def validate_entry(entry):
-        return entry.lower().strip() in bibpy.entries.biblatex
 
-    return base_parser(validate_field, validate_entry)
+def is_biblatex_entry(entry):
+    """Return True if the entry type is a valid biblatex entry type."""
+    return entry.lower().strip() in bibpy.entries.biblatex
 
 
-def mixed_parser():
-    """Return a mixed (bibtex/biblatex) parser."""
-    def validate_field(field):
-        return field.lower().strip() in bibpy.fields.all
+def is_mixed_field(field):
+    """Return True if the field is a valid bibtex or biblatex field."""
+    return field.lower().strip() in bibpy.fields.all
 
-    def validate_entry(entry):
-        return entry.lower().strip() in bibpy.entries.all
 
-    return base_parser(validate_field, validate_entry)
+def is_mixed_entry(entry):
+    """Return True if the entry type is a valid bibtex or biblatex type."""
+    return entry.lower().strip() in bibpy.entries.all
 
 
-def relaxed_parser():
-    """Return a grammar for a relaxed parser."""
-    regex = r'[\w\-:\.]+'
+_RELAXED_NAME = re.compile(r'[\w\-:\.]+')
+
+
+def is_relaxed_name(name):
+    """Return True if the field or entry type is valid in relaxed mode."""
+    return _RELAXED_NAME.match(name.strip().lower())
+
+
+# Field and entry type validation functions for each reference format
+validators = {
+    'bibtex':   (is_bibtex_field, is_bibtex_entry),
+    'biblatex': (is_biblatex_field, is_biblatex_entry),
+    'mixed':    (is_mixed_field, is_mixed_entry),
+    'relaxed':  (is_relaxed_name, is_relaxed_name),
+}
+
+
+def bibtex_parser():
+    """Return a parser for bibtex."""
+    return base_parser(*validators['bibtex'])
 
-    def validate_field(field):
-        return re.match(regex, field.strip().lower())
 
-    def validate_entry(entry):
-        return re.match(regex, entry.strip().lower())
+def biblatex_parser():
+    """Return a parser for biblatex."""
+    return base_parser(*validators['biblatex'])
 
-    return base_parser(validate_field, validate_entry)
+
+def mixed_parser():
+    """Return a mixed (bibtex/biblatex) parser."""
+    return base_parser(*validators['mixed'])
+
+
+def relaxed_parser():
+    """Return a grammar for a relaxed parser."""
+    return base_parser(*validators['relaxed'])
 
 
 def date_parser():
@@ -338,50 +395,384 @@ def date_parser():
         >> make_date
 
 
-def parse(string, format, ignore_comments=True):
-    """Parse string using a given reference format."""
-    grammar = grammar_from_format(format)
+def iter_groups(tokens):
+    """Generate groups of tokens and whether each group was closed.
 
-    try:
-        strings, preambles, comment_entries, comments, entries =\
-            [], [], [], [], []
-
-        for result in grammar.parse(list(bibpy.lexers.lex_bib(string))):
-            et = getattr(result, 'bibtype', False)
-
-            if et == 'string':
-                strings.append(result)
-            elif et == 'comment':
-                comment_entries.append(result)
-            elif et == 'preamble':
-                preambles.append(result)
-            elif et:
-                entries.append(result)
-            else:
-                if not ignore_comments and not re.match(r'^\s*$', result):
-                    comments.append(result)
-
-        return bibpy.entries.Entries(
-            entries,
-            strings,
-            preambles,
-            comment_entries,
-            comments
+    Only the last group may not be closed, e.g. if it is a trailing non-entry
+    comment or if the tokens end in the middle of an entry.
+
+    """
+    group = []
+    level = 0
+
+    for token in tokens:
+        group.append(token)
+
+        if token.type in ('lbrace', 'lparen'):
+            level += 1
+        elif token.type in ('rbrace', 'rparen'):
+            level -= 1
+
+            if level <= 0:
+                yield group, True
+                group = []
+                level = 0
+
+    if group:
+        yield group, False
+
+
+def group_tokens(tokens):
+    """Group a stream of bib tokens into lists of complete top-level items.
+
+    Each group ends with the token that closes an entry and may start with the
+    non-entry comment preceding it. The last group holds any trailing tokens.
+
+    """
+    for group, _ in iter_groups(tokens):
+        yield group
+
+
+def group_text(string, offset, group):
+    """Return the source text of the item in a group of tokens.
+
+    The string holds the source starting at the given offset. The text starts
+    at the '@' of an entry, i.e. it excludes any non-entry comment before it,
+    and ends with the last token of the group. Compact tokens do not record
+    their positions and are not supported.
+
+    """
+    first = group[1] if group[0].type == 'comment' and len(group) > 1\
+        else group[0]
+
+    # The '@' token also spans the comment before it but ends right after it
+    start = first.end[1] - 1 if first.type == 'entry' else first.start[1]
+
+    return string[start - offset:group[-1].end[1] - offset]
+
+
+def iter_file_groups(source, chunk_size=_CHUNK_SIZE, compact=False,
+                     text=False):
+    """Read and lex a file in chunks and generate groups of complete items.
+
+    Only the text of the items that are not yet complete is kept in memory, so
+    memory use is bounded by the largest item in the file rather than its size.
+    The compact argument is passed on to :py:func:`bibpy.lexers.lex_bib`. If
+    text is True, (group, text) tuples are generated instead where text is the
+    source text of the group's item (see :py:func:`group_text`).
+
+    """
+    buffer = ''
+    offset, lnum = 0, 1
+    # The text of the current line before the buffer
+    prefix = ''
+    size = chunk_size
+    eof = False
+
+    while not eof:
+        data = source.read(size)
+        eof = not data
+        buffer += data
+        consumed, consumed_lnum = 0, lnum
+        group = []
+
+        try:
+            tokens = bibpy.lexers.lex_bib(buffer, lnum, offset, compact,
+                                          prefix=prefix)
+
+            for group, closed in iter_groups(tokens):
+                if not closed:
+                    # The trailing group may be cut off by the chunk boundary
+                    break
+
+                yield (group, group_text(buffer, offset, group))\
+                    if text else group
+                consumed = group[-1].end[1] - offset
+                consumed_lnum = group[-1].end[0]
+                group = []
+        except LexerError:
+            # Any error may be caused by an item cut off at the end of the
+            # buffer so only raise it if there is nothing left to read
+            if eof:
+                raise
+
+        if eof and group:
+            yield (group, group_text(buffer, offset, group)) if text else group
+
+        # Grow the chunk size if not a single item could be completed to
+        # avoid repeatedly lexing the same partial item
+        size = chunk_size if consumed else max(size, len(buffer))
+        line_start = buffer.rfind('\n', 0, consumed) + 1
+        prefix = buffer[line_start:consumed] if line_start else\
+            prefix + buffer[:consumed]
+        buffer = buffer[consumed:]
+        offset += consumed
+        lnum = consumed_lnum
+
+
+def iter_results(groups, format, ignore_comments=True,
+                 parser='funcparserlib'):
+    """Parse groups of tokens and generate the resulting entries.
+
+    The parser argument selects the parser implementation: Either 'fast' for
+    a hand-written recursive descent parser or 'funcparserlib' for the parser
+    combinator grammars in this module. Both produce the same results but the
+    error messages of the fast parser do not list the expected tokens.
+
+    """
+    if parser == 'fast':
+        grammar = bibpy.fast_parser.parser_from_format(format)
+    elif parser == 'funcparserlib':
+        grammar = grammar_from_format(format)
+    else:
+        raise ValueError(
+            "Parser '{0}' does not exist (use any of {1})"
+            .format(parser, ", ".join(_parsers))
         )
+
+    return _iter_results(groups, grammar, ignore_comments)
+
+
+def _iter_results(groups, grammar, ignore_comments):
+    """Parse groups of tokens using a grammar and generate the results."""
+    try:
+        for group in groups:
+            for result in grammar.parse(group):
+                if getattr(result, 'bibtype', False):
+                    yield result
+                elif not ignore_comments and not re.match(r'^\s*$', result):
+                    yield result
     except lexer.LexerError as ex:
         raise bibpy.error.LexerException(str(ex))
     except parser.NoParseError as ex:
         raise bibpy.error.ParseException(str(ex))
 
 
-def parse_file(source, format, ignore_comments=True):
-    """Parse a file using a given reference format."""
+def iter_parse(string, format, ignore_comments=True, parser='funcparserlib',
+               lnum=1, offset=0, prefix=''):
+    """Parse a string using a given reference format one entry at a time.
+
+    The lnum, offset and prefix arguments give the position of the string in a
+    larger source, see :py:func:`bibpy.lexers.lex_bib`.
+
+    """
+    # Only the fast parser accepts compact tokens
+    compact = parser == 'fast'
+    tokens = bibpy.lexers.lex_bib(string, lnum, offset, compact,
+                                  prefix=prefix)
+    groups = group_tokens(tokens)
+
+    yield from iter_results(groups, format, ignore_comments, parser)
+
+
+def iter_parse_file(source, format, ignore_comments=True,
+                    chunk_size=_CHUNK_SIZE, parser='funcparserlib'):
+    """Parse a file using a given reference format one entry at a time."""
     with source:
-        return parse(source.read(), format, ignore_comments)
+        groups = iter_file_groups(source, chunk_size, parser == 'fast')
+
+        yield from iter_results(groups, format, ignore_comments, parser)
+
+
+def iter_raw_results(groups, format):
+    """Parse (group, text) tuples and generate the results with their text.
+
+    Each result is wrapped in a :py:class:`~bibpy.entry.raw.RawEntry` that
+    formats as the source text of its group. Non-entry comments are ignored.
+
+    """
+    grammar = grammar_from_format(format)
+
+    for group, text in groups:
+        for result in _iter_results([group], grammar, True):
+            yield bibpy.entry.RawEntry(result, text)
+
+
+def iter_parse_file_raw(source, format, chunk_size=_CHUNK_SIZE):
+    """Parse a file one entry at a time keeping the source text of entries.
+
+    Only the funcparserlib parser is supported since the fast parser's tokens
+    do not record their positions.
+
+    """
+    with source:
+        groups = iter_file_groups(source, chunk_size, text=True)
+
+        yield from iter_raw_results(groups, format)
+
+
+def iter_parse_bytes(data, format, encoding='utf-8', ignore_comments=True,
+                     parser='funcparserlib'):
+    """Parse a bytes-like object such as a memory-mapped file one at a time.
+
+    If the encoding is utf-8, ascii, latin-1 or one of the cp1250-cp1258
+    encodings, the data is lexed without decoding it first and only the values
+    of tokens are decoded. Data in any other encoding is decoded in its
+    entirety and parsed as a string.
+
+    """
+    if codecs.lookup(encoding).name not in _BYTE_ENCODINGS:
+        string = bibpy.lexers.base_lexer.decode(data[:], encoding)
+
+        yield from iter_parse(string, format, ignore_comments, parser)
+        return
+
+    compact = parser == 'fast'
+    tokens = bibpy.lexers.lex_bib(data, compact=compact, encoding=encoding)
+
+    yield from iter_results(
+        group_tokens(tokens),
+        format,
+        ignore_comments,
+        parser
+    )
+
+
+def make_entries(results):
+    """Sort parsed results into an Entries object."""
+    strings, preambles, comment_entries, comments, entries =\
+        [], [], [], [], []
+
+    for result in results:
+        et = getattr(result, 'bibtype', False)
+
+        if et == 'string':
+            strings.append(result)
+        elif et == 'comment':
+            comment_entries.append(result)
+        elif et == 'preamble':
+            preambles.append(result)
+        elif et:
+            entries.append(result)
+        else:
+            comments.append(result)
+
+    return bibpy.entries.Entries(
+        entries,
+        strings,
+        preambles,
+        comment_entries,
+        comments
+    )
+
+
+def merge_entries(parts):
+    """Merge several Entries objects into one, keeping their order."""
+    def merge(attribute):
+        return [
+            entry for part in parts for entry in getattr(part, attribute)
+        ]
+
+    return bibpy.entries.Entries(
+        merge('entries'),
+        merge('strings'),
+        merge('preambles'),
+        merge('comment_entries'),
+        merge('comments')
+    )
+
+
+def split_entries(string, parts):
+    """Split a string into at most a number of parts at entry boundaries.
+
+    Return a list of (start, end) positions of each part. The parts are cut
+    just before an '@' at the start of a line so that, unless it is inside a
+    field value, each part starts with a new entry and can be parsed on its
+    own. The '@' may be indented, in which case the indentation ends the
+    previous part and is the line prefix of the part (see
+    :py:func:`line_prefix`). The string is not scanned in its entirety so a
+    part that fails to parse may have been cut inside an entry and should be
+    reparsed together with the rest of the string.
+
+    """
+    size = len(string)
+    cuts = [0]
+
+    for i in range(1, parts):
+        m = _ENTRY_START.search(string, max(size * i // parts, cuts[-1]))
+
+        if not m:
+            break
+
+        if m.start(1) > cuts[-1]:
+            cuts.append(m.start(1))
+
+    return list(zip(cuts, cuts[1:] + [size]))
+
+
+def line_prefix(string, pos):
+    """Return the text of the line in a string that precedes a position."""
+    return string[string.rfind('\n', 0, pos) + 1:pos]
+
+
+def parse(string, format, ignore_comments=True, parser='funcparserlib',
+          lnum=1, offset=0, prefix=''):
+    """Parse string using a given reference format."""
+    return make_entries(
+        iter_parse(string, format, ignore_comments, parser, lnum, offset,
+                   prefix)
+    )
+
+
+def parse_file(source, format, ignore_comments=True, parser='funcparserlib'):
+    """Parse a file using a given reference format."""
+    return make_entries(
+        iter_parse_file(source, format, ignore_comments, parser=parser)
+    )
+
+
+def parse_file_raw(source, format):
+    """Parse a file keeping the source text of entries.
+
+    The entries of the returned Entries object are
+    :py:class:`~bibpy.entry.raw.RawEntry` objects, see
+    :py:func:`iter_parse_file_raw`.
+
+    """
+    return make_entries(iter_parse_file_raw(source, format))
+
+
+def parse_bytes(data, format, encoding='utf-8', ignore_comments=True,
+                parser='funcparserlib'):
+    """Parse a bytes-like object using a given reference format."""
+    return make_entries(
+        iter_parse_bytes(data, format, encoding, ignore_comments, parser)
+    )
 
 
 def parse_date(datestring):
-    """Parse a biblatex date."""
+    """Parse a biblatex date.
+
+    Parsed dates are cached (see :py:data:`date_cache`) so the same
+    :py:class:`~bibpy.date.DateRange` object is returned for equal strings.
+
+    """
+    return date_cache(datestring)
+
+
+def _parse_date(datestring):
+    """Parse a biblatex date without caching it."""
+    match = _DATE_REGEX.fullmatch(datestring)
+
+    if not match:
+        return _parse_date_grammar(datestring)
+
+    start_year, start_month, start_day, slash, end_year, end_month, end_day =\
+        match.groups()
+
+    return bibpy.date.DateRange(
+        (start_year, start_month, start_day),
+        (end_year, end_month, end_day),
+        slash is not None and end_year is None
+    )
+
+
+# Date ranges are immutable so parsed dates can be shared
+date_cache = LRUCache(_parse_date, _DATE_CACHE_SIZE)
+
+
+def _parse_date_grammar(datestring):
+    """Parse a biblatex date with the date grammar."""
     grammar = grammar_from_format('date')
 
     try:
@@ -425,10 +816,20 @@ def prefix_indices(parts):
 
 
 def parse_name(name):
-    """Parse a name, such as an author."""
+    """Parse a name, such as an author.
+
+    Parsed names are cached (see :py:data:`name_cache`) so the same
+    :py:class:`~bibpy.name.Name` object is returned for equal strings.
+
+    """
     if not name:
         return Name()
 
+    return name_cache(name)
+
+
+def _parse_name(name):
+    """Parse a non-empty name without caching it."""
     first, prefix, last, suffix = '', '', '', ''
     tokens, commas = bibpy.lexers.lex_name(name)
     tokens = [token.value for token in tokens]
@@ -481,6 +882,23 @@ def parse_name(name):
     return Name(first, prefix, last, suffix)
 
 
+# The same names appear in many entries so parsed names are cached. Names are
+# never modified by bibpy so they can be shared
+name_cache = LRUCache(_parse_name, _NAME_CACHE_SIZE)
+
+
+def set_name_cache_size(maxsize):
+    """Set the maximum number of cached names and lists of names.
+
+    This sets the size of both :py:data:`name_cache` and
+    :py:data:`bibpy.lexers.namelist_cache` and clears them. If maxsize is
+    None, the caches are unbounded and if it is zero, nothing is cached.
+
+    """
+    name_cache.resize(maxsize)
+    bibpy.lexers.namelist_cache.resize(maxsize)
+
+
 ##################################################################
 # Query Grammars
 ##################################################################
@@ -566,10 +984,11 @@ def field_query_parser():
         + parser.skip(parser.finished)
 
 
+# Factories for the query grammars used by bibpy's accompanying tools
 _query_grammars = {
-    'bibkey':  key_query_parser(),
-    'bibtype': entry_query_parser(),
-    'field':   field_query_parser(),
+    'bibkey':  key_query_parser,
+    'bibtype': entry_query_parser,
+    'field':   field_query_parser,
 }
 
 
@@ -582,7 +1001,7 @@ def parse_query(query, query_type):
     try:
         tokens = bibpy.lexers.lex_generic_query(query)
 
-        return _query_grammars[query_type].parse(tokens)
+        return _cached_grammar(_query_grammars, query_type).parse(tokens)
     except (lexer.LexerError, parser.NoParseError) as ex:
         raise bibpy.error.ParseException(
             'Error: One or more constraints failed to parse at column {0}'
@@ -593,15 +1012,30 @@ def parse_query(query, query_type):
 ##################################################################
 # Top-level Grammars
 ##################################################################
-# Convenience dictionary for selecting reference formats
+# Convenience dictionary for selecting reference formats. Building a grammar
+# is expensive compared to parsing small inputs so each grammar is only built
+# on first use and then reused (see _cached_grammar)
 _formats = {
-    'bibtex':   bibtex_parser(),
-    'biblatex': biblatex_parser(),
-    'mixed':    mixed_parser(),
-    'relaxed':  relaxed_parser(),
-    'date':     date_parser()
+    'bibtex':   bibtex_parser,
+    'biblatex': biblatex_parser,
+    'mixed':    mixed_parser,
+    'relaxed':  relaxed_parser,
+    'date':     date_parser
 }
 
+# Registry of all grammars that have been built so far
+_grammars = {}
+
+
+def _cached_grammar(factories, name):
+    """Return the grammar for a name, building it on first use."""
+    grammar = _grammars.get(name)
+
+    if grammar is None:
+        grammar = _grammars[name] = factories[name]()
+
+    return grammar
+
 
 def grammar_from_format(format):
     """Return the grammar correspoding to the given format string."""
@@ -614,4 +1048,4 @@ def grammar_from_format(format):
             )
         )
 
-    return _formats[format]
+    return _cached_grammar(_formats, format)
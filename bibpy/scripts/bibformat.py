@@ -5,8 +5,10 @@
 
 import argparse
 import bibpy
+import bibpy.parser
 import bibpy.tools
 import collections
+import io
 import sys
 
 __author__ = bibpy.__author__
@@ -18,28 +20,27 @@ _DESCRIPTION = "Format and prettify bibliographic entries. Ignores comments."
 
 def process_file(path, args):
     """Process a single bib file."""
+    if args.raw:
+        # Keep the text of each entry instead of parsing it for formatting
+        source = io.open(path, encoding='utf-8')\
+            if bibpy.is_string(path) else path
+
+        return bibpy.parser.parse_file_raw(source, 'relaxed')
+
     # Iterate the files given on the command line
-    results = bibpy.read_file(path, format='relaxed')
+    results = bibpy.read_file(path, format='relaxed', cache=args.cache)
 
+    # Pass the results so that their indexes are shared by both inheritances
     if args.inherit_crossreferences:
-        bibpy.inherit_crossrefs(results.entries)
+        bibpy.inherit_crossrefs(results)
 
     if args.inherit_xdata:
-        bibpy.inherit_xdata(results.entries)
+        bibpy.inherit_xdata(results)
 
     if args.expand_string_vars:
         # Expand string variables after crossref and xdata inheritance
         bibpy.expand_strings(results.entries, results.strings)
 
-    if args.order:
-        if args.order.lower() == 'true':
-            args.order = True
-        else:
-            args.order = [
-                order.strip() for order in
-                [e.strip() for e in args.order.split(',')]
-            ]
-
     return results
 
 
@@ -104,9 +105,34 @@ def main():
         action='store_true',
         help='Group entries alphabetically by type.'
     )
+    parser.add_argument(
+        '--raw',
+        action='store_true',
+        help='Output entries exactly as they appear in the input. Only '
+             '--group can be used to reorder them and other formatting '
+             'options are ignored'
+    )
+    bibpy.tools.add_jobs_argument(parser)
+    bibpy.tools.add_cache_arguments(parser)
 
     args, rest = parser.parse_known_args()
 
+    if args.raw and (args.inherit_crossreferences or args.inherit_xdata or
+                     args.expand_string_vars or args.cache):
+        sys.exit('bibformat: --raw cannot be used with --cache or options '
+                 'that change entries')
+
+    args.cache = bibpy.tools.make_cache(args)
+
+    if args.order:
+        if args.order.lower() == 'true':
+            args.order = True
+        else:
+            args.order = [
+                order.strip() for order in
+                [e.strip() for e in args.order.split(',')]
+            ]
+
     try:
         entries = bibpy.tools.read_files('bibformat', rest, process_file, args)
     except (IOError, bibpy.error.ParseException) as ex:
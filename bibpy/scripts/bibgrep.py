@@ -51,7 +51,11 @@ Find entries that were published between 2000 and 2018 inclusive.
 import argparse
 import bibpy
 import bibpy.parser
+import bibpy.search
+import bibpy.table
 import bibpy.tools
+import collections
+import io
 import itertools
 import operator
 import re
@@ -77,6 +81,32 @@ _NAME_TO_OPERATOR = {
 }
 
 
+# Relative costs of the kinds of checks in a query plan
+_CHECK_COSTS = {
+    'bibtype':    0,
+    'bibkey':     1,
+    'occurrence': 2,
+    'exact':      3,
+    'numeric':    4,
+    'approx':     5
+}
+
+# Entry types that are not bibliographic entries and never selected
+_NON_ENTRY_TYPES = frozenset(['string', 'comment', 'preamble'])
+
+# Fields that can be checked using only the tokens at the start of an entry
+_HEADER_FIELDS = frozenset(['bibkey', 'bibtype'])
+_EntryHeader = collections.namedtuple('_EntryHeader', 'bibtype bibkey')
+
+_FLIPPED_OPERATORS = {
+    '<':  '>',
+    '>':  '<',
+    '<=': '>=',
+    '>=': '<=',
+    '=':  '='
+}
+
+
 def sigterm_handler(signum, stack_frame):
     """Handle SIGTERM signal."""
     sys.exit('bibgrep: Caught SIGTERM')
@@ -92,45 +122,41 @@ class BibgrepError(Exception):
     pass
 
 
-def approx_field_predicate(field, value, args):
-    """Return a function that does an approximate match of a string."""
-    flags = re.I if args.ignore_case else 0
-
-    def _approx_match(entry):
-        field_value = getattr(entry, field, None)
-
-        if field_value is None:
-            return False
-        else:
-            return re.search(value, field_value, flags)
-
-    return _approx_match
-
+def exact_test(values, ignore_case):
+    """Return a function that tests if a value is one of some strings."""
+    if ignore_case:
+        values = frozenset(value.lower() for value in values)
 
-def exact_field_predicate(field, value, args):
-    """Return a function that does an exact match of a string."""
-    func = str.lower if args.ignore_case else str
+        def _exact_match(value):
+            return value is not None and str(value).lower() in values
+    else:
+        values = frozenset(values)
 
-    def _exact_match(entry):
-        return func(getattr(entry, field, '')) == func(value)
+        def _exact_match(value):
+            return value is not None and str(value) in values
 
     return _exact_match
 
 
-def field_occurrence_predicate(field, args):
-    """Return a function that checks for the occurrence of a field."""
-    newfield = field.lower() if args.ignore_case else field
+def approx_test(pattern, ignore_case):
+    """Return a function that searches a value for a regular expression."""
+    try:
+        search = re.compile(pattern, re.I if ignore_case else 0).search
+    except re.error as ex:
+        raise BibgrepError(
+            "Invalid regular expression '{0}': {1}".format(pattern, ex)
+        )
 
-    def _field_occurrence(entry):
-        return bool(getattr(entry, newfield, None))
+    def _approx_match(value):
+        return value is not None and search(value) is not None
 
-    return _field_occurrence
+    return _approx_match
 
 
 def negate(func):
     """Return a new function that negates the boolean result of func."""
-    def _negate(entry):
-        return not func(entry)
+    def _negate(value):
+        return not func(value)
 
     return _negate
 
@@ -145,24 +171,23 @@ def operator_from_string(op_name):
     return op
 
 
-def comparison_predicate(field, op_name, value):
-    """Return a predicate function that compares a field to a value."""
+def comparison_test(field, op_name, value):
+    """Return a function that compares a field value to a number."""
     operator = operator_from_string(op_name)
 
-    def _comparison_predicate(entry):
-        if not field:
+    def _comparison(attr):
+        if not attr:
             return False
 
-        attr = getattr(entry, field, None)
-
         try:
-            return attr and operator(int(attr), int(value))
+            return operator(bibpy.search.numeric_value(field, attr),
+                            int(value))
         except ValueError:
             raise BibgrepError(
                 "Cannot compare '{0}' with '{1}'".format(value, attr)
             )
 
-    return _comparison_predicate
+    return _comparison
 
 
 def check_and_get_bounds(lower, upper):
@@ -179,29 +204,27 @@ def check_and_get_bounds(lower, upper):
     return ilower, iupper
 
 
-def interval_predicate(field, lower, upper):
-    """Return a predicate function that checks if a field is in an interval."""
+def interval_test(field, lower, upper):
+    """Return a function that checks if a field value is in an interval."""
     ilower, iupper = check_and_get_bounds(lower, upper)
 
-    def _interval_predicate(entry):
-        if not field:
+    def _interval(attr):
+        if not attr:
             return False
 
-        attr = getattr(entry, field, None)
-
         try:
-            return attr and ilower <= int(attr) <= iupper
+            return ilower <= bibpy.search.numeric_value(field, attr) <= iupper
         except ValueError:
             raise BibgrepError(
                 "Cannot compare '{0}' with interval [{1}, {2}]"
                 .format(attr, lower, upper)
             )
 
-    return _interval_predicate
+    return _interval
 
 
-def range_predicate(lower, op_name1, field, op_name2, upper):
-    """Return a predicate function that checks if a field is in a range.
+def range_test(lower, op_name1, field, op_name2, upper):
+    """Return a function that checks if a field value is in a range.
 
     Example: '1 <= series < 10'
 
@@ -210,89 +233,226 @@ def range_predicate(lower, op_name1, field, op_name2, upper):
     operator1 = operator_from_string(op_name1)
     operator2 = operator_from_string(op_name2)
 
-    def _range_predicate(entry):
-        attr = getattr(entry, field, None)
+    def _range(attr):
+        if not attr:
+            return False
 
         try:
-            if attr:
-                iattr = int(attr)
-                return operator1(ilower, iattr) and operator2(iattr, iupper)
+            iattr = bibpy.search.numeric_value(field, attr)
+            return operator1(ilower, iattr) and operator2(iattr, iupper)
         except ValueError:
             raise BibgrepError(
                 "Cannot compare '{0}' with range {1} {2} field {3} {4}"
                 .format(attr, lower, op_name1, op_name2, upper)
             )
 
-    return _range_predicate
+    return _range
 
 
-def construct_key_entry_predicate(name, key, tokens, args):
-    """Return a key/entry predicate to test if they are of given types."""
-    f = None
+def key_entry_check(key, tokens, ignore_case):
+    """Return a (cost, field, test) check for a key or entry type query.
+
+    Returns None for exact queries which are merged into a single check.
+
+    """
     prefix_op = tokens[0] if tokens[0] else ''
 
     if prefix_op and not set(prefix_op).issubset(set('^~')):
         raise BibgrepError("Invalid field operator(s) '{0}'".format(tokens[0]))
 
     if '~' in prefix_op:
-        f = approx_field_predicate(key, tokens[1], args)
+        test = approx_test(tokens[1], ignore_case)
+    elif '^' in prefix_op:
+        test = exact_test([tokens[1]], ignore_case)
     else:
-        f = exact_field_predicate(key, tokens[1], args)
+        return None
 
     if '^' in prefix_op:
-        f = negate(f)
+        test = negate(test)
 
-    return f
+    return _CHECK_COSTS[key], key, test
 
 
-def construct_field_predicate(name, key, tokens, args):
-    """Return a predicate function from the parsed tokens of a query."""
-    predicate = None
+def field_check(name, tokens, ignore_case):
+    """Return a (cost, field, test) check for a field query.
+
+    Returns None for exact queries which are merged into a single check per
+    field.
+
+    """
+    neg = tokens[0] == '^'
 
     if name == 'value':
         if tokens[2] == '=':
-            predicate = exact_field_predicate(tokens[1], tokens[-1], args)
+            if not neg:
+                return None
+
+            kind, test = 'exact', exact_test([tokens[-1]], ignore_case)
         elif tokens[2] == '~':
-            predicate = approx_field_predicate(tokens[1], tokens[-1], args)
+            kind, test = 'approx', approx_test(tokens[-1], ignore_case)
         else:
             raise BibgrepError(
                 "Invalid field operator '{0}'".format(tokens[1])
             )
+
+        field = tokens[1]
     elif name == 'occurrence':
-        predicate = field_occurrence_predicate(tokens[1], args)
+        field = tokens[1].lower() if ignore_case else tokens[1]
+        kind, test = 'occurrence', bool
     elif name == 'comparison':
-        predicate = comparison_predicate(*tokens[1:])
+        field = tokens[1]
+        kind, test = 'numeric', comparison_test(*tokens[1:])
     elif name == 'interval':
-        predicate = interval_predicate(*tokens[1:])
+        field = tokens[1]
+        kind, test = 'numeric', interval_test(*tokens[1:])
     elif name == 'range':
-        predicate = range_predicate(*tokens[1:])
-    elif name == 'value':
-        predicate = comparison_predicate(*tokens[1:])
+        field = tokens[3]
+        kind, test = 'numeric', range_test(*tokens[1:])
     else:
         raise BibgrepError('Invalid field query syntax')
 
-    neg = tokens[0] == '^'
+    return _CHECK_COSTS[kind], field, negate(test) if neg else test
 
-    return negate(predicate) if neg else predicate
 
+class QueryPlan:
+    """A compiled query that selects the entries matching any of its checks.
 
-def construct_predicates(values, predicate_func, key, pred_combiner, args):
-    """Return a list of predicates on entries."""
-    # Parse and compose all predicates on values given on the command line
-    predicates = []
+    Each check is a (field, test) tuple where test is a function of the value
+    of a field of an entry, or of its key or type for the 'bibkey' and
+    'bibtype' fields. Checks are ordered so that cheap checks are done first
+    and an entry is selected as soon as one of them passes.
 
-    for value in values:
-        name, tokens = bibpy.parser.parse_query(value, key)
-        predicates.append(predicate_func(name, key, tokens, args))
+    """
+
+    def __init__(self, checks=None):
+        """Create a plan from a list of checks.
+
+        If checks is None, the plan selects all entries.
+
+        """
+        self.checks = checks
+
+    @classmethod
+    def compile(cls, keys, bibtypes, fields, ignore_case=False):
+        """Compile lists of key, entry type and field queries into a plan."""
+        if not (keys or bibtypes or fields):
+            return cls()
+
+        checks = []
+
+        # The values of exact queries on each field. Exact queries on the same
+        # field are merged into a single lookup in a set of values
+        exact = collections.OrderedDict()
+
+        for key, values in (('bibkey', keys), ('bibtype', bibtypes)):
+            for value in values or []:
+                _, tokens = bibpy.parser.parse_query(value, key)
+                check = key_entry_check(key, tokens, ignore_case)
+
+                if check is None:
+                    exact.setdefault((key, key), []).append(tokens[1])
+                else:
+                    checks.append(check)
+
+        for value in fields or []:
+            name, tokens = bibpy.parser.parse_query(value, 'field')
+            check = field_check(name, tokens, ignore_case)
+
+            if check is None:
+                exact.setdefault(('exact', tokens[1]), []).append(tokens[-1])
+            else:
+                checks.append(check)
+
+        for (kind, field), values in exact.items():
+            checks.append((
+                _CHECK_COSTS[kind],
+                field,
+                exact_test(values, ignore_case)
+            ))
+
+        # The sort is stable so checks of the same cost keep their order
+        checks.sort(key=operator.itemgetter(0))
+
+        return cls([(field, test) for _, field, test in checks])
+
+    @property
+    def fields(self):
+        """The fields used by the checks of the plan in order."""
+        if self.checks is None:
+            return []
+
+        return list(collections.OrderedDict.fromkeys(
+            field for field, _ in self.checks
+        ))
+
+    def matches(self, entry):
+        """Return True if an entry satisfies any of the checks of the plan."""
+        if self.checks is None:
+            return True
+
+        for field, test in self.checks:
+            if test(getattr(entry, field, None)):
+                return True
+
+        return False
+
+    def filter(self, entries):
+        """Return a list of the entries selected by the plan."""
+        if self.checks is None:
+            return list(entries)
 
-    return bibpy.tools.compose_predicates(predicates, pred_combiner)
+        matches = self.matches
 
+        return [entry for entry in entries if matches(entry)]
 
-def filter_entries(entries, predicates):
-    """Filter entries based on predicates on entry type, key and fields."""
-    for entry in entries:
-        if any(pred(entry) for pred in predicates):
-            yield entry
+    def iter_filter(self, entries):
+        """Generate the entries selected by the plan from an iterable."""
+        if self.checks is None:
+            return iter(entries)
+
+        return filter(self.matches, entries)
+
+    def evaluate(self, table):
+        """Evaluate the plan on an EntryTable and return a selection.
+
+        The selection is a list of booleans that are True for the selected
+        rows. Each check is only evaluated on the rows not selected by any of
+        the previous checks. Fields that are not columns of the table are
+        treated as missing.
+
+        """
+        if self.checks is None:
+            return [True] * len(table)
+
+        selection = [False] * len(table)
+        pending = range(len(table))
+
+        for field, test in self.checks:
+            column = table[field] if field in table else [None] * len(table)
+            remaining = []
+
+            for i in pending:
+                if test(column[i]):
+                    selection[i] = True
+                else:
+                    remaining.append(i)
+
+            pending = remaining
+
+        return selection
+
+    def filter_batches(self, entries, batch_size=4096):
+        """Generate the selected entries by evaluating columnar batches."""
+        fields = [field for field in self.fields
+                  if field not in ('bibkey', 'bibtype')]
+
+        for i in range(0, len(entries), batch_size):
+            batch = entries[i:i + batch_size]
+            table = bibpy.table.EntryTable.fromentries(batch, fields)
+
+            for entry, selected in zip(batch, self.evaluate(table)):
+                if selected:
+                    yield entry
 
 
 def unique_entries(entries):
@@ -300,14 +460,372 @@ def unique_entries(entries):
     return [k for k, _ in itertools.groupby(entries)]
 
 
-def process_file(source, unique, predicates):
-    """Process a single bibliographic file."""
-    entries = bibpy.read_file(source).entries
-
+def process_entries(entries, unique, plan):
+    """Filter the entries of a single bibliographic file."""
     if unique:
         entries = unique_entries(entries)
 
-    return filter_entries(entries, predicates)
+    return plan.filter(entries)
+
+
+def exact_queries(values, key):
+    """Return the values of exact queries or None if any query is not exact."""
+    queries = []
+
+    for value in values:
+        _, tokens = bibpy.parser.parse_query(value, key)
+
+        if tokens[0]:
+            return None
+
+        queries.append(tokens[1])
+
+    return queries
+
+
+def index_lookups(args, bibtypes):
+    """Return the values to look up in the indexes of each file.
+
+    The result is a list of (field, values) tuples for the keys and entry types
+    if the query can be answered by looking up exact keys and entry types only,
+    otherwise it is None and each entry must be tested.
+
+    """
+    if args.fields or args.unique or args.ignore_case:
+        return None
+
+    lookups = []
+
+    for field, values in (('bibkey', args.keys), ('bibtype', bibtypes)):
+        if values:
+            queries = exact_queries(values, field)
+
+            if queries is None:
+                return None
+
+            lookups.append((field, queries))
+
+    return lookups or None
+
+
+def select_entries(results, lookups, unique, plan):
+    """Select the entries of a file using its indexes if possible."""
+    if lookups is None:
+        return process_entries(results.entries, unique, plan)
+
+    positions = set()
+
+    for field, values in lookups:
+        index = results.index(field)
+
+        for value in values:
+            positions.update(index.get(value, []))
+
+    return [results.entries[position] for position in sorted(positions)]
+
+
+def select_group(plan, group):
+    """Return False if a group of tokens is not an entry selected by a plan.
+
+    Only the type and key of the entry are looked at so the plan must not
+    check any other fields. Groups that are not well-formed entries are
+    selected so that the parser can report them.
+
+    """
+    i = 1 if group[0].type == 'comment' else 0
+
+    if i == len(group):
+        # A trailing non-entry comment
+        return False
+
+    if len(group) < i + 4 or group[i].type != 'entry' or\
+            group[i + 1].type != 'name':
+        return True
+
+    bibtype = group[i + 1].value.lower()
+
+    if bibtype in _NON_ENTRY_TYPES:
+        return False
+
+    key = group[i + 3]
+
+    if group[i + 2].type != 'lbrace' or key.type not in ('name', 'number'):
+        return True
+
+    return plan.matches(_EntryHeader(bibtype, key.value))
+
+
+def iter_file_groups(source, text=False):
+    """Generate the groups of tokens of a file or file handle as it is read.
+
+    If text is True, each group is generated with its source text.
+
+    """
+    fh = io.open(source, encoding='utf-8')\
+        if bibpy.is_string(source) else source
+
+    with fh:
+        yield from bibpy.parser.iter_file_groups(fh, text=text)
+
+
+def stream_file(source, plan, unique, parse=True, raw=False):
+    """Generate the entries of a file selected by a plan as it is read.
+
+    Memory use is bounded by the largest entry in the file. If the plan only
+    checks the keys and types of entries, entries are selected using their
+    tokens so that unselected entries are never parsed. If parse is also
+    False, selected entries are not parsed either and None is generated in
+    their place, e.g. to count them.
+
+    If raw is True, entries are generated as
+    :py:class:`~bibpy.entry.raw.RawEntry` objects that format as their text
+    in the file. Entries selected using their tokens are then generated as
+    their text without parsing them.
+
+    """
+    groups = iter_file_groups(source, raw)
+
+    if plan.checks is not None and not unique and\
+            set(plan.fields) <= _HEADER_FIELDS:
+        header_plan, plan = plan, QueryPlan()
+        tokens = operator.itemgetter(0) if raw else lambda group: group
+        groups = (group for group in groups
+                  if select_group(header_plan, tokens(group)))
+
+        if not parse:
+            return (None for _ in groups)
+        elif raw:
+            return (text for _, text in groups)
+
+    if raw:
+        results = bibpy.parser.iter_raw_results(groups, 'relaxed')
+    else:
+        results = bibpy.parser.iter_results(groups, 'relaxed')
+
+    entries = (
+        result for result in results
+        if result.bibtype not in _NON_ENTRY_TYPES
+    )
+
+    if unique:
+        entries = (entry for entry, _ in itertools.groupby(entries))
+
+    return plan.iter_filter(entries)
+
+
+class EntryPrinter:
+    """Writes entries to standard output as soon as they are selected.
+
+    The output is the same as printing the result of
+    :py:func:`bibpy.write_string` for all entries. Entries that are strings
+    are written as they are.
+
+    """
+
+    def __init__(self):
+        """Create a printer that has not printed any entries."""
+        self.count = 0
+
+    def write(self, entries):
+        """Write some entries."""
+        for entry in entries:
+            if self.count:
+                sys.stdout.write(os.linesep * 2)
+
+            sys.stdout.write(entry if bibpy.is_string(entry)
+                             else entry.format())
+            sys.stdout.flush()
+            self.count += 1
+
+    def finish(self):
+        """End the output after the last entry."""
+        if self.count:
+            sys.stdout.write('\n')
+            self.count = 0
+
+
+def read_files(filenames, jobs, cache=None):
+    """Read files and generate each filename and its entries or error.
+
+    Files are read sequentially unless more than one job is requested, in
+    which case errors are generated in place of a file's entries instead of
+    being raised. Parsed files are stored in and loaded from the cache if one
+    is given.
+
+    """
+    if jobs > 1:
+        yield from bibpy.read_files(
+            filenames,
+            workers=jobs,
+            return_exceptions=True,
+            cache=cache
+        )
+    else:
+        for filename in filenames:
+            yield filename, bibpy.read_file(filename, cache=cache)
+
+
+def iter_selected(rest, args, plan, lookups, bibtypes):
+    """Generate each file or source and an iterable of its selected entries.
+
+    Files are streamed unless a search index is used, or files are cached or
+    read in parallel. In the latter case errors are generated in place of a
+    file's entries instead of being raised.
+
+    """
+    if args.raw and (args.index or args.cache or args.jobs > 1):
+        raise BibgrepError(
+            '--raw cannot be used with --index, --cache or --jobs'
+        )
+
+    if args.index:
+        index = load_index(args.index)
+        candidates = index_candidates(index, args, bibtypes)
+
+        for filename, entries in index.iter_files(candidates):
+            # Candidates from the index still have to be tested
+            yield filename, process_entries(entries, args.unique, plan)
+    elif rest and (args.cache or args.jobs > 1):
+        bib_files = bibpy.tools.iter_files(rest, '*.bib', args.recursive)
+        cache = bibpy.tools.make_cache(args)
+
+        for filename, result in read_files(bib_files, args.jobs, cache):
+            if isinstance(result, Exception):
+                yield filename, result
+            else:
+                yield filename, select_entries(result, lookups, args.unique,
+                                               plan)
+    else:
+        sources = bibpy.tools.iter_files(rest, '*.bib', args.recursive)\
+            if rest else [sys.stdin]
+
+        for source in sources:
+            yield source, stream_file(source, plan, args.unique,
+                                      not args.count, args.raw)
+
+
+def build_index(path, filenames, args):
+    """Build a search index of some files and save it."""
+    if not filenames:
+        raise BibgrepError('No files to index')
+
+    bib_files = bibpy.tools.iter_files(filenames, '*.bib', args.recursive)
+    cache = bibpy.tools.make_cache(args)
+    index = bibpy.search.SearchIndex()
+
+    for filename, result in read_files(bib_files, args.jobs, cache):
+        if isinstance(result, Exception):
+            raise BibgrepError('{0}: {1}'.format(filename, result))
+
+        index.add_file(filename, result.entries)
+
+    index.save(path)
+
+
+def load_index(path):
+    """Load a search index and check that its files are unchanged."""
+    try:
+        index = bibpy.search.SearchIndex.load(path)
+    except ValueError as ex:
+        raise BibgrepError(str(ex))
+
+    stale = index.stale_files()
+
+    if stale:
+        raise BibgrepError(
+            "Index '{0}' is out of date ('{1}' has changed), rebuild it with "
+            "--build-index".format(path, stale[0])
+        )
+
+    return index
+
+
+def numeric_candidates(index, name, tokens):
+    """Return the ids of the entries in a search index matching a number.
+
+    The query is a comparison, interval or range query. Returns None if the
+    query cannot be answered using the index.
+
+    """
+    if name == 'comparison':
+        field, op_name, value = tokens
+
+        try:
+            comparisons = [(op_name, int(value))]
+        except ValueError:
+            return None
+    elif name == 'interval':
+        field, lower, upper = tokens
+        lower, upper = check_and_get_bounds(lower, upper)
+        comparisons = [('>=', lower), ('<=', upper)]
+    elif name == 'range':
+        lower, op_name1, field, op_name2, upper = tokens
+        lower, upper = check_and_get_bounds(lower, upper)
+
+        # 'lower op field' is the same as 'field flipped-op lower'
+        comparisons = [(_FLIPPED_OPERATORS[op_name1], lower),
+                       (op_name2, upper)]
+    else:
+        return None
+
+    candidates = None
+
+    for op_name, value in comparisons:
+        ids = index.compare(field, op_name, value)
+
+        if ids is None:
+            return None
+
+        candidates = ids if candidates is None else candidates & ids
+
+    return candidates
+
+
+def index_candidates(index, args, bibtypes):
+    """Return the ids of the entries in a search index that may match.
+
+    Returns None if the query cannot be answered using the index and all
+    entries must be tested.
+
+    """
+    if args.unique or not (args.keys or args.entry or args.fields):
+        return None
+
+    candidates = set()
+    queries = [('bibkey', value) for value in args.keys or []] +\
+        [('bibtype', value) for value in bibtypes]
+
+    for key, value in queries:
+        _, (prefix_op, query) = bibpy.parser.parse_query(value, key)
+
+        if prefix_op and '^' in prefix_op:
+            return None
+        elif prefix_op and '~' in prefix_op:
+            candidates |= index.search(key, query)
+        else:
+            candidates |= index.match(key, query)
+
+    for value in args.fields or []:
+        name, tokens = bibpy.parser.parse_query(value, 'field')
+
+        if tokens[0] == '^':
+            return None
+        elif name == 'value' and tokens[2] == '=':
+            candidates |= index.match(tokens[1], tokens[-1])
+        elif name == 'value' and tokens[2] == '~':
+            candidates |= index.search(tokens[1], tokens[-1])
+        elif name == 'occurrence':
+            field = tokens[1].lower() if args.ignore_case else tokens[1]
+            candidates |= index.with_field(field)
+        else:
+            ids = numeric_candidates(index, name, tokens[1:])
+
+            if ids is None:
+                return None
+
+            candidates |= ids
+
+    return candidates
 
 
 def main():
@@ -372,95 +890,92 @@ def main():
         help='Display only filename and not the full path when --count is '
              ' given'
     )
+    parser.add_argument(
+        '--build-index',
+        metavar='PATH',
+        help='Build a search index of the given files and save it to a file '
+             'instead of searching'
+    )
+    parser.add_argument(
+        '--index',
+        metavar='PATH',
+        help='Search the files in a search index built with --build-index '
+             'instead of reading them'
+    )
+    parser.add_argument(
+        '--raw',
+        action='store_true',
+        help='Print matching entries exactly as they appear in the input '
+             'instead of formatting them'
+    )
+    bibpy.tools.add_jobs_argument(parser)
+    bibpy.tools.add_cache_arguments(parser)
 
     args, rest = parser.parse_known_args()
 
-    key_predicate = bibpy.tools.always_false
-    entry_predicate = bibpy.tools.always_false
-    field_predicate = bibpy.tools.always_false
+    bibtypes = []
 
     try:
-        if args.keys:
-            key_predicate = construct_predicates(
-                args.keys,
-                construct_key_entry_predicate,
-                'bibkey',
-                any,
-                args
-            )
-
         if args.entry:
             bibtypes = [
                 e for es in args.entry for e in map(str.strip, es.split(','))
             ]
-            entry_predicate = construct_predicates(
-                bibtypes,
-                construct_key_entry_predicate,
-                'bibtype',
-                any,
-                args
-            )
 
-        if args.fields:
-            field_predicate = construct_predicates(
-                args.fields,
-                construct_field_predicate,
-                'field',
-                any,
-                args
-            )
+        plan = QueryPlan.compile(
+            args.keys,
+            bibtypes,
+            args.fields,
+            args.ignore_case
+        )
+        lookups = index_lookups(args, bibtypes)
     except (BibgrepError, bibpy.error.ParseException) as ex:
         sys.exit('{0}'.format(ex))
 
-    if not args.keys and not args.entry and not args.fields:
-        # If no constraints are defined, all entries pass
-        key_predicate = bibpy.tools.always_true
-        entry_predicate = bibpy.tools.always_true
-        field_predicate = bibpy.tools.always_true
-
-    filtered_entries = []
+    printer = EntryPrinter()
     total_count = 0
-    predicates = [entry_predicate, key_predicate, field_predicate]
-
-    try:
-        if not rest:
-            filtered_entries = process_file(sys.stdin, args.unique, predicates)
-
-            if args.count:
-                num_entries = len(list(filtered_entries))
-                total_count += num_entries
-                filtered_entries = []
-        else:
-            bib_files = bibpy.tools.iter_files(rest, '*.bib', args.recursive)
-
-            for filename in bib_files:
-                filtered_entries += list(
-                    process_file(filename, args.unique, predicates)
-                )
+    failed = False
 
-                if args.count:
-                    if args.no_filenames:
-                        total_count += len(filtered_entries)
-                    else:
-                        if args.abbreviate_filenames:
-                            filename = os.path.basename(filename)
+    # Print a count for each file unless reading from stdin
+    count_files = (rest or args.index) and not args.no_filenames
 
-                        print('{0}:{1}'.format(
-                            filename, len(filtered_entries))
-                        )
-
-                    filtered_entries = []
+    try:
+        if args.build_index:
+            build_index(args.build_index, rest, args)
+            return
+        elif args.index and rest:
+            raise BibgrepError('Files cannot be given with --index')
+
+        for filename, selected in iter_selected(rest, args, plan, lookups,
+                                                bibtypes):
+            if isinstance(selected, Exception):
+                # Report the offending file and carry on with the others
+                sys.stderr.write('bibgrep: {0}: {1}\n'.format(
+                    filename,
+                    selected
+                ))
+                failed = True
+            elif not args.count:
+                printer.write(selected)
+            elif count_files:
+                if args.abbreviate_filenames:
+                    filename = os.path.basename(filename)
+
+                print('{0}:{1}'.format(filename, sum(1 for _ in selected)))
+            else:
+                total_count += sum(1 for _ in selected)
     except (IOError, bibpy.error.ParseException, BibgrepError) as ex:
+        printer.finish()
         sys.exit('bibgrep: {0}'.format(ex))
     except KeyboardInterrupt:
         sys.exit(1)
 
-    if args.count and (args.no_filenames or not rest):
-        print(total_count)
+    printer.finish()
 
-    if filtered_entries:
-        # Write all filtered entries to sys.stdout
-        print(bibpy.write_string(filtered_entries))
+    if failed:
+        sys.exit(1)
+
+    if args.count and not count_files:
+        print(total_count)
 
     bibpy.tools.close_output_handles()
 
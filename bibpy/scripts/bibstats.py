@@ -25,8 +25,13 @@ __license__ = bibpy.__license__
 
 
 def process_file(path, args):
-    """Process a single bib file."""
-    return bibpy.read_file(path).entries
+    """Process a single bib file and return the count of each entry type."""
+    results = bibpy.read_file(path, cache=args.cache)
+
+    return [
+        (bibtype, len(positions))
+        for bibtype, positions in results.index('bibtype').items()
+    ]
 
 
 def header(titles, spacing=20, underline='-'):
@@ -92,11 +97,14 @@ def main():
         action='store_true',
         help='Recursively search listed subdirectories'
     )
+    bibpy.tools.add_jobs_argument(parser)
+    bibpy.tools.add_cache_arguments(parser)
 
     args, rest = parser.parse_known_args()
+    args.cache = bibpy.tools.make_cache(args)
 
     try:
-        all_entries = bibpy.tools.read_files(
+        counts = bibpy.tools.read_files(
             'bibstats',
             rest,
             process_file,
@@ -107,7 +115,11 @@ def main():
     except KeyboardInterrupt:
         sys.exit(1)
 
-    types = collections.Counter([entry.bibtype for entry in all_entries])
+    types = collections.Counter()
+
+    for bibtype, count in counts:
+        types[bibtype] += count
+
     total = sum(types.values())
     stats = types.most_common(args.top)
 
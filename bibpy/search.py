@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+
+"""Persistent search index of the entries of a set of files.
+
+A :py:class:`SearchIndex` stores the entries of some files together with an
+inverted index of their fields. Each field value is split into lowercase word
+tokens and the index maps each field and token to the sorted ids of the
+entries containing that token. The ids number the entries of all files in
+order.
+
+Queries on the index return a set of candidate entries that may match, which
+must then be tested with the query itself. The candidates are found without
+testing any other entries:
+
+    * An exact match of a value has the tokens of the value
+    * An approximate match of a literal string has tokens that contain the
+      words of the string
+
+    * A comparison of a number is looked up in a sorted array of the numeric
+      values of the field, see :py:func:`numeric_value`
+
+Other queries, e.g. regular expressions, are answered by all entries that have
+the queried field. Fields that have any non-numeric values have no numeric
+index.
+
+An index is saved as a JSON header with the indexed files and the sizes of
+the lists of ids in the inverted index, followed by all ids and numeric values
+as arrays of integers and the entries as a binary snapshot (see
+:py:mod:`bibpy.binary`).
+
+"""
+
+import array
+import bibpy.binary
+import bibpy.entries
+import bisect
+import collections
+import json
+import os
+import re
+import struct
+import sys
+import tempfile
+
+__all__ = ('SearchIndex',)
+
+# Magic bytes and version of the index file format
+_MAGIC = b'BIBPYIDX'
+_VERSION = 3
+
+# Size of each section of an index file
+_SIZE = struct.Struct('<Q')
+
+_TOKEN_REGEX = re.compile(r'\w+')
+
+# Characters with special meaning in regular expressions
+_REGEX_CHARACTERS = frozenset('.^$*+?{}[]\\|()')
+
+# Type of the arrays of entry ids and of numeric values
+_ID_TYPE = 'I'
+_NUMBER_TYPE = 'q'
+
+_LEADING_NUMBER_REGEX = re.compile(r'\s*(-?\d+)')
+
+# Range of numbers that fit in a numeric index
+_MIN_NUMBER, _MAX_NUMBER = -2 ** 63, 2 ** 63 - 1
+
+# Operators of comparisons as the bisection functions that find the start
+# and end of the matching values in a sorted array
+_BISECTIONS = {
+    '<':  (None, bisect.bisect_left),
+    '<=': (None, bisect.bisect_right),
+    '>':  (bisect.bisect_right, None),
+    '>=': (bisect.bisect_left, None),
+    '=':  (bisect.bisect_left, bisect.bisect_right)
+}
+
+
+def tokenize(value):
+    """Return the distinct lowercase word tokens of a value."""
+    return set(_TOKEN_REGEX.findall(str(value).lower()))
+
+
+def numeric_value(field, value):
+    """Return the number that a field value is compared as in range queries.
+
+    The value of a 'pages' field is its first page and the value of a 'date'
+    field is the year of its start date. Other values must be integers. Raises
+    a ValueError if the value has no numeric value.
+
+    """
+    if field == 'pages' or field == 'date':
+        match = _LEADING_NUMBER_REGEX.match(str(value))
+
+        if match is None:
+            raise ValueError(
+                "'{0}' field '{1}' has no numeric value".format(field, value)
+            )
+
+        return int(match.group(1))
+
+    return int(value)
+
+
+def _read_section(fh):
+    """Read a section of an index file prefixed by its size."""
+    data = fh.read(_SIZE.size)
+    size = _SIZE.unpack(data)[0] if len(data) == _SIZE.size else -1
+    section = fh.read(size) if size >= 0 else b''
+
+    if len(section) != size:
+        raise ValueError('Truncated search index')
+
+    return section
+
+
+def _file_stat(path):
+    """Return the modification time and size of a file."""
+    stat = os.stat(path)
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+class SearchIndex:
+    """An inverted index of the entries of a set of files."""
+
+    def __init__(self):
+        """Create an empty index."""
+        # A (path, abspath, mtime, size, start, end) tuple for each file where
+        # start and end are the range of the ids of its entries
+        self.files = []
+        self.entries = []
+
+        # Ids of the entries that have each field and of the entries that
+        # have each token in a field
+        self._fields = {}
+        self._postings = {}
+
+        # Sorted arrays of the numeric values of each field and of the ids of
+        # the entries with those values, and the fields with values that are
+        # not numbers
+        self._numbers = {}
+        self._non_numeric = set()
+
+        # Tokens of each field for substring searches
+        self._vocabularies = {}
+
+    @classmethod
+    def build(cls, results):
+        """Build an index from (path, Entries) pairs, e.g. from read_files."""
+        index = cls()
+
+        for path, entries in results:
+            index.add_file(path, entries.entries)
+
+        return index
+
+    def add_file(self, path, entries):
+        """Add the entries of a file to the index."""
+        start = len(self.entries)
+        mtime, size = _file_stat(path)
+        fields = collections.defaultdict(lambda: array.array(_ID_TYPE))
+        numbers = collections.defaultdict(list)
+        postings = self._postings
+
+        for i, entry in enumerate(entries, start):
+            for field in ['bibkey', 'bibtype'] + entry.fields:
+                value = entry[field]
+
+                if value is None or value == '':
+                    continue
+
+                fields[field].append(i)
+                self._add_number(numbers, field, value, i)
+                field_postings = postings.get(field)
+
+                if field_postings is None:
+                    field_postings = postings[field] = {}
+
+                for token in tokenize(value):
+                    ids = field_postings.get(token)
+
+                    if ids is None:
+                        ids = field_postings[token] = array.array(_ID_TYPE)
+
+                    ids.append(i)
+
+        for field, ids in fields.items():
+            self._fields.setdefault(field, array.array(_ID_TYPE)).extend(ids)
+
+        self._merge_numbers(numbers)
+
+        self.entries.extend(entries)
+        self.files.append((path, os.path.abspath(path), mtime, size, start,
+                           len(self.entries)))
+        self._vocabularies.clear()
+
+    def stale_files(self):
+        """Return the indexed files that have changed or no longer exist."""
+        stale = []
+
+        for path, abspath, mtime, size, _, _ in self.files:
+            try:
+                if _file_stat(abspath) != (mtime, size):
+                    stale.append(path)
+            except FileNotFoundError:
+                stale.append(path)
+
+        return stale
+
+    def with_field(self, field):
+        """Return the ids of the entries that have a field."""
+        return set(self._fields.get(field, ()))
+
+    def match(self, field, value):
+        """Return the candidate ids of entries where a field equals a value.
+
+        Tokens are lowercase so the candidates also include the entries that
+        match when ignoring case.
+
+        """
+        tokens = tokenize(value)
+
+        if not tokens:
+            return self.with_field(field)
+
+        postings = self._postings.get(field, {})
+
+        return self._intersect(postings.get(token, ()) for token in tokens)
+
+    def search(self, field, pattern):
+        """Return the candidate ids of entries where a field matches a regex.
+
+        Only literal patterns are narrowed down using the index, for other
+        patterns the candidates are all entries that have the field.
+
+        """
+        words = _TOKEN_REGEX.findall(pattern.lower())
+
+        if not words or not _REGEX_CHARACTERS.isdisjoint(pattern):
+            return self.with_field(field)
+
+        postings = self._postings.get(field, {})
+        vocabulary = self._vocabulary(field)
+
+        # Each word of a literal is contained in a token of the field value
+        return self._intersect(
+            (i for token in vocabulary if word in token
+             for i in postings[token])
+            for word in words
+        )
+
+    def compare(self, field, op_name, value):
+        """Return the ids of entries whose field compares to a number.
+
+        The operator is one of '<', '<=', '>', '>=' and '='. Returns None if
+        the field has values that are not numbers and cannot be compared
+        using the index.
+
+        """
+        if field in self._non_numeric:
+            return None
+
+        values, ids = self._numbers.get(field, ((), ()))
+        start, end = _BISECTIONS[op_name]
+
+        return set(ids[start(values, value) if start else 0:
+                       end(values, value) if end else len(values)])
+
+    def iter_files(self, candidates=None):
+        """Generate the path and list of entries of each indexed file.
+
+        If a set of candidate ids is given, only the entries that are
+        candidates are generated, in the order they appear in the file.
+
+        """
+        ids = None if candidates is None else sorted(candidates)
+
+        for path, _, _, _, start, end in self.files:
+            if ids is None:
+                yield path, self.entries[start:end]
+            else:
+                yield path, [
+                    self.entries[i] for i in
+                    ids[bisect.bisect_left(ids, start):
+                        bisect.bisect_left(ids, end)]
+                ]
+
+    def save(self, path):
+        """Save the index to a file."""
+        # The lists of ids and numbers are concatenated into single arrays and
+        # the header only records their lengths
+        ids = array.array(_ID_TYPE)
+        numbers = array.array(_NUMBER_TYPE)
+        fields = collections.OrderedDict()
+        postings = collections.OrderedDict()
+        numeric = collections.OrderedDict()
+
+        for field, field_ids in self._fields.items():
+            fields[field] = len(field_ids)
+            ids.extend(field_ids)
+
+        for field, field_postings in self._postings.items():
+            postings[field] = collections.OrderedDict()
+
+            for token, token_ids in field_postings.items():
+                postings[field][token] = len(token_ids)
+                ids.extend(token_ids)
+
+        for field, (values, value_ids) in self._numbers.items():
+            numeric[field] = len(values)
+            numbers.extend(values)
+            ids.extend(value_ids)
+
+        header = json.dumps(collections.OrderedDict([
+            ('version', _VERSION),
+            ('byteorder', sys.byteorder),
+            ('itemsizes', [ids.itemsize, numbers.itemsize]),
+            ('files', self.files),
+            ('fields', fields),
+            ('postings', postings),
+            ('numbers', numeric),
+            ('non_numeric', sorted(self._non_numeric))
+        ])).encode('utf-8')
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                fh.write(_MAGIC)
+
+                for section in (header, ids.tobytes(), numbers.tobytes()):
+                    fh.write(_SIZE.pack(len(section)))
+                    fh.write(section)
+
+                bibpy.binary.dump(bibpy.entries.Entries(self.entries), fh)
+
+            # Temporary files are only readable by their owner
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Load an index from a file.
+
+        Raises a ValueError if the file is not an index or was saved by an
+        incompatible version of bibpy.
+
+        """
+        index = cls()
+
+        with open(path, 'rb') as fh:
+            try:
+                if fh.read(len(_MAGIC)) != _MAGIC:
+                    raise ValueError()
+
+                header = json.loads(
+                    _read_section(fh).decode('utf-8'),
+                    object_pairs_hook=collections.OrderedDict
+                )
+                version = header['version']
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("'{0}' is not a search index".format(path))
+
+            if version != _VERSION:
+                raise ValueError(
+                    'Unsupported search index version {0} (expected {1})'
+                    .format(version, _VERSION)
+                )
+
+            ids = array.array(_ID_TYPE)
+            numbers = array.array(_NUMBER_TYPE)
+
+            if header['itemsizes'] != [ids.itemsize, numbers.itemsize]:
+                raise ValueError(
+                    "Search index '{0}' was saved on an incompatible platform"
+                    .format(path)
+                )
+
+            ids.frombytes(_read_section(fh))
+            numbers.frombytes(_read_section(fh))
+
+            if header['byteorder'] != sys.byteorder:
+                ids.byteswap()
+                numbers.byteswap()
+
+            index.files = [tuple(indexed) for indexed in header['files']]
+            index._non_numeric = set(header['non_numeric'])
+            start = 0
+
+            for field, size in header['fields'].items():
+                index._fields[field] = ids[start:start + size]
+                start += size
+
+            for field, field_postings in header['postings'].items():
+                index._postings[field] = {}
+
+                for token, size in field_postings.items():
+                    index._postings[field][token] = ids[start:start + size]
+                    start += size
+
+            number_start = 0
+
+            for field, size in header['numbers'].items():
+                index._numbers[field] = (
+                    numbers[number_start:number_start + size],
+                    ids[start:start + size]
+                )
+                number_start += size
+                start += size
+
+            if start != len(ids) or number_start != len(numbers):
+                raise ValueError("Corrupted search index '{0}'".format(path))
+
+            index.entries = bibpy.binary.load(fh).entries
+
+        return index
+
+    def _add_number(self, numbers, field, value, i):
+        """Add the numeric value of a field of an entry to a dictionary."""
+        if field in self._non_numeric:
+            return
+
+        try:
+            number = numeric_value(field, value)
+        except (TypeError, ValueError):
+            number = None
+
+        if number is None or not _MIN_NUMBER <= number <= _MAX_NUMBER:
+            # Comparisons on the field must test all entries
+            self._non_numeric.add(field)
+            self._numbers.pop(field, None)
+            numbers.pop(field, None)
+        else:
+            numbers[field].append((number, i))
+
+    def _merge_numbers(self, numbers):
+        """Merge lists of (number, id) tuples into the numeric indexes."""
+        for field, pairs in numbers.items():
+            values, ids = self._numbers.get(field, ((), ()))
+            pairs.extend(zip(values, ids))
+            pairs.sort()
+
+            self._numbers[field] = (
+                array.array(_NUMBER_TYPE, (number for number, _ in pairs)),
+                array.array(_ID_TYPE, (i for _, i in pairs))
+            )
+
+    def _vocabulary(self, field):
+        """Return a list of the tokens of a field."""
+        vocabulary = self._vocabularies.get(field)
+
+        if vocabulary is None:
+            vocabulary = self._vocabularies[field] =\
+                list(self._postings.get(field, ()))
+
+        return vocabulary
+
+    def _intersect(self, id_lists):
+        """Return the intersection of some lists of ids."""
+        result = None
+
+        for ids in id_lists:
+            result = set(ids) if result is None else result.intersection(ids)
+
+            if not result:
+                return set()
+
+        return set() if result is None else result
+
+    def __len__(self):
+        """Return the number of indexed entries."""
+        return len(self.entries)
+
+    def __repr__(self):
+        return '{0}(files={1}, entries={2})'.format(
+            self.__class__.__name__,
+            len(self.files),
+            len(self.entries)
+        )
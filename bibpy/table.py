@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""Columnar tables of bibliographic entries for bulk analysis.
+
+An :py:class:`EntryTable` stores the values of a set of fields for a list of
+entries as one list per field, along with a column for the keys and the types
+of the entries. Missing values are None and are also recorded in a null mask
+per field. Tables are usually created with
+:py:meth:`bibpy.entries.Entries.to_columns`.
+
+Tables can be converted to NumPy arrays, pandas data frames and Arrow tables if
+the respective packages are installed.
+
+"""
+
+import collections
+import itertools
+
+__all__ = ('EntryTable',)
+
+
+def _import(name, method):
+    """Import an optional dependency or raise an informative ImportError."""
+    try:
+        return __import__(name)
+    except ImportError:
+        raise ImportError(
+            "Package '{0}' is required for EntryTable.{1}".format(name, method)
+        )
+
+
+class EntryTable:
+    """A table with a column of values for each field of a list of entries."""
+
+    def __init__(self, bibkeys, bibtypes, columns):
+        """Create a table from columns of keys, types and field values.
+
+        The columns argument is an ordered dictionary of field names and lists
+        of values where None denotes a missing value. All columns must have
+        the same length.
+
+        """
+        for field, values in columns.items():
+            if len(values) != len(bibkeys):
+                raise ValueError(
+                    "Column '{0}' has {1} values, expected {2}"
+                    .format(field, len(values), len(bibkeys))
+                )
+
+        if len(bibtypes) != len(bibkeys):
+            raise ValueError('There must be a type for each key')
+
+        self._bibkeys = bibkeys
+        self._bibtypes = bibtypes
+        self._columns = columns
+        self._masks = {}
+
+    @classmethod
+    def fromentries(cls, entries, fields=None):
+        """Create a table from a list of entries.
+
+        If fields is None, the table has a column for every field used by any
+        of the entries in the order they are first encountered.
+
+        """
+        if fields is None:
+            fields = list(collections.OrderedDict.fromkeys(
+                itertools.chain.from_iterable(entry.fields
+                                              for entry in entries)
+            ))
+
+        columns = collections.OrderedDict(
+            (field, [entry[field] for entry in entries]) for field in fields
+        )
+
+        return cls(
+            [entry.bibkey for entry in entries],
+            [entry.bibtype for entry in entries],
+            columns
+        )
+
+    @property
+    def bibkeys(self):
+        """The column of entry keys."""
+        return self._bibkeys
+
+    @property
+    def bibtypes(self):
+        """The column of entry types."""
+        return self._bibtypes
+
+    @property
+    def fields(self):
+        """The names of the field columns in order."""
+        return list(self._columns)
+
+    @property
+    def names(self):
+        """The names of all columns including 'bibkey' and 'bibtype'."""
+        return ['bibkey', 'bibtype'] + self.fields
+
+    @property
+    def columns(self):
+        """A dictionary of all columns including 'bibkey' and 'bibtype'."""
+        columns = collections.OrderedDict([
+            ('bibkey', self._bibkeys),
+            ('bibtype', self._bibtypes)
+        ])
+        columns.update(self._columns)
+
+        return columns
+
+    def mask(self, field):
+        """Return the null mask of a column.
+
+        The mask is a list of booleans that are True where a value is missing.
+
+        """
+        if field in ('bibkey', 'bibtype'):
+            return [False] * len(self)
+
+        mask = self._masks.get(field)
+
+        if mask is None:
+            mask = self._masks[field] = [
+                value is None for value in self._columns[field]
+            ]
+
+        return mask
+
+    def where(self, selection):
+        """Return a new table with the rows where a selection is true.
+
+        The selection is a sequence of booleans, one for each row, such as a
+        null mask or the result of a comparison on a column.
+
+        """
+        if len(selection) != len(self):
+            raise ValueError(
+                'Selection has {0} values, expected {1}'
+                .format(len(selection), len(self))
+            )
+
+        return self.take([i for i, selected in enumerate(selection)
+                          if selected])
+
+    def take(self, indices):
+        """Return a new table with the rows at the given indices."""
+        def select(column):
+            return [column[i] for i in indices]
+
+        return EntryTable(
+            select(self._bibkeys),
+            select(self._bibtypes),
+            collections.OrderedDict(
+                (field, select(values))
+                for field, values in self._columns.items()
+            )
+        )
+
+    def to_numpy(self):
+        """Return a dictionary of NumPy masked arrays for each column.
+
+        Columns of integers become integer arrays, e.g. the 'year' field after
+        postprocessing, and all other columns become object arrays. Missing
+        values are masked.
+
+        """
+        numpy = _import('numpy', 'to_numpy')
+        arrays = {}
+
+        for name, values in self.columns.items():
+            present = [value for value in values if value is not None]
+
+            if present and all(type(value) is int for value in present):
+                data = numpy.array(
+                    [0 if value is None else value for value in values],
+                    dtype=numpy.int64
+                )
+            else:
+                data = numpy.empty(len(values), dtype=object)
+                data[:] = values
+
+            arrays[name] = numpy.ma.masked_array(data, mask=self.mask(name))
+
+        return arrays
+
+    def to_pandas(self):
+        """Return a pandas DataFrame with a column for each column."""
+        pandas = _import('pandas', 'to_pandas')
+
+        return pandas.DataFrame(self.columns, columns=self.names)
+
+    def to_arrow(self):
+        """Return a pyarrow Table with a column for each column.
+
+        Missing values become nulls. Arrow requires the values of a column to
+        have compatible types.
+
+        """
+        pyarrow = _import('pyarrow', 'to_arrow')
+
+        return pyarrow.table(self.columns)
+
+    def __getitem__(self, name):
+        """Return a column by name."""
+        return self.columns[name]
+
+    def __contains__(self, name):
+        """Check if the table has a column."""
+        return name in ('bibkey', 'bibtype') or name in self._columns
+
+    def __len__(self):
+        """Return the number of rows in the table."""
+        return len(self._bibkeys)
+
+    def __repr__(self):
+        return '{0}(rows={1}, fields={2})'.format(
+            self.__class__.__name__,
+            len(self),
+            len(self._columns)
+        )
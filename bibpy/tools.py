@@ -3,7 +3,10 @@
 """A collection of functionality for bibpy's accompanying tools."""
 
 import bibpy
+import bibpy.cache
+import concurrent.futures
 import fnmatch
+import functools
 import os
 import sys
 
@@ -46,15 +49,97 @@ def iter_files(names, pattern, recursive):
             yield name
 
 
+def parallel_map(func, items, workers=None, ordered=True):
+    """Apply a function to items in parallel and generate (item, result).
+
+    The function is applied in a pool of worker processes, or in the current
+    process if there is only a single worker or item. The function and its
+    results must therefore be picklable. If workers is None, use as many
+    workers as there are processors.
+
+    Results are generated in the order of the items if ordered is True and as
+    they complete otherwise. An exception raised by the function is generated
+    as the result for that item so it does not stop any other items from being
+    processed.
+
+    """
+    items = list(items)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            try:
+                result = func(item)
+            except Exception as ex:
+                result = ex
+
+            yield item, result
+
+        return
+
+    with concurrent.futures.ProcessPoolExecutor(min(workers, len(items)))\
+            as executor:
+        futures = {executor.submit(func, item): item for item in items}
+
+        try:
+            if ordered:
+                completed = futures
+            else:
+                completed = concurrent.futures.as_completed(futures)
+
+            for future in completed:
+                try:
+                    result = future.result()
+                except Exception as ex:
+                    result = ex
+
+                yield futures[future], result
+        finally:
+            # Do not process the remaining items if we stopped early
+            for future in futures:
+                future.cancel()
+
+
 # NOTE: Function is tested via script tests
 def read_files(program_name, paths, processor, args):  # pragma: no cover
-    """Read files from some paths and apply a processor function to each."""
+    """Read files from some paths and apply a processor function to each.
+
+    If args.jobs is greater than one, the files are processed in parallel by
+    that many worker processes. Errors are then reported for each offending
+    file without stopping the other files from being processed and we exit
+    once all files have been processed.
+
+    """
     results = []
+    jobs = getattr(args, 'jobs', 1)
 
     try:
         if not paths:
             # Read from sys.stdin
             results.extend(processor(sys.stdin, args))
+        elif jobs > 1:
+            filenames = iter_files(paths, '*.bib', args.recursive)
+            failed = False
+
+            for filename, result in parallel_map(
+                functools.partial(processor, args=args),
+                filenames,
+                jobs
+            ):
+                if isinstance(result, Exception):
+                    sys.stderr.write('{0}: {1}: {2}\n'.format(
+                        program_name,
+                        filename,
+                        result
+                    ))
+                    failed = True
+                else:
+                    results.extend(result)
+
+            if failed:
+                sys.exit(1)
         else:
             for filename in iter_files(paths, '*.bib', args.recursive):
                 # NOTE: Use scanFile if it ever gets into pyparsing to lazily
@@ -68,6 +153,41 @@ def read_files(program_name, paths, processor, args):  # pragma: no cover
         sys.exit(1)
 
 
+def add_jobs_argument(parser):
+    """Add the -j/--jobs option to an argument parser of a tool."""
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=1,
+        help='Read files in parallel using this many processes'
+    )
+
+
+def add_cache_arguments(parser):
+    """Add the --cache and --cache-size options to an argument parser."""
+    parser.add_argument(
+        '--cache',
+        metavar='DIR',
+        help='Cache parsed files in a directory and reuse the results if the '
+             'files have not changed'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=256,
+        metavar='MB',
+        help='Maximum size of the cache in megabytes (default: 256)'
+    )
+
+
+def make_cache(args):
+    """Return the parse cache requested on the command line or None."""
+    if not getattr(args, 'cache', None):
+        return None
+
+    return bibpy.cache.ParseCache(args.cache, args.cache_size * 1024 * 1024)
+
+
 def close_output_handles():
     """Ensure we close stdout and stderr when piping."""
     sys.stdout.close()
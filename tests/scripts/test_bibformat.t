@@ -225,3 +225,25 @@ Test wrong option
     $ bibformat --idonotexist=nope $TESTDIR/../data/small1.bib
     bibformat: [Errno 2] No such file or directory: '--idonotexist=nope'
     [1]
+
+Test reading files in parallel
+
+    $ bibformat --jobs=2 --order=true $TESTDIR/../data/simple_1.bib $TESTDIR/../data/simple_1.bib | grep -c '^@'
+    4
+
+Test writing entries as they appear in the input
+
+    $ printf '@Book{key2, Title = "Title"}\n\n@article{ key1 ,\n  title={A   title}}\n' > raw.bib
+    $ bibformat --raw raw.bib
+    @Book{key2, Title = "Title"}
+    
+    @article{ key1 ,
+      title={A   title}}
+    $ bibformat --raw --group raw.bib
+    @article{ key1 ,
+      title={A   title}}
+    
+    @Book{key2, Title = "Title"}
+    $ bibformat --raw --expand-string-vars raw.bib
+    bibformat: --raw cannot be used with --cache or options that change entries
+    [1]
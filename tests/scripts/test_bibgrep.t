@@ -223,3 +223,107 @@ Test wrong option
     $ bibgrep --idonotexist=nope $TESTDIR/../data/small1.bib
     bibgrep: [Errno 2] No such file or directory: '--idonotexist=nope'
     [1]
+
+Test reading files in parallel
+
+    $ bibgrep --jobs=2 --count --abbreviate-filenames $TESTDIR/../data/small1.bib $TESTDIR/../data/simple_1.bib
+    small1.bib:4
+    simple_1.bib:2
+
+    $ printf '@article{key, title = {Title}\n' > broken.bib
+    $ bibgrep -j 2 --count --no-filenames broken.bib $TESTDIR/../data/small1.bib
+    bibgrep: broken.bib: got unexpected end of input, expected: some(...)
+    [1]
+
+Test exact matches ignoring case on entries without the field
+
+    $ bibgrep --count --abbreviate-filenames --ignore-case --field="volume=14" $TESTDIR/../data/small1.bib
+    small1.bib:1
+
+Test invalid regular expressions
+
+    $ bibgrep --field="title~[a" $TESTDIR/../data/small1.bib
+    Invalid regular expression '[a': * (glob)
+    [1]
+
+Test streaming entries as files are read
+
+    $ printf '@article{first, title = {Title}}\n@book{second, title = {Title}\n' > streamed.bib
+    $ bibgrep --entry="article" streamed.bib
+    @article{first,
+        title = {Title}
+    }
+    $ bibgrep --count --entry="article" streamed.bib
+    streamed.bib:1
+    $ bibgrep --entry="book" streamed.bib
+    bibgrep: got unexpected end of input, expected: some(...)
+    [1]
+    $ bibgrep --field="title=Title" streamed.bib
+    @article{first,
+        title = {Title}
+    }
+    bibgrep: got unexpected end of input, expected: some(...)
+    [1]
+
+Test printing entries as they appear in the input
+
+    $ printf '@Book{key2, Title = "Title"}\n\n@article{ key1 ,\n  title={A   title}, year = 2000}\n' > raw.bib
+    $ bibgrep --raw --entry="article" raw.bib
+    @article{ key1 ,
+      title={A   title}, year = 2000}
+    $ bibgrep --raw --field="title~Title" raw.bib
+    @Book{key2, Title = "Title"}
+    $ bibgrep --raw --count --field="year=2000" raw.bib
+    raw.bib:1
+    $ bibgrep --raw --jobs=2 raw.bib
+    bibgrep: --raw cannot be used with --index, --cache or --jobs
+    [1]
+
+Test caching parsed files
+
+    $ cp $TESTDIR/../data/small1.bib cached.bib
+    $ bibgrep --cache=cache --count cached.bib
+    cached.bib:4
+    $ ls cache | wc -l | tr -d ' '
+    1
+    $ bibgrep --cache=cache --count cached.bib
+    cached.bib:4
+    $ printf '@article{key, title = {Title}}\n' > cached.bib
+    $ bibgrep --cache=cache --count cached.bib
+    cached.bib:1
+
+Test searching a search index
+
+    $ cp $TESTDIR/../data/small1.bib indexed.bib
+    $ bibgrep --build-index index indexed.bib
+    $ bibgrep --index index --count --field="journal~logic"
+    indexed.bib:0
+    $ bibgrep --index index --count --ignore-case --field="journal~logic"
+    indexed.bib:1
+    $ bibgrep --index index --count --entry="book" --key="~Co"
+    indexed.bib:2
+    $ bibgrep --index index --field="year=2000" --no-filenames --count
+    4
+    $ bibgrep --index index --key="Meyer2000"
+    @article{Meyer2000,
+        author  = {Bernd Meyer},
+        title   = {A constraint-based framework for diagrammatic reasoning},
+        journal = {Applied Artificial Intelligence},
+        volume  = {14},
+        issue   = {4},
+        pages   = {327--344},
+        year    = {2000}
+    }
+    $ bibgrep --index index --count --field="volume=10-20"
+    indexed.bib:1
+    $ bibgrep --index index --count --field="300<pages<=400"
+    indexed.bib:2
+    $ bibgrep --count --field="300<pages<=400" indexed.bib
+    indexed.bib:2
+    $ bibgrep --index index indexed.bib
+    bibgrep: Files cannot be given with --index
+    [1]
+    $ printf '@article{key, title = {Title}}\n' > indexed.bib
+    $ bibgrep --index index --count
+    bibgrep: Index 'index' is out of date ('indexed.bib' has changed), rebuild it with --build-index
+    [1]
@@ -71,3 +71,13 @@ Test wrong option
     $ bibstats --idonotexist=nope $TESTDIR/../data/small1.bib
     bibstats: [Errno 2] No such file or directory: '--idonotexist=nope'
     [1]
+
+Test reading files in parallel
+
+    $ bibstats --jobs=2 --count $TESTDIR/../data/small1.bib $TESTDIR/../data/simple_1.bib
+    6
+
+    $ printf '@article{key, title = {Title}\n' > broken.bib
+    $ bibstats -j 2 --count broken.bib $TESTDIR/../data/small1.bib
+    bibstats: broken.bib: got unexpected end of input, expected: some(...)
+    [1]
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Test saving and loading entries as binary snapshots."""
+
+import bibpy
+import bibpy.binary
+import bibpy.error
+from bibpy.date import DateRange
+from bibpy.entry import Entry
+from bibpy.name import Name
+import glob
+import io
+import pytest
+
+
+def round_trip(entries):
+    fh = io.BytesIO()
+    bibpy.binary.dump(entries, fh)
+    fh.seek(0)
+
+    return bibpy.binary.load(fh)
+
+
+def assert_same_entries(entries, loaded):
+    for expected, result in zip(entries.all, loaded.all):
+        assert result == expected
+
+    # The order of fields is kept
+    assert [entry.fields for entry in loaded.entries] ==\
+        [entry.fields for entry in entries.entries]
+
+
+@pytest.mark.parametrize('path', sorted(glob.glob('tests/data/*.bib')))
+@pytest.mark.parametrize('options', [
+    {},
+    {'ignore_comments': False},
+    {'postprocess': True, 'split_names': True},
+])
+def test_binary_round_trip(path, options):
+    encoding = 'latin1' if 'iso-8859-1' in path else 'utf-8'
+
+    try:
+        entries = bibpy.read_file(path, encoding=encoding, **options)
+    except (bibpy.error.LexerException, bibpy.error.ParseException):
+        pytest.skip('Invalid data file')
+
+    assert_same_entries(entries, round_trip(entries))
+
+
+def test_binary_values():
+    entry = Entry('article', 'key')
+    entry.author = [Name('Jean', 'de la', 'Fontaine', 'Jr.'), 'B']
+    entry.pages = (1, 10)
+    entry.date = DateRange((2000, 1), (None,), True)
+    entry.year = 2 ** 70
+    entry.custom = {'a': 1, 2: [None, True, 0.5, -2 ** 70]}
+    entry.title = 'Null\x00character'
+    entries = bibpy.entries.Entries([entry], [], [], [], ['comment'])
+    loaded = round_trip(entries)
+
+    assert_same_entries(entries, loaded)
+    assert loaded.entries[0].author[0].last == 'Fontaine'
+    assert loaded.entries[0].pages == (1, 10)
+    assert loaded.entries[0].custom == {'a': 1, 2: [None, True, 0.5, -2 ** 70]}
+    assert loaded.entries[0].custom[2][1] is True
+
+    # Only values of known types can be stored so that loading a snapshot
+    # never runs any code
+    entry.custom = object()
+
+    with pytest.raises(ValueError):
+        round_trip(entries)
+
+    # Loaded entries behave like any other entry
+    loaded.entries[0].title = None
+    assert 'title' not in loaded.entries[0].fields
+
+
+def test_binary_empty_fields():
+    entries = bibpy.read_string(
+        '@misc{k, opteditor = {}, title = {}, note = {x}}'
+    )
+    entries.entries[0].custom = None
+    loaded = round_trip(entries)
+    entry = loaded.entries[0]
+
+    assert_same_entries(entries, loaded)
+    assert entry.fields == ['note']
+    assert entry.opteditor == ''
+    assert entry.title == ''
+    assert entry.custom is None
+
+    entry.opteditor = 'Editor'
+    assert entry.fields == ['note', 'opteditor']
+
+
+def test_binary_files(tmpdir):
+    path = str(tmpdir.join('entries.bin'))
+    entries = bibpy.read_file('tests/data/graphs.bib')
+    bibpy.dump_binary(entries, path)
+
+    assert_same_entries(entries, bibpy.load_binary(path))
+
+    with open(path, 'rb') as fh:
+        data = fh.read()
+
+    with pytest.raises(ValueError):
+        bibpy.load_binary(io.BytesIO(b'@article{key,}'))
+
+    with pytest.raises(ValueError):
+        bibpy.load_binary(io.BytesIO(data[:len(data) // 2]))
+
+    with pytest.raises(ValueError):
+        bibpy.load_binary(io.BytesIO(data[:8] + b'\xff' + data[9:]))
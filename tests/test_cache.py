@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""Test the on-disk cache of parsed files."""
+
+import bibpy
+from bibpy.cache import ParseCache
+import bibpy.parser
+import os
+import pickle
+import pytest
+
+
+class _Unpickled:
+    """Creates a directory when it is unpickled."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (os.mkdir, (self.path,))
+
+
+@pytest.fixture
+def bib_file(tmpdir):
+    path = str(tmpdir.join('test.bib'))
+
+    with open(path, 'w') as fh:
+        fh.write('@article{a, year = {2000}}\n@article{b, year = {2001}}\n')
+
+    return path
+
+
+def test_cache_hit(tmpdir, bib_file):
+    cache = ParseCache(str(tmpdir.join('cache')))
+    entries = bibpy.read_file(bib_file, postprocess=True, cache=cache)
+    cached = bibpy.read_file(bib_file, postprocess=True, cache=cache)
+
+    assert list(cached) == list(entries)
+    assert cached.entries[0].year == 2000
+    assert cache.get(bib_file, {'key': 'value'}) is None
+
+    # A different set of options is cached separately
+    assert bibpy.read_file(bib_file, cache=cache).entries[0].year == '2000'
+    assert len(os.listdir(cache.directory)) == 2
+
+
+def test_cache_invalidation(tmpdir, bib_file):
+    directory = str(tmpdir.join('cache'))
+    bibpy.read_file(bib_file, cache=directory)
+
+    with open(bib_file, 'w') as fh:
+        fh.write('@article{c,}\n')
+
+    entries = bibpy.read_file(bib_file, cache=directory)
+
+    assert [entry.bibkey for entry in entries.entries] == ['c']
+
+    # Touching the file without changing it keeps the cached results
+    options = {'format': 'relaxed'}
+    cache = ParseCache(directory)
+    cache.put(bib_file, options, entries)
+    os.utime(bib_file, (0, 0))
+
+    assert cache.get(bib_file, options) is not None
+
+    # Corrupted cache files are ignored
+    with open(cache.cache_path(bib_file, options), 'wb') as fh:
+        fh.write(b'garbage')
+
+    assert cache.get(bib_file, options) is None
+
+    # Cache files are never unpickled
+    marker = str(tmpdir.join('unpickled'))
+
+    with open(cache.cache_path(bib_file, options), 'wb') as fh:
+        fh.write(pickle.dumps(_Unpickled(marker)))
+
+    assert cache.get(bib_file, options) is None
+    assert not os.path.exists(marker)
+
+    with pytest.raises(IOError):
+        bibpy.read_file(str(tmpdir.join('missing.bib')), cache=cache)
+
+
+def test_cache_file_changed_while_parsing(tmpdir, bib_file, monkeypatch):
+    directory = str(tmpdir.join('cache'))
+    parse_file = bibpy.parser.parse_file
+
+    def parse_and_change(*args, **kwargs):
+        with open(bib_file, 'w') as fh:
+            fh.write('@article{changed,}\n')
+
+        return parse_file(*args, **kwargs)
+
+    monkeypatch.setattr(bibpy.parser, 'parse_file', parse_and_change)
+    entries = bibpy.read_file(bib_file, cache=directory)
+    monkeypatch.undo()
+
+    assert [entry.bibkey for entry in entries.entries] == ['a', 'b']
+
+    # The results are stored with the contents that were parsed so the
+    # changed file is not served from the cache
+    entries = bibpy.read_file(bib_file, cache=directory)
+
+    assert [entry.bibkey for entry in entries.entries] == ['changed']
+
+
+def test_cache_eviction(tmpdir, bib_file):
+    cache = ParseCache(str(tmpdir.join('cache')), max_size=0)
+    bibpy.read_file(bib_file, cache=cache)
+
+    assert os.listdir(cache.directory) == []
+
+    cache = ParseCache(cache.directory)
+
+    for format in ('bibtex', 'relaxed'):
+        cache.put(bib_file, {'format': format}, bibpy.read_file(bib_file))
+
+    assert len(os.listdir(cache.directory)) == 2
+
+    # Only the least recently used file is removed when the cache is full
+    size = os.path.getsize(cache.cache_path(bib_file, {'format': 'bibtex'}))
+    os.utime(cache.cache_path(bib_file, {'format': 'relaxed'}), (0, 0))
+    cache = ParseCache(cache.directory, max_size=size * 2)
+    cache.put(bib_file, {'format': 'mixed'}, bibpy.read_file(bib_file))
+
+    assert cache.get(bib_file, {'format': 'relaxed'}) is None
+    assert cache.get(bib_file, {'format': 'bibtex'}) is not None
+    assert cache.get(bib_file, {'format': 'mixed'}) is not None
+
+    cache.clear()
+
+    assert os.listdir(cache.directory) == []
+
+    with pytest.raises(ValueError):
+        ParseCache(cache.directory, max_size=-1)
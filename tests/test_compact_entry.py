@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""Test the compact entry class."""
+
+import bibpy
+from bibpy.entry import CompactEntry, Entry
+from bibpy.entry.compact import FieldLayout
+import copy
+import gc
+import pickle
+import pytest
+
+
+@pytest.fixture
+def test_entries():
+    return bibpy.read_file('tests/data/graphs.bib', postprocess=True).entries
+
+
+def test_compact_entries(test_entries):
+    compact = [CompactEntry.fromentry(entry) for entry in test_entries]
+
+    assert compact == test_entries
+    assert test_entries == compact
+    assert [entry.fields for entry in compact] ==\
+        [entry.fields for entry in test_entries]
+    assert [entry.format() for entry in compact] ==\
+        [entry.format() for entry in test_entries]
+    assert [list(entry) for entry in compact] ==\
+        [list(entry) for entry in test_entries]
+    assert pickle.loads(pickle.dumps(compact)) == compact
+    assert copy.deepcopy(compact) == compact
+
+
+@pytest.mark.parametrize('entry_class', [Entry, CompactEntry])
+def test_compact_entry_fields(entry_class):
+    entry = entry_class('article', 'key', [('author', 'A'), ('title', 'T')])
+
+    assert entry.fields == ['author', 'title']
+    assert entry.values() == ['A', 'T']
+    assert len(entry) == 2
+
+    entry.title = None
+    entry.year = 2000
+    entry['custom'] = 'Custom'
+
+    assert entry.fields == ['author', 'year', 'custom']
+    assert entry.title is None
+    assert entry['custom'] == entry.custom == 'Custom'
+    assert 'custom' in entry.extra_fields
+
+    del entry['custom']
+
+    assert entry.custom is None
+    assert entry.fields == ['author', 'year']
+
+    with pytest.raises(AttributeError):
+        entry.never_set
+
+    entry._private = 'Private'
+    entry.bibtype = 'book'
+
+    assert entry._private == 'Private'
+    assert entry.bibtype == 'book'
+    assert entry.fields == ['author', 'year']
+
+    entry.clear()
+
+    assert entry.fields == []
+
+
+def test_compact_entry_layouts():
+    a = CompactEntry('article', 'a', [('author', 'A'), ('title', 'T')])
+    b = CompactEntry('book', 'b', author='B')
+    b.title = 'Title'
+
+    # Entries with the same fields in the same order share a layout
+    assert a._layout is b._layout
+    assert a._layout is FieldLayout.get(['author', 'title'])
+    assert repr(a) == 'CompactEntry(type=article, key=a)'
+
+
+def test_compact_entry_memory():
+    entry = CompactEntry('article', 'a', author='A')
+    entry._private = 'Private'
+
+    assert not hasattr(entry, '__dict__')
+    assert entry._private == 'Private'
+
+    with pytest.raises(AttributeError):
+        entry._never_set
+
+    # Layouts are freed once no entry uses them anymore
+    fields = ('unused_field1', 'unused_field2')
+    entry = CompactEntry('article', 'a', [(field, 'x') for field in fields])
+
+    assert fields in FieldLayout._layouts
+    assert fields[:1] in FieldLayout._layouts
+
+    del entry
+    gc.collect()
+
+    assert fields not in FieldLayout._layouts
+    assert fields[:1] not in FieldLayout._layouts
@@ -197,3 +197,25 @@ def test_uninheritance_no_override_with_exceptions(test_entries):
     assert entry1.author == 'Author'
     assert entry1.booktitle == 'Booktitle'
     assert entry1.booksubtitle == 'Booksubtitle'
+
+
+def test_inheritance_with_entries_object(test_entries):
+    entries = bibpy.entries.Entries(list(test_entries))
+    bibpy.inherit_crossrefs(entries, inherit=True, override=False)
+
+    entry1 = test_entries[0]
+    assert entry1.booktitle == 'Booktitle'
+    assert entry1.booksubtitle == 'Booksubtitle'
+
+
+def test_inheritance_duplicate_keys(test_entries):
+    entry1, entry2 = test_entries
+    duplicate = bibpy.entry.Entry('book', 'key2', title='Duplicate')
+
+    # The last entry with a duplicate key is the source like for a list
+    for entries in ([entry2, duplicate, entry1],
+                    bibpy.entries.Entries([entry2, duplicate, entry1])):
+        entry1.booktitle = None
+        bibpy.inherit_crossrefs(entries, inherit=True, override=False)
+
+        assert entry1.booktitle == 'Duplicate'
@@ -3,7 +3,9 @@
 """Test the bibpy.date.DateRange class."""
 
 from bibpy.date import DateRange, PartialDate
-from bibpy.error import ParseException
+import bibpy.parser
+from bibpy.error import LexerException, ParseException
+import pickle
 import pytest
 
 
@@ -83,3 +85,61 @@ def test_properties():
     assert date1 != date3
     assert date1 != "abc"
     assert not date1 == map
+
+
+def test_ordering_and_hashing():
+    ranges = [DateRange.fromstring('2017-01-05'),
+              DateRange.fromstring('2016-12-30/2017-01-02'),
+              DateRange.fromstring('2016-12-30'),
+              DateRange.fromstring('2016-12-30/')]
+
+    assert [str(d) for d in sorted(ranges)] ==\
+        ['2016-12-30', '2016-12-30/', '2016-12-30/2017-01-02', '2017-01-05']
+    assert DateRange.fromstring('2016') < DateRange.fromstring('2016-01')
+    assert hash(DateRange.fromstring('2016-12-30/')) ==\
+        hash(DateRange.fromstring('2016-12-30/'))
+    assert len({DateRange.fromstring('2016'),
+                DateRange.fromstring('2016')}) == 1
+
+
+def test_immutable_and_interned():
+    date = DateRange.fromstring('2016-12-30/2017-01-02')
+
+    with pytest.raises(AttributeError):
+        date.open = True
+
+    assert pickle.loads(pickle.dumps(date)) == date
+
+    interned = date.intern()
+    assert DateRange.fromstring('2016-12-30/2017-01-02').intern() is interned
+    assert DateRange.fromstring('2016-12-30').intern() is not interned
+
+
+@pytest.mark.parametrize('string', [
+    '2017', '2017-05', '2017-05-06', '2017/', '2017-05-06/', '2017/2018',
+    '2017-05/2018-01-02', '0000-00-00', '', '17', '2017-5', '2017\n',
+    '2017 ', '2017//', '2017/2018/', '/2017', '2017-05-06-07', '2017-13',
+    '2017-01-32/', '2017/2018-13'
+])
+def test_fromstring_matches_grammar(string):
+    def parse(parse_date):
+        try:
+            date = parse_date(string)
+        except (LexerException, ParseException, ValueError) as ex:
+            return type(ex), str(ex)
+
+        return date.start, date.end, date.open
+
+    assert parse(bibpy.parser._parse_date) ==\
+        parse(bibpy.parser._parse_date_grammar)
+
+
+def test_date_cache():
+    bibpy.parser.date_cache.cache_clear()
+
+    assert DateRange.fromstring('2016-12-30/') is\
+        DateRange.fromstring('2016-12-30/')
+    assert bibpy.parser.date_cache.cache_info().hits == 1
+
+    with pytest.raises(ParseException):
+        DateRange.fromstring('2016-12-30//')
@@ -4,8 +4,15 @@
 
 import bibpy
 import bibpy.doi
+from bibpy.doi.cache import DOICache, normalise_doi
+import http.server
 import os
+import pickle
 import pytest
+import socketserver
+import threading
+import time
+import urllib.error
 import vcr
 
 
@@ -15,6 +22,271 @@ skip_on_travis = pytest.mark.skipif(
 )
 
 
+_BIBTEX = '@article{{{0}, title = {{Title of {0}}}, year = {{2004}}}}'
+
+
+class _Unpickled:
+    """Creates a directory when it is unpickled."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (os.mkdir, (self.path,))
+
+
+class _DOIServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+class _DOIHandler(http.server.BaseHTTPRequestHandler):
+    """Serves bibtex for paths like /<doi> with special dois for errors."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        doi = self.path.lstrip('/')
+
+        with server.lock:
+            server.requests.append((self.client_address, doi))
+            server.attempts[doi] = server.attempts.get(doi, 0) + 1
+            attempts = server.attempts[doi]
+
+        if doi.startswith('missing'):
+            self.respond(404)
+        elif doi.startswith('flaky') and attempts <= 2:
+            self.respond(503)
+        elif doi.startswith('throttled') and attempts == 1:
+            self.respond(429, headers={'Retry-After': '5'})
+        elif doi.startswith('moved'):
+            self.respond(303, headers={'Location': '/' + doi[len('moved'):]})
+        elif self.headers['accept'] != 'application/x-bibtex':
+            self.respond(406)
+        else:
+            self.respond(200, _BIBTEX.format(doi).encode('utf-8'))
+
+    def respond(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def doi_server():
+    server = _DOIServer(('127.0.0.1', 0), _DOIHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.attempts = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server, 'http://127.0.0.1:{0}/{{0}}'.format(server.server_address[1])
+
+    server.shutdown()
+    server.server_close()
+
+
+def test_retrieve_many(doi_server):
+    server, source = doi_server
+    dois = ['doi{0}'.format(i) for i in range(50)]
+
+    results = list(bibpy.doi.retrieve_many(dois, source, concurrency=4))
+
+    assert [doi for doi, _ in results] == dois
+
+    for doi, entry in results:
+        assert entry.bibkey == doi
+        assert entry.title == 'Title of ' + doi
+
+    # Connections are kept alive and reused by each thread
+    assert len(set(address for address, _ in server.requests)) <= 4
+
+
+def test_retrieve_many_options(doi_server):
+    _, source = doi_server
+    dois = ['doi1', 'moveddoi2']
+
+    results = dict(bibpy.doi.retrieve_many(dois, source, ordered=False,
+                                           postprocess=True))
+
+    assert results['doi1'].year == 2004
+    assert results['moveddoi2'].bibkey == 'doi2'
+
+    results = dict(bibpy.doi.retrieve_many(dois, source, raw=True))
+
+    assert results['doi1'] == _BIBTEX.format('doi1').encode('utf-8')
+
+
+def test_retrieve_many_errors(doi_server):
+    server, source = doi_server
+    dois = ['doi1', 'missing', 'flaky', 'doi2']
+
+    results = list(bibpy.doi.retrieve_many(dois, source, concurrency=2,
+                                           backoff=0.01,
+                                           return_exceptions=True))
+
+    assert [doi for doi, _ in results] == dois
+    assert results[0][1].bibkey == 'doi1'
+    assert isinstance(results[1][1], urllib.error.HTTPError)
+    assert results[1][1].code == 404
+    assert results[2][1].bibkey == 'flaky'
+    assert results[3][1].bibkey == 'doi2'
+
+    # Missing dois are not retried but temporary errors are
+    assert server.attempts['missing'] == 1
+    assert server.attempts['flaky'] == 3
+
+    with pytest.raises(urllib.error.HTTPError):
+        list(bibpy.doi.retrieve_many(['missing'], source))
+
+    results = dict(bibpy.doi.retrieve_many(['flaky2'], source, retries=1,
+                                           backoff=0, return_exceptions=True))
+
+    assert results['flaky2'].code == 503
+
+    # Waits requested by the server are capped
+    start = time.monotonic()
+    results = dict(bibpy.doi.retrieve_many(['throttled'], source,
+                                           max_backoff=0.01))
+
+    assert results['throttled'].bibkey == 'throttled'
+    assert time.monotonic() - start < 5
+
+    with pytest.raises(ValueError):
+        list(bibpy.doi.retrieve_many(dois, source, concurrency=0))
+
+
+def test_normalise_doi():
+    doi = '10.1145/1015530.1015557'
+
+    assert normalise_doi(doi) == doi
+    assert normalise_doi(' DOI:10.1145/ABC ') == '10.1145/abc'
+    assert normalise_doi('https://doi.org/' + doi) == doi
+    assert normalise_doi('http://dx.doi.org/' + doi) == doi
+
+
+def test_retrieve_cache(tmpdir, doi_server):
+    server, source = doi_server
+    directory = str(tmpdir.join('cache'))
+
+    entry = bibpy.doi.retrieve('doi1', source, cache=directory)
+    cached = bibpy.doi.retrieve('DOI1', source, cache=directory,
+                                postprocess=True)
+
+    assert cached.bibkey == entry.bibkey == 'doi1'
+    assert cached.year == 2004
+    assert server.attempts == {'doi1': 1}
+
+    # Only cached dois can be retrieved in offline mode
+    assert bibpy.doi.retrieve('doi1', source, cache=directory,
+                              offline=True).bibkey == 'doi1'
+
+    # Responses are cached separately for each source
+    with pytest.raises(KeyError):
+        bibpy.doi.retrieve('doi1', cache=directory, offline=True)
+
+    other_source = source.replace('{0}', 'moved{0}')
+    bibpy.doi.retrieve('doi1', other_source, cache=directory)
+
+    assert server.attempts == {'doi1': 2, 'moveddoi1': 1}
+
+    with pytest.raises(KeyError):
+        bibpy.doi.retrieve('doi2', source, cache=directory, offline=True)
+
+    with pytest.raises(ValueError):
+        bibpy.doi.retrieve('doi1', source, offline=True)
+
+    # Errors are not cached
+    with pytest.raises(urllib.error.HTTPError):
+        bibpy.doi.retrieve('missing', source, cache=directory)
+
+    assert len(os.listdir(directory)) == 2
+
+
+def test_retrieve_many_cache(tmpdir, doi_server):
+    server, source = doi_server
+    cache = DOICache(str(tmpdir.join('cache')))
+    dois = ['doi{0}'.format(i) for i in range(10)]
+
+    list(bibpy.doi.retrieve_many(dois[:5], source, cache=cache))
+    results = list(bibpy.doi.retrieve_many(dois, source, cache=cache,
+                                           offline=True,
+                                           return_exceptions=True))
+
+    assert [entry.bibkey for _, entry in results[:5]] == dois[:5]
+    assert all(isinstance(result, KeyError) for _, result in results[5:])
+
+    list(bibpy.doi.retrieve_many(dois, source, cache=cache))
+
+    assert len(server.requests) == 10
+
+
+def test_doi_cache_expiry(tmpdir):
+    cache = DOICache(str(tmpdir.join('cache')), ttl=60)
+    cache.put('doi1', b'@article{doi1,}')
+
+    assert cache.get('doi:DOI1') == b'@article{doi1,}'
+
+    # Pretend that the response was retrieved two minutes ago
+    cache.ttl = 0
+    assert cache.get('doi1') is None
+    assert cache.get('doi1', expired=True) == b'@article{doi1,}'
+
+    with open(cache.cache_path('doi1'), 'wb') as fh:
+        fh.write(b'garbage')
+
+    assert cache.get('doi1', expired=True) is None
+
+    # Cache files are never unpickled
+    marker = str(tmpdir.join('unpickled'))
+
+    with open(cache.cache_path('doi1'), 'wb') as fh:
+        fh.write(pickle.dumps(_Unpickled(marker)))
+
+    cache.get('doi1', expired=True)
+    assert not os.path.exists(marker)
+
+    with pytest.raises(ValueError):
+        DOICache(str(tmpdir.join('cache')), ttl=-1)
+
+    with pytest.raises(ValueError):
+        DOICache(str(tmpdir.join('cache')), max_size=-1)
+
+
+def test_doi_cache_eviction(tmpdir):
+    cache = DOICache(str(tmpdir.join('cache')), max_size=0)
+    cache.put('doi1', b'@article{doi1,}')
+
+    assert cache.get('doi1') is None
+
+    cache.max_size = 1024
+
+    for i in range(3):
+        cache.put('doi{0}'.format(i), b'@article{x,}')
+        os.utime(cache.cache_path('doi{0}'.format(i)), (i, i))
+
+    cache.get('doi0')
+    cache.max_size = 2 * os.path.getsize(cache.cache_path('doi0'))
+    cache.evict()
+
+    # The least recently used response is evicted
+    assert cache.get('doi1') is None
+    assert cache.get('doi0') is not None
+    assert cache.get('doi2') is not None
+
+    cache.clear()
+    assert os.listdir(cache.directory) == []
+
+
 @skip_on_travis
 def test_doi():
     with vcr.use_cassette('fixtures/vcr_cassettes/doi.yaml'):
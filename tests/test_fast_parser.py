@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""Test that the fast parser produces the same results as funcparserlib."""
+
+import bibpy
+import bibpy.error
+import bibpy.fast_parser
+import bibpy.lexers
+import glob
+import pytest
+
+_FORMATS = ('bibtex', 'biblatex', 'mixed', 'relaxed')
+
+
+def parse_with(parser, source, format):
+    """Parse a source with a parser and return the results or the error."""
+    try:
+        return list(bibpy.read_string(
+            source,
+            format,
+            ignore_comments=False,
+            parser=parser
+        ))
+    except bibpy.error.ParseException:
+        return bibpy.error.ParseException
+
+
+def assert_same_results(source):
+    for format in _FORMATS:
+        assert parse_with('fast', source, format) ==\
+            parse_with('funcparserlib', source, format)
+
+
+@pytest.mark.parametrize('path', sorted(glob.glob('tests/data/*.bib')))
+def test_data_files(path):
+    encoding = 'latin1' if 'iso-8859-1' in path else 'utf-8'
+
+    with open(path, encoding=encoding) as fh:
+        assert_same_results(fh.read())
+
+
+@pytest.mark.parametrize('source', [
+    '@string{key, title = {Title}}',
+    '@string(var = "a" # b)',
+    '@comment(Text (in parentheses))',
+    '@article{key, title = "a" # b # "c"}',
+    '@article{key, title = {}, }',
+    '@article{key, year = 2000 # "x"}',
+    '@article{key, title = "a" # }',
+    '@article{key, , }',
+    '@article{key}',
+    '@article(key, title = {Title})',
+    '@article{key, title = {x} author = {y}}',
+    '@article{key, foo = {x}}',
+    '@online{key, url = {x}}',
+    '@article{key, title = {x}, title = {y}}',
+])
+def test_edge_cases(source):
+    assert_same_results(source)
+
+
+def test_fast_parser_errors():
+    # Errors are reported like funcparserlib without the expected tokens
+    for source, message in [
+        ('@article{key}', "1,12-1,13: got unexpected token: '}'"),
+        ('@article{key,\n journaltitle = {x}}',
+         "2,15-2,28: got unexpected token: 'journaltitle '"),
+    ]:
+        with pytest.raises(bibpy.error.ParseException) as exc_info:
+            bibpy.read_string(source, 'bibtex', parser='fast')
+
+        assert str(exc_info.value) == message
+
+        with pytest.raises(bibpy.error.ParseException) as exc_info:
+            bibpy.read_string(source, 'bibtex', parser='funcparserlib')
+
+        assert str(exc_info.value).startswith(message + ', expected: ')
+
+    with pytest.raises(bibpy.error.ParseException) as exc_info:
+        bibpy.read_string('@article{key, title = {x}', parser='fast')
+
+    assert str(exc_info.value) == 'got unexpected end of input'
+
+    with pytest.raises(KeyError):
+        bibpy.read_string('', 'gibberish', parser='fast')
+
+    with pytest.raises(ValueError):
+        bibpy.read_string('', parser='gibberish')
+
+
+def test_fast_parser_streaming():
+    path = 'tests/data/string_variables.bib'
+
+    assert list(bibpy.iter_file(path, parser='fast')) ==\
+        list(bibpy.iter_file(path, parser='funcparserlib'))
+
+
+def test_fast_parser_token_forms():
+    source = '@article{key, title = "a" # x, year = 2000}'
+    parser = bibpy.fast_parser.parser_from_format('relaxed')
+
+    assert parser.parse(list(bibpy.lexers.lex_bib(source))) ==\
+        parser.parse(list(bibpy.lexers.lex_bib(source, compact=True)))
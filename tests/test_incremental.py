@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+"""Test incremental reparsing of edited sources."""
+
+import bibpy
+import bibpy.error
+from bibpy.incremental import IncrementalReader
+from bibpy.lexers.base_lexer import LexerError
+import pytest
+
+
+@pytest.fixture
+def test_source():
+    with open('tests/data/string_variables.bib') as fh:
+        return fh.read()
+
+
+def read(source, parser):
+    return list(bibpy.read_string(source, ignore_comments=False,
+                                  parser=parser))
+
+
+@pytest.mark.parametrize('parser', ['fast', 'funcparserlib'])
+@pytest.mark.parametrize('old, new', [
+    ('', '@article{a, title = {x}}'),
+    ('@article{a, title = {x}}', ''),
+    ('@article{a, title = {x}}', '@article{a, title = {y}}'),
+    ('@article{a,}\n@article{b,}', '@article{a,}\n%\n@article{b,}'),
+    ('@article{a,}\n@article{b,}', '@article{a,}\n@article{b,}\ntext'),
+    ('@article{a,}\ntext', '@article{a,}\ntext\n@article{b,}'),
+    ('@article{a, title = {x}}\n@article{b,}',
+     '@article{a, title = {x\n@article{b,}}}'),
+    ('@article{a, title = {x\n@article{b,}}}',
+     '@article{a, title = {x}}\n@article{b,}'),
+    ('@comment{a}\n@string{b = "c"}', '@comment{a}\n@string{b = "d"}'),
+])
+def test_incremental_update(parser, old, new):
+    reader = IncrementalReader(old, ignore_comments=False, parser=parser)
+
+    assert list(reader.entries) == read(old, parser)
+    assert list(reader.update(new)) == read(new, parser)
+    assert reader.string == new
+
+
+@pytest.mark.parametrize('parser', ['fast', 'funcparserlib'])
+def test_incremental_edit(test_source, parser):
+    reader = IncrementalReader(test_source, parser=parser)
+    before = reader.entries.entries
+    start = test_source.index('Charles Xavier')
+
+    entries = reader.edit(start, start + len('Charles Xavier'), 'Jean Grey')
+    source = reader.string
+
+    assert source == test_source.replace('Charles Xavier', 'Jean Grey', 1)
+    assert list(entries) == list(bibpy.read_string(source, parser=parser))
+
+    # Only the edited entry is parsed again
+    changed = [a is not b for a, b in zip(before, entries.entries)]
+    assert sum(changed) == 1
+
+    with pytest.raises(ValueError):
+        reader.edit(10, 5, '')
+
+
+def test_incremental_items():
+    source = '@article{a, title = {x}}\n% Comment\n@article{b,}\n'
+    reader = IncrementalReader(source, ignore_comments=False)
+
+    assert [(source[start:end], getattr(result, 'bibkey', result))
+            for start, end, result in reader.items()] == [
+        ('@article{a, title = {x}}', 'a'),
+        ('\n% Comment\n', '\n% Comment\n'),
+        ('@article{b,}', 'b'),
+    ]
+
+
+def test_incremental_postprocess():
+    reader = IncrementalReader('@article{a, year = {2000}}', postprocess=True)
+    entries = reader.update('@article{a, year = {2001}}')
+
+    assert entries.entries[0].year == 2001
+
+
+def test_incremental_errors():
+    source = '@article{a,}\n\n@article{b,}\n'
+    reader = IncrementalReader(source)
+
+    with pytest.raises(LexerError) as exc_info:
+        reader.update(source.replace('@article{b', '@article!{b'))
+
+    assert exc_info.value.lnum == 3
+
+    with pytest.raises(bibpy.error.ParseException):
+        reader.update(source.replace('{b,}', '{b}'))
+
+    # The reader keeps its state after an error
+    assert reader.string == source
+    assert [e.bibkey for e in reader.entries.entries] == ['a', 'b']
+
+    with pytest.raises(KeyError):
+        IncrementalReader('', 'gibberish')
+
+    with pytest.raises(ValueError):
+        IncrementalReader('', parser='gibberish')
+
+    # Errors after another item on the same line are those of a full parse
+    source = '@article{a,}\n  @article{b,} @article{c,}\n'
+    broken = source.replace('@article{c', '@article!{c')
+    reader = IncrementalReader(source)
+
+    with pytest.raises(LexerError) as full_exc_info:
+        bibpy.read_string(broken)
+
+    for new in (broken, broken + '@article{d,}\n'):
+        with pytest.raises(LexerError) as exc_info:
+            reader.update(new)
+
+        assert str(exc_info.value) == str(full_exc_info.value)
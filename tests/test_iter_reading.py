@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""Test generating entries one at a time from strings and files."""
+
+import bibpy
+import bibpy.parser
+from bibpy.lexers.base_lexer import LexerError
+import io
+import pickle
+import pytest
+
+
+@pytest.fixture
+def test_source():
+    with open('tests/data/all_bibpy_entry_types.bib') as fh:
+        return fh.read()
+
+
+def test_iter_string(test_source):
+    results = list(bibpy.iter_string(test_source, ignore_comments=False))
+
+    assert [getattr(r, 'bibtype', None) for r in results] ==\
+        ['unpublished', 'comment', 'string', 'preamble', None]
+
+    assert list(bibpy.parser.make_entries(results)) ==\
+        list(bibpy.read_string(test_source, ignore_comments=False))
+
+
+def test_iter_string_is_lazy():
+    results = bibpy.iter_string('@article{key1,}\n\n@article!{key2,}')
+
+    assert next(results).bibkey == 'key1'
+
+    with pytest.raises(LexerError):
+        next(results)
+
+
+def test_iter_string_postprocess():
+    source = '@article{key, year = {2000}, author = {A {and} B and C}}'
+    entry = next(bibpy.iter_string(
+        source,
+        postprocess=True,
+        remove_braces=True
+    ))
+
+    assert entry.year == 2000
+    assert entry.author == ['A and B', 'C']
+
+
+@pytest.mark.parametrize('chunk_size', [1, 16, 65536])
+def test_iter_parse_file_chunks(chunk_size):
+    path = 'tests/data/biblatex_missing_requirements.bib'
+    expected = list(bibpy.read_file(path, ignore_comments=False))
+
+    with open(path) as fh:
+        results = bibpy.parser.iter_parse_file(
+            fh,
+            'relaxed',
+            ignore_comments=False,
+            chunk_size=chunk_size
+        )
+
+        assert list(bibpy.parser.make_entries(results)) == expected
+
+
+def test_iter_file():
+    path = 'tests/data/simple_1.bib'
+
+    assert list(bibpy.iter_file(path)) == list(bibpy.read_file(path))
+
+    with pytest.raises(IOError):
+        next(bibpy.iter_file(''))
+
+
+def test_iter_file_errors():
+    source = '@article{a, title = {x}}\n\n@article{b,\n}\n\n@article!{c,}\n'
+
+    for chunk_size in (1, 5, 100):
+        with pytest.raises(LexerError) as exc_info:
+            list(bibpy.parser.iter_parse_file(
+                io.StringIO(source),
+                'relaxed',
+                chunk_size=chunk_size
+            ))
+
+        assert exc_info.value.lnum == 6
+
+    with pytest.raises(bibpy.error.ParseException):
+        list(bibpy.iter_file(io.StringIO('@article{key, title = {x}')))
+
+
+@pytest.mark.parametrize('source', [
+    '@book{b, title={y}} @misc{c, title = "x',
+    '@book{a, title={z}}\n  @book{b, title={y}} @misc{c, title = "x\n\n',
+    '@book{a, title={z}}\n@book{b, title={y}}@misc!{c,}\n@misc{d,}',
+])
+def test_iter_file_errors_match_string_errors(source):
+    with pytest.raises(LexerError) as string_info:
+        bibpy.read_string(source)
+
+    with pytest.raises(LexerError) as file_info:
+        bibpy.read_file(io.StringIO(source))
+
+    assert str(file_info.value) == str(string_info.value)
+
+    for chunk_size in (1, 5, 100):
+        with pytest.raises(LexerError) as chunk_info:
+            list(bibpy.parser.iter_parse_file(
+                io.StringIO(source),
+                'relaxed',
+                chunk_size=chunk_size
+            ))
+
+        assert str(chunk_info.value) == str(string_info.value)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 16, 65536])
+def test_iter_parse_file_raw(chunk_size):
+    source = '% A comment\n@Article{ key1 ,\n  Title={Foo   Bar}}\n'\
+        '@string{ s = "x" }  @book{key2, title = "Baz"}\n'
+
+    results = list(bibpy.parser.iter_parse_file_raw(
+        io.StringIO(source),
+        'relaxed',
+        chunk_size=chunk_size
+    ))
+
+    assert [result.format() for result in results] == [
+        '@Article{ key1 ,\n  Title={Foo   Bar}}',
+        '@string{ s = "x" }',
+        '@book{key2, title = "Baz"}'
+    ]
+    assert results == list(bibpy.iter_string(source))
+    assert results[0].bibtype == 'article'
+    assert results[0].title == 'Foo   Bar'
+    assert results[2]['title'] == 'Baz'
+
+    with pytest.raises(AttributeError):
+        results[0].title = 'Other'
+
+
+def test_parse_file_raw():
+    path = 'tests/data/simple_1.bib'
+
+    with open(path) as fh:
+        results = bibpy.parser.parse_file_raw(fh, 'relaxed')
+
+    with open(path) as fh:
+        text = fh.read()
+
+    assert list(results) == list(bibpy.read_file(path))
+
+    for entry in results.entries:
+        assert entry.format(indent='  ') in text
+        assert pickle.loads(pickle.dumps(entry)).text == entry.text
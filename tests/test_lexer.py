@@ -2,7 +2,7 @@
 
 """Test the bib lexer."""
 
-from bibpy.lexers.base_lexer import LexerError
+from bibpy.lexers.base_lexer import CompactToken, LexerError
 from bibpy.lexers.biblexer import BibLexer
 import pytest
 
@@ -62,6 +62,42 @@ def test_lex_comment_entry(biblexer):
         ['entry', 'name', 'lparen', 'content', 'rparen']
 
 
+def test_lex_nested_content(biblexer):
+    body = 'text {nested {deeply}} (and parentheses) ' * 1000
+    tokens = list(biblexer.lex('@comment{' + body + '}'))
+
+    assert [token.value for token in tokens] ==\
+        ['@', 'comment', '{', body, '}']
+
+    tokens = list(biblexer.lex('@comment(' + body + ')'))
+    assert tokens[3].value == body
+
+    tokens = list(biblexer.lex('@string{var = {a {b} c}}'))
+
+    assert [token.value for token in tokens] ==\
+        ['@', 'string', '{', 'var ', '= ', '{', 'a {b} c', '}', '}']
+
+
+def test_lex_compact_tokens():
+    string = 'A comment\n@article{key,\n  title = {Some {title}},\n}'
+    tokens = list(BibLexer().lex(string, 2, 10))
+    compact_tokens = list(BibLexer(compact=True).lex(string, 2, 10))
+
+    assert all(isinstance(token, CompactToken) for token in compact_tokens)
+    assert compact_tokens == tokens
+    assert [token.value for token in compact_tokens] ==\
+        [token.value for token in tokens]
+
+    # Token positions are the same except where funcparserlib tokens include
+    # skipped text, e.g. the '@' after a comment
+    assert compact_tokens[0].start == (2, 10)
+    assert compact_tokens[0].end == (3, 20)
+    assert compact_tokens[1].start == (3, 20)
+    assert [token.start for token in compact_tokens[2:]] ==\
+        [token.start for token in tokens[2:]]
+    assert compact_tokens[-1].end == tokens[-1].end == (5, 61)
+
+
 def test_lex_with_comments(biblexer):
     string = """This is a comment
 @entry{
@@ -99,3 +135,9 @@ def test_lexer_fail(biblexer):
         biblexer.expect('entry')
 
     assert exc_info.value.args[0] == "Did not find expected token 'entry'"
+
+    with pytest.raises(LexerError):
+        list(biblexer.lex('@comment{unbalanced {braces}'))
+
+    with pytest.raises(LexerError):
+        list(biblexer.lex('@comment(unbalanced (parentheses)'))
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+
+"""Test bounded caches of function results."""
+
+from bibpy.memo import LRUCache
+import pytest
+
+
+def test_lru_cache():
+    calls = []
+
+    def square(x):
+        """Square a number."""
+        calls.append(x)
+        return x * x
+
+    cache = LRUCache(square, maxsize=2)
+
+    assert [cache(x) for x in (1, 2, 1, 3, 2)] == [1, 4, 1, 9, 4]
+    assert calls == [1, 2, 3, 2]
+    assert cache.cache_info()[:4] == (1, 4, 2, 2)
+    assert cache.__doc__ == 'Square a number.'
+    assert repr(cache) == 'LRUCache(square, maxsize=2)'
+
+    cache.resize(None)
+    assert cache.maxsize is None
+    assert cache.cache_info().currsize == 0
+
+    cache(1)
+    cache.cache_clear()
+    assert cache.cache_info()[:4] == (0, 0, None, 0)
+
+    with pytest.raises(ValueError):
+        cache.resize(-1)
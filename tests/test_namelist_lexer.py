@@ -25,5 +25,7 @@ def test_namelist_lexer():
     assert list(NamelistLexer().lex(test4)) ==\
         ['L. {Sunil Chandran} {and } C. R. Subramanian']
 
+    assert list(NamelistLexer().lex('A and B and {C}')) == ['A', 'B', '{C}']
+
     with pytest.raises(LexerError):
         list(NamelistLexer().lex('T. Ohtsuki and H. Mori and T. Kas}hiwabara'))
@@ -2,7 +2,10 @@
 
 """Test extraction of parts of names."""
 
+import bibpy.lexers
 import bibpy.name
+import bibpy.parser
+import pickle
 import pytest
 
 
@@ -320,3 +323,47 @@ def test_name_repr():
 
     assert repr(name2) ==\
         "Name(first=Archer, prefix=, last=Sterling, suffix=)"
+
+
+def test_name_cache():
+    bibpy.parser.set_name_cache_size(2)
+    name = 'Knuth, Donald E.'
+
+    try:
+        assert bibpy.parser.parse_name(name) is\
+            bibpy.parser.parse_name(name)
+
+        info = bibpy.parser.name_cache.cache_info()
+        assert (info.hits, info.misses, info.maxsize) == (1, 1, 2)
+
+        names = bibpy.lexers.lex_namelist('A and B')
+        names.append('C')
+        assert bibpy.lexers.lex_namelist('A and B') == ['A', 'B']
+        assert bibpy.lexers.namelist_cache.cache_info().hits == 1
+
+        bibpy.parser.set_name_cache_size(0)
+        assert bibpy.parser.parse_name(name) is not\
+            bibpy.parser.parse_name(name)
+        assert bibpy.parser.name_cache.cache_info().currsize == 0
+
+        with pytest.raises(ValueError):
+            bibpy.parser.set_name_cache_size(-1)
+    finally:
+        bibpy.parser.set_name_cache_size(4096)
+
+
+def test_hashing_and_immutability():
+    name = name_from_string('Donald E. Knuth')
+
+    assert hash(name) == hash(name_from_string('Knuth, Donald E.'))
+    assert {name: 1}[name_from_string('Knuth, Donald E.')] == 1
+    assert pickle.loads(pickle.dumps(name)) == name
+
+    with pytest.raises(AttributeError):
+        name.first = 'Don'
+
+    with pytest.raises(AttributeError):
+        name.middle = 'E.'
+
+    interned = name.intern()
+    assert name_from_string('Knuth, Donald E.').intern() is interned
@@ -3,6 +3,7 @@
 """Test the bibpy.date.PartialDate class."""
 
 from bibpy.date import PartialDate
+import pickle
 import pytest
 
 
@@ -30,3 +31,31 @@ def test_properties_py3():
 
     assert bool(pd1)
     assert not bool(pd2)
+
+
+def test_ordering_and_hashing():
+    dates = [PartialDate(2017, 11, 29), PartialDate(2017), PartialDate(2016),
+             PartialDate(2017, 11), PartialDate(2017, 2, 3)]
+
+    assert sorted(dates) == [PartialDate(2016), PartialDate(2017),
+                             PartialDate(2017, 2, 3), PartialDate(2017, 11),
+                             PartialDate(2017, 11, 29)]
+    assert PartialDate(2017) < PartialDate(2017, 1, 1)
+    assert PartialDate(2017, 1) >= PartialDate(2017)
+    assert hash(PartialDate(2017, 11)) == hash(PartialDate(2017, 11))
+    assert len({PartialDate(2017, 11), PartialDate(2017, 11)}) == 1
+
+    with pytest.raises(TypeError):
+        PartialDate(2017) < 2017
+
+
+def test_immutable():
+    pd = PartialDate(2017, 11, 29)
+
+    with pytest.raises(AttributeError):
+        pd.year = 2018
+
+    with pytest.raises(AttributeError):
+        pd.extra = 1
+
+    assert pickle.loads(pickle.dumps(pd)) == pd
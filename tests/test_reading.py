@@ -3,6 +3,7 @@
 """Test reading functions."""
 
 import bibpy
+from bibpy.lexers.base_lexer import LexerError
 import pytest
 
 
@@ -78,3 +79,161 @@ def test_reading_encodings():
             format='bibtex',
             encoding='utf-8'
         )
+
+
+@pytest.mark.parametrize('parser', ['fast', 'funcparserlib'])
+def test_reading_mmap(parser, tmp_path):
+    for path, encoding in [('tests/data/unicode.bib', 'utf-8'),
+                           ('tests/data/iso-8859-1.bib', 'latin1'),
+                           ('tests/data/string_variables.bib', 'utf-8')]:
+        expected = bibpy.read_file(path, encoding=encoding, parser=parser,
+                                   ignore_comments=False)
+
+        with open(path, 'rb') as fh:
+            for source in (path, fh):
+                entries = bibpy.read_file(source, encoding=encoding,
+                                          parser=parser, mmap=True,
+                                          ignore_comments=False)
+
+                assert list(entries) == list(expected)
+                assert entries.comments == expected.comments
+
+    # Newlines are translated as when reading in text mode
+    crlf = tmp_path / 'crlf.bib'
+    crlf.write_bytes(b'Comment\r\n@article{key,\r\n title = {A\r\nB}}\r\n')
+    entries = bibpy.read_file(str(crlf), parser=parser, mmap=True,
+                              ignore_comments=False)
+
+    assert entries.entries[0].title == 'A\nB'
+    assert entries.comments == ['Comment\n']
+
+    empty = tmp_path / 'empty.bib'
+    empty.write_bytes(b'')
+
+    assert not bibpy.read_file(str(empty), parser=parser, mmap=True).entries
+
+    with pytest.raises(UnicodeDecodeError):
+        bibpy.read_file('tests/data/iso-8859-1.bib', mmap=True, parser=parser)
+
+    # Encodings that cannot be lexed as bytes are decoded first
+    utf16 = tmp_path / 'utf16.bib'
+    utf16.write_bytes('@article{key, title = {ü}}'.encode('utf-16'))
+    entries = bibpy.read_file(str(utf16), encoding='utf-16', parser=parser,
+                              mmap=True)
+
+    assert entries.entries[0].title == 'ü'
+
+
+@pytest.mark.parametrize('parser', ['fast', 'funcparserlib'])
+def test_reading_mmap_matches_text(parser, tmp_path):
+    path = str(tmp_path / 'test.bib')
+
+    # The second bytes of 'ァ' and 'ボ' in shift_jis are '@' and '{'
+    for source, encoding in [('@article{key, title = {ァボ}}', 'shift_jis'),
+                             ('@article{key, ti\xa0tle = {x}}', 'utf-8'),
+                             ('@article{key, title\xa0= {x}}', 'utf-8'),
+                             ('@article{key, title–x = {x}}', 'utf-8'),
+                             ('@article{k\xd7y, title = {x}}', 'cp1252'),
+                             ('@article{k\xe9y, t\xeftle = {x}}', 'latin1')]:
+        with open(path, 'wb') as fh:
+            fh.write(source.encode(encoding))
+
+        try:
+            expected = bibpy.read_file(path, encoding=encoding, parser=parser)
+        except LexerError:
+            with pytest.raises(LexerError):
+                bibpy.read_file(path, encoding=encoding, parser=parser,
+                                mmap=True)
+        else:
+            entries = bibpy.read_file(path, encoding=encoding, parser=parser,
+                                      mmap=True)
+
+            assert list(entries) == list(expected)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_read_files(workers):
+    paths = [
+        'tests/data/simple_1.bib',
+        'tests/data/invalid_bibtex2.bib',
+        'tests/data/small1.bib',
+    ]
+
+    results = list(bibpy.read_files(
+        paths,
+        format='relaxed',
+        workers=workers,
+        return_exceptions=True
+    ))
+
+    assert [path for path, _ in results] == paths
+    assert list(results[0][1]) == list(bibpy.read_file(paths[0]))
+    assert isinstance(results[1][1], bibpy.error.ParseException)
+    assert list(results[2][1]) == list(bibpy.read_file(paths[2]))
+
+    results = bibpy.read_files(paths, workers=workers, ordered=False,
+                               parser='fast', return_exceptions=True)
+
+    assert sorted(path for path, _ in results) == sorted(paths)
+
+    with pytest.raises(bibpy.error.ReadError) as exc_info:
+        list(bibpy.read_files(paths, workers=workers))
+
+    # Errors name the file that could not be read
+    assert exc_info.value.path == paths[1]
+    assert str(exc_info.value).startswith(paths[1] + ': ')
+    assert isinstance(exc_info.value.error, bibpy.error.ParseException)
+    assert exc_info.value.__cause__ is exc_info.value.error
+
+
+def test_read_file_workers(tmp_path):
+    path = 'tests/data/graphs.bib'
+    expected = bibpy.read_file(path, postprocess=True, ignore_comments=False)
+
+    for workers in (2, 5):
+        entries = bibpy.read_file(path, postprocess=True,
+                                  ignore_comments=False, workers=workers)
+
+        assert entries.all == expected.all
+
+    # An '@' at the start of a line inside a field value makes the first part
+    # incomplete, which is then read together with the rest of the file
+    source = '@article{a, abstract = {Text\n@ more}}\n@article{b,}'
+    assert bibpy.parser.split_entries(source, 2)[0] == (0, 29)
+
+    inside = tmp_path / 'inside.bib'
+    inside.write_text(source)
+    entries = bibpy.read_file(str(inside), workers=2)
+
+    assert entries.all == bibpy.read_string(source).all
+
+    # Errors are the same as when reading sequentially
+    broken = tmp_path / 'broken.bib'
+    broken.write_text('@article{a,}\n' * 10 + '@article!{b,}\n')
+
+    with pytest.raises(LexerError) as exc_info:
+        bibpy.read_file(str(broken))
+
+    with pytest.raises(LexerError) as parallel_exc_info:
+        bibpy.read_file(str(broken), workers=3)
+
+    assert str(parallel_exc_info.value) == str(exc_info.value)
+    assert 'line 11' in str(exc_info.value)
+
+    # Including the columns of errors in parts that start with indentation
+    source = '@article{a,}\n' * 10 + '    @article!{b,}\n' +\
+        '@article{c,}\n' * 8
+    assert bibpy.parser.split_entries(source, 2)[1][0] == 134
+
+    broken.write_text(source)
+
+    with pytest.raises(LexerError) as exc_info:
+        bibpy.read_file(str(broken))
+
+    with pytest.raises(LexerError) as parallel_exc_info:
+        bibpy.read_file(str(broken), workers=2)
+
+    assert str(parallel_exc_info.value) == str(exc_info.value)
+
+    with pytest.raises(ValueError):
+        bibpy.read_file(path, workers=2, mmap=True)
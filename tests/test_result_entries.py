@@ -73,3 +73,89 @@ def test_entries_properties(test_entries):
     assert str(test_entries) == repr(test_entries)
     assert repr(test_entries) ==\
         'Entries(strings=1, preambles=1, comment_entries=1, entries=1)'
+
+
+@pytest.fixture
+def indexed_entries():
+    return bibpy.entries.Entries([
+        bibpy.entry.Entry('article', 'key1', author=['A', 'B'], year=2001),
+        bibpy.entry.Entry('book', 'key2', author=['B'], year=1999),
+        bibpy.entry.Entry('article', 'key3', year=2001),
+        bibpy.entry.Entry('misc', 'key1')
+    ])
+
+
+def test_entries_by_key(indexed_entries):
+    entries = indexed_entries.entries
+
+    assert indexed_entries.by_key('key2') is entries[1]
+
+    # The first of several entries with the same key is returned
+    assert indexed_entries.by_key('key1') is entries[0]
+    assert indexed_entries.get('key3') is entries[2]
+    assert indexed_entries.get('key4') is None
+    assert indexed_entries.get('key4', 1) == 1
+
+    with pytest.raises(KeyError):
+        indexed_entries.by_key('key4')
+
+
+def test_entries_by_type(indexed_entries):
+    entries = indexed_entries.entries
+
+    assert indexed_entries.by_type('article') == [entries[0], entries[2]]
+    assert indexed_entries.by_type('book') == [entries[1]]
+    assert indexed_entries.by_type('online') == []
+
+
+def test_entries_lookup(indexed_entries):
+    entries = indexed_entries.entries
+
+    assert indexed_entries.lookup('year', 2001) == [entries[0], entries[2]]
+    assert indexed_entries.lookup('author', 'B') == entries[:2]
+    assert indexed_entries.lookup('author', 'A', 'B') == entries[:2]
+    assert indexed_entries.lookup('year', 1999, 2001) == entries[:3]
+    assert indexed_entries.lookup('title', 'Title') == []
+    assert indexed_entries.index('year') == {2001: [0, 2], 1999: [1]}
+
+    # Indexes are built once
+    assert indexed_entries.index('year') is indexed_entries.index('year')
+
+
+def test_entries_add_and_remove(indexed_entries):
+    entries = indexed_entries.entries
+    assert indexed_entries.by_type('book') == [entries[1]]
+
+    entry = bibpy.entry.Entry('book', 'key5', year=2001)
+    indexed_entries.add(entry)
+
+    assert entries[-1] is entry
+    assert indexed_entries.by_type('book') == [entries[1], entry]
+    assert indexed_entries.by_key('key5') is entry
+    assert indexed_entries.lookup('year', 2001) ==\
+        [entries[0], entries[2], entry]
+
+    indexed_entries.remove(entries[1])
+
+    assert indexed_entries.by_type('book') == [entry]
+    assert indexed_entries.get('key2') is None
+
+    with pytest.raises(ValueError):
+        indexed_entries.remove(bibpy.entry.Entry('book', 'key6'))
+
+    # Indexes are rebuilt if the list of entries is changed directly
+    entries.append(bibpy.entry.Entry('book', 'key7'))
+    assert indexed_entries.get('key7') is entries[-1]
+
+    # ...but changes to the fields of entries require reindexing
+    entries[-1].bibtype = 'online'
+    indexed_entries.reindex()
+    assert indexed_entries.by_type('online') == [entries[-1]]
+
+
+def test_entries_default_lists():
+    entries = bibpy.entries.Entries()
+    entries.add(bibpy.entry.Entry('book', 'key'))
+
+    assert len(entries.entries) == 1
+    assert bibpy.entries.Entries().entries == []
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""Test the persistent search index."""
+
+import bibpy
+from bibpy.search import numeric_value, SearchIndex
+import os
+import pickle
+import pytest
+
+
+class _Unpickled:
+    """Creates a directory when it is unpickled."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return (os.mkdir, (self.path,))
+
+
+@pytest.fixture
+def bib_files(tmpdir):
+    paths = [str(tmpdir.join('test1.bib')), str(tmpdir.join('test2.bib'))]
+
+    with open(paths[0], 'w') as fh:
+        fh.write('@article{Adams2000, author = {Jane Adams}, '
+                 'title = {Graph Theory}, year = {2000}, '
+                 'pages = {10--20}}\n'
+                 '@book{Smith2001, author = {John Smith}, '
+                 'title = {Graphs and Trees}, year = {2001}, '
+                 'date = {2001-05-01/2002}}\n')
+
+    with open(paths[1], 'w') as fh:
+        fh.write('@article{Adamson1999, author = {Al Adamson}, '
+                 'title = {Trees}, note = {Reprint}, year = {1999}}\n')
+
+    return paths
+
+
+@pytest.fixture
+def index(bib_files):
+    return SearchIndex.build(
+        (path, bibpy.read_file(path)) for path in bib_files
+    )
+
+
+def test_build(index, bib_files):
+    assert len(index) == 3
+    assert repr(index) == 'SearchIndex(files=2, entries=3)'
+    assert [entry.bibkey for entry in index.entries] ==\
+        ['Adams2000', 'Smith2001', 'Adamson1999']
+    assert index.stale_files() == []
+
+
+def test_match(index):
+    assert index.match('bibkey', 'Smith2001') == {1}
+    assert index.match('bibtype', 'article') == {0, 2}
+    assert index.match('year', '2000') == {0}
+    assert index.match('title', 'Graph Theory') == {0}
+
+    # Candidates are case insensitive
+    assert index.match('title', 'graph theory') == {0}
+    assert index.match('title', 'Graph') == {0}
+    assert index.match('title', 'Forests') == set()
+    assert index.match('journal', 'Journal') == set()
+
+
+def test_search(index):
+    assert index.search('author', 'Adam') == {0, 2}
+    assert index.search('title', 'Graph') == {0, 1}
+    assert index.search('title', 'ree') == {1, 2}
+    assert index.search('bibkey', 'Adams') == {0, 2}
+    assert index.search('title', 'Forest') == set()
+
+    # Regular expressions cannot be narrowed down by the index
+    assert index.search('title', 'Gr.ph') == {0, 1, 2}
+    assert index.search('note', 'Re|Pr') == {2}
+
+
+def test_with_field(index):
+    assert index.with_field('note') == {2}
+    assert index.with_field('title') == {0, 1, 2}
+    assert index.with_field('journal') == set()
+
+
+def test_numeric_value():
+    assert numeric_value('year', '2000') == 2000
+    assert numeric_value('volume', ' 12 ') == 12
+    assert numeric_value('pages', '327--344') == 327
+    assert numeric_value('pages', '5') == 5
+    assert numeric_value('date', '2001-05-01/2002') == 2001
+    assert numeric_value('date', '-0050') == -50
+
+    with pytest.raises(ValueError):
+        numeric_value('year', '1988??')
+
+    with pytest.raises(ValueError):
+        numeric_value('pages', 'xii--xv')
+
+
+def test_compare(index):
+    assert index.compare('year', '<', 2000) == {2}
+    assert index.compare('year', '<=', 2000) == {0, 2}
+    assert index.compare('year', '>', 2000) == {1}
+    assert index.compare('year', '>=', 2000) == {0, 1}
+    assert index.compare('year', '=', 2001) == {1}
+    assert index.compare('year', '=', 1980) == set()
+    assert index.compare('pages', '>', 5) == {0}
+    assert index.compare('date', '=', 2001) == {1}
+    assert index.compare('volume', '>', 5) == set()
+
+    # Fields with non-numeric values cannot be compared using the index
+    assert index.compare('title', '>', 5) is None
+
+
+def test_iter_files(index, bib_files):
+    files = list(index.iter_files())
+
+    assert [path for path, _ in files] == bib_files
+    assert [len(entries) for _, entries in files] == [2, 1]
+
+    files = list(index.iter_files({2, 0}))
+
+    assert [[entry.bibkey for entry in entries] for _, entries in files] ==\
+        [['Adams2000'], ['Adamson1999']]
+
+
+def test_save_and_load(tmpdir, index, bib_files):
+    path = str(tmpdir.join('index'))
+    index.save(path)
+    loaded = SearchIndex.load(path)
+
+    assert loaded.entries == index.entries
+    assert loaded.files == index.files
+    assert loaded.search('author', 'Adam') == {0, 2}
+    assert loaded.compare('year', '>=', 2000) == {0, 1}
+    assert loaded.compare('title', '>', 5) is None
+    assert loaded.stale_files() == []
+
+    with open(bib_files[1], 'a') as fh:
+        fh.write('@misc{key,}\n')
+
+    assert loaded.stale_files() == [bib_files[1]]
+
+    os.remove(bib_files[0])
+    assert loaded.stale_files() == bib_files
+
+
+def test_load_invalid(tmpdir, bib_files):
+    with pytest.raises(ValueError):
+        SearchIndex.load(bib_files[0])
+
+    # Index files are never unpickled
+    path = str(tmpdir.join('index'))
+    marker = str(tmpdir.join('unpickled'))
+
+    with open(path, 'wb') as fh:
+        fh.write(pickle.dumps(_Unpickled(marker)))
+
+    with pytest.raises(ValueError):
+        SearchIndex.load(path)
+
+    assert not os.path.exists(marker)
+
+    SearchIndex.build([]).save(path)
+
+    with open(path, 'rb') as fh:
+        data = fh.read()
+
+    with open(path, 'wb') as fh:
+        fh.write(data[:len(data) // 2])
+
+    with pytest.raises(ValueError):
+        SearchIndex.load(path)
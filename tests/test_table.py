@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""Test columnar tables of entries."""
+
+import bibpy
+from bibpy.entry import Entry
+from bibpy.table import EntryTable
+import pytest
+
+
+@pytest.fixture
+def entries():
+    return bibpy.entries.Entries(entries=[
+        Entry('article', 'key1', author='Author', year=2001),
+        Entry('book', 'key2', title='Title', year=1999),
+        Entry('misc', 'key3', author='Other', note='Note')
+    ])
+
+
+def test_to_columns(entries):
+    table = entries.to_columns()
+
+    assert len(table) == 3
+    assert repr(table) == 'EntryTable(rows=3, fields=4)'
+    assert table.fields == ['author', 'year', 'title', 'note']
+    assert table.names == ['bibkey', 'bibtype', 'author', 'year', 'title',
+                           'note']
+    assert table.bibkeys == ['key1', 'key2', 'key3']
+    assert table.bibtypes == ['article', 'book', 'misc']
+    assert table['bibkey'] == table.bibkeys
+    assert table['author'] == ['Author', None, 'Other']
+    assert table['year'] == [2001, 1999, None]
+    assert table['note'] == [None, None, 'Note']
+    assert list(table.columns) == table.names
+
+    assert 'bibkey' in table
+    assert 'author' in table
+    assert 'journal' not in table
+
+    with pytest.raises(KeyError):
+        table['journal']
+
+
+def test_to_columns_fields(entries):
+    table = entries.to_columns(['year', 'journal'])
+
+    assert table.fields == ['year', 'journal']
+    assert table['year'] == [2001, 1999, None]
+    assert table['journal'] == [None, None, None]
+
+
+def test_empty_table():
+    table = bibpy.entries.Entries().to_columns()
+
+    assert len(table) == 0
+    assert table.fields == []
+    assert table.names == ['bibkey', 'bibtype']
+
+
+def test_mask(entries):
+    table = entries.to_columns()
+
+    assert table.mask('author') == [False, True, False]
+    assert table.mask('year') == [False, False, True]
+    assert table.mask('bibkey') == [False, False, False]
+
+    # Masks are computed once
+    assert table.mask('author') is table.mask('author')
+
+    with pytest.raises(KeyError):
+        table.mask('journal')
+
+
+def test_where_and_take(entries):
+    table = entries.to_columns()
+    present = table.where([not missing for missing in table.mask('year')])
+
+    assert present.bibkeys == ['key1', 'key2']
+    assert present['year'] == [2001, 1999]
+    assert present.fields == table.fields
+
+    taken = table.take([2, 0])
+
+    assert taken.bibtypes == ['misc', 'article']
+    assert taken['note'] == ['Note', None]
+
+    with pytest.raises(ValueError):
+        table.where([True])
+
+
+def test_invalid_columns():
+    with pytest.raises(ValueError):
+        EntryTable(['key1', 'key2'], ['article', 'book'], {'year': [2001]})
+
+    with pytest.raises(ValueError):
+        EntryTable(['key1', 'key2'], ['article'], {})
+
+
+def test_table_from_file():
+    entries = bibpy.read_file('tests/data/simple_1.bib', postprocess=True)
+    table = entries.to_columns()
+
+    assert table.bibkeys == [entry.bibkey for entry in entries.entries]
+
+    for field in table.fields:
+        assert table[field] == [entry[field] for entry in entries.entries]
+
+
+def test_to_numpy(entries):
+    numpy = pytest.importorskip('numpy')
+    arrays = entries.to_columns().to_numpy()
+
+    assert arrays['year'].dtype == numpy.int64
+    assert arrays['year'].mask.tolist() == [False, False, True]
+    assert arrays['year'].compressed().tolist() == [2001, 1999]
+    assert arrays['author'].dtype == object
+    assert arrays['bibkey'].tolist() == ['key1', 'key2', 'key3']
+
+
+def test_to_pandas(entries):
+    pytest.importorskip('pandas')
+    df = entries.to_columns().to_pandas()
+
+    assert list(df.columns) == ['bibkey', 'bibtype', 'author', 'year',
+                                'title', 'note']
+    assert df['bibkey'].tolist() == ['key1', 'key2', 'key3']
+    assert df['note'].isnull().tolist() == [True, True, False]
+
+
+def test_to_arrow(entries):
+    pytest.importorskip('pyarrow')
+    arrow = entries.to_columns().to_arrow()
+
+    assert arrow.column_names == ['bibkey', 'bibtype', 'author', 'year',
+                                  'title', 'note']
+    assert arrow.column('year').null_count == 1
@@ -4,6 +4,7 @@
 
 from bibpy.error import ParseException
 from bibpy.parser import parse_query
+import bibpy.parser
 import bibpy.tools
 from io import StringIO
 import pytest
@@ -116,3 +117,36 @@ def test_get_abspath_for():
 
     assert os.path.dirname(__file__) == dir_path
     assert file_path == 'test_tools.py'
+
+
+def test_grammars_are_cached():
+    for format in ('bibtex', 'biblatex', 'mixed', 'relaxed', 'date'):
+        assert bibpy.parser.grammar_from_format(format) is\
+            bibpy.parser.grammar_from_format(format)
+
+    parse_query('year<2000', 'field')
+    grammar = bibpy.parser._grammars['field']
+    parse_query('year>2000', 'field')
+
+    assert bibpy.parser._grammars['field'] is grammar
+
+    with pytest.raises(KeyError):
+        bibpy.parser.grammar_from_format('field')
+
+
+def test_parallel_map():
+    items = [2, 0, 5]
+
+    for workers in (1, 2):
+        results = list(bibpy.tools.parallel_map(abs, items, workers))
+        assert results == [(2, 2), (0, 0), (5, 5)]
+
+        results = bibpy.tools.parallel_map(abs, items, workers, ordered=False)
+        assert sorted(results) == [(0, 0), (2, 2), (5, 5)]
+
+        # Errors are returned as results and do not affect the other items
+        results = list(bibpy.tools.parallel_map(abs, [1, 'a', -3], workers))
+
+        assert [item for item, _ in results] == [1, 'a', -3]
+        assert isinstance(results[1][1], TypeError)
+        assert results[2][1] == 3